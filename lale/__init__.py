@@ -13,3 +13,4 @@
 # limitations under the License.
 
 from .helpers import wrap_imported_operators
+from . import settings
@@ -49,8 +49,9 @@ class SeriesWithSchema(pd.Series):
     def _constructor(self):
         return SeriesWithSchema
 
-def add_schema(obj, schema):
-    lale.helpers.validate_is_schema(schema)
+def add_schema(obj, schema, validate=True):
+    if validate:
+        lale.helpers.validate_is_schema(schema)
     if isinstance(obj, np.ndarray):
         result = obj.view(NDArrayWithSchema)
         result.json_schema = schema
@@ -114,10 +115,14 @@ def dataframe_to_schema(df):
     if isinstance(df, DataFrameWithSchema) and hasattr(df, 'json_schema'):
         return df.json_schema
     n_rows, n_columns = df.shape
-    assert n_columns == len(df.columns) and n_columns == len(df.dtypes)
+    dtypes = df.dtypes
+    assert n_columns == len(df.columns) and n_columns == len(dtypes)
+    dtype_schemas = {}
+    for dtype in set(dtypes):
+        dtype_schemas[dtype] = dtype_to_schema(dtype)
     items = [
-        {'description': str(col), **dtype_to_schema(df.dtypes[col])}
-        for col in df.columns]
+        {'description': str(col), **dtype_schemas[dtype]}
+        for col, dtype in zip(df.columns, dtypes)]
     result = {
         'type': 'array',
         'minItems': n_rows,
@@ -0,0 +1,190 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import copy
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import joblib
+except ImportError:
+    from sklearn.externals import joblib # type: ignore
+
+logger = logging.getLogger(__name__)
+
+class FitCache():
+    """Memoizes trained pipeline steps together with their outputs on the
+    training data, so that fitting a pipeline whose prefix was already
+    fitted on the same data only trains the steps that changed.
+
+    A step is identified by its operator class and hyperparameters, by
+    the identities of its predecessors (or a fingerprint of X for source
+    steps), and by a fingerprint of y. Pass the cache to
+    `TrainablePipeline.fit` as `memory=cache`, or to the optimizers that
+    accept a `memory` argument, to share it between trials and folds.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Bound on the number of bytes of step outputs kept in memory, by
+        default 1 GiB. The least recently used entries get evicted first.
+    directory : str, optional
+        If set, entries are also written to this directory with joblib,
+        and read back memory-mapped when they are no longer in memory.
+    max_disk_bytes : int, optional
+        Bound on the size of the files in the directory, by default
+        unbounded. The least recently used files get deleted first.
+    """
+    def __init__(self, max_bytes:int=2**30, directory:Optional[str]=None, max_disk_bytes:Optional[int]=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._entries:collections.OrderedDict = collections.OrderedDict()
+        self._sizes:Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def fingerprint(self, data)->str:
+        """Hash of the contents of X or y."""
+        return joblib.hash(data)
+
+    def step_key(self, operator, pred_keys:List[str], y_key:str, is_sink:bool)->str:
+        impl_class = type(operator._impl)
+        hyperparams = getattr(operator, '_hyperparams', None)
+        return joblib.hash((impl_class.__module__, impl_class.__qualname__,
+                            hyperparams, pred_keys, y_key, is_sink))
+
+    def _path(self, key:str)->str:
+        assert self.directory is not None
+        return os.path.join(self.directory, key + '.joblib')
+
+    def get(self, key:str)->Optional[Tuple[Any, Any]]:
+        """Returns a copy of the trained step and its output, or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key])
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                # copy-on-write, so that consumers cannot change the file
+                value = joblib.load(path, mmap_mode='c')
+                os.utime(path)
+            except (OSError, EOFError) as e:
+                logger.debug(f'cache miss for {path}: {e}')
+            else:
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key:str, value:Tuple[Any, Any])->None:
+        """Stores a copy of the trained step and its output."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        if self.directory is not None and not os.path.exists(self._path(key)):
+            path = self._path(key)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            joblib.dump(value, tmp_path)
+            os.replace(tmp_path, path)
+            self._evict_from_disk()
+
+    def _remember(self, key:str, value:Tuple[Any, Any])->None:
+        from lale.operators import _nbytes
+        size = _nbytes(value[1])
+        if size <= self.max_bytes:
+            with self._lock:
+                self._entries[key] = value
+                self._sizes[key] = size
+                while sum(self._sizes.values()) > self.max_bytes:
+                    evicted, _ = self._entries.popitem(last=False)
+                    del self._sizes[evicted]
+
+    # Trials that run in forked processes fill a copy of the cache.
+    # lale.search.parallel_fmin uses these to send the new entries back.
+
+    def _mark(self):
+        with self._lock:
+            return set(self._entries.keys()), self.hits, self.misses
+
+    def _changes_since(self, mark):
+        keys, hits, misses = mark
+        with self._lock:
+            # entries in the directory are already shared with the parent
+            entries = [] if self.directory is not None else [
+                (key, value) for key, value in self._entries.items() if key not in keys]
+            return entries, self.hits - hits, self.misses - misses
+
+    def _apply_changes(self, changes)->None:
+        entries, hits, misses = changes
+        for key, value in entries:
+            self._remember(key, value)
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def _evict_from_disk(self)->None:
+        if self.max_disk_bytes is None:
+            return
+        assert self.directory is not None
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.joblib'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self)->None:
+        """Removes all entries, including the files in the directory."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.joblib'):
+                    os.remove(os.path.join(self.directory, name))
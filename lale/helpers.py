@@ -13,7 +13,6 @@
 # limitations under the License.
 
 import ast
-import contextlib
 import json
 import jsonschema
 import jsonsubschema
@@ -24,7 +23,6 @@ import re
 import sys
 import time
 import traceback
-import urllib
 import warnings
 import yaml
 import scipy.sparse
@@ -33,11 +31,17 @@ import graphviz
 from sklearn.model_selection import StratifiedKFold
 from sklearn.metrics import accuracy_score, log_loss
 from sklearn.utils.metaestimators import _safe_split
+try:
+    import joblib
+except ImportError:
+    from sklearn.externals import joblib # type: ignore
 import copy
 import logging
 import importlib
 import inspect
 import pkgutil
+from typing import Dict
+from lale.search.pruning import TrialPruned
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
@@ -88,6 +92,9 @@ def data_to_json(data, subsample_array = True):
     elif isinstance(data, np.ndarray):
         return ndarray_to_json(data, subsample_array)
     elif type(data) is scipy.sparse.csr_matrix:
+        if subsample_array:
+            # only the rows that ndarray_to_json keeps get densified
+            data = data[:10]
         return ndarray_to_json(data.toarray(), subsample_array)
     elif isinstance(data, pd.DataFrame) or isinstance(data, pd.Series):
         np_array = data.values
@@ -95,6 +102,28 @@ def data_to_json(data, subsample_array = True):
     else:
         return data
 
+def sample_rows(data, num_rows, seed=None):
+    """Keep num_rows rows of each array, sparse matrix, or dataframe in
+    data, the first ones or, given a seed, rows drawn at random."""
+    if type(data) is tuple or type(data) is list:
+        return [sample_rows(elem, num_rows, seed) for elem in data]
+    elif type(data) is dict:
+        return {key: sample_rows(data[key], num_rows, seed) for key in data}
+    elif isinstance(data, np.ndarray) or scipy.sparse.isspmatrix_csr(data) \
+         or isinstance(data, pd.DataFrame) or isinstance(data, pd.Series):
+        if len(data.shape) == 0 or data.shape[0] <= num_rows:
+            return data
+        if seed is None:
+            rows = np.arange(num_rows)
+        else:
+            rng = np.random.RandomState(seed)
+            rows = np.sort(rng.choice(data.shape[0], num_rows, replace=False))
+        if isinstance(data, pd.DataFrame) or isinstance(data, pd.Series):
+            return data.iloc[rows]
+        return data[rows]
+    else:
+        return data
+
 def dict_without(orig_dict, key):
     return {k: orig_dict[k] for k in orig_dict if k != key}
 
@@ -142,30 +171,209 @@ def ndarray_to_json(arr, subsample_array=True):
 def print_yaml(what, doc, file=sys.stdout):
     print(yaml.dump({what: doc}).strip(), file=file)
 
-def validate_schema(value, schema, subsample_array=True):
+_NATIVE_SCHEMA_KEYS = {
+    '$schema', 'description', 'type', 'items', 'minItems', 'maxItems',
+    'anyOf', 'allOf', 'enum', 'minimum', 'maximum', 'exclusiveMinimum',
+    'exclusiveMaximum'}
+
+def _native_leaf_values(arr):
+    if scipy.sparse.issparse(arr):
+        values = arr.data
+        if arr.nnz < arr.shape[0] * arr.shape[1]:
+            values = np.append(values, arr.dtype.type(0))
+        return values
+    return arr.ravel()
+
+def _native_leaf_is_valid(arr, schema):
+    values = _native_leaf_values(arr)
+    if len(values) == 0:
+        return True
+    # the same types that ndarray_to_json produces
+    if arr.dtype == np.float64 or arr.dtype == np.float32:
+        json_types = {'number'}
+    elif arr.dtype == np.int64:
+        json_types = {'integer', 'number'}
+    elif arr.dtype.kind == 'U':
+        json_types = {'string'}
+    else:
+        return False
+    if 'type' in schema:
+        types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        if not json_types.intersection(types):
+            return False
+    if 'enum' in schema:
+        enum = schema['enum']
+        if any(isinstance(e, bool) for e in enum):
+            return False
+        if 'string' in json_types:
+            enum = [e for e in enum if isinstance(e, str)]
+        else:
+            enum = [e for e in enum if isinstance(e, (int, float))]
+        if not np.all(np.isin(values, enum)):
+            return False
+    if 'number' in json_types:
+        if 'minimum' in schema:
+            if schema.get('exclusiveMinimum', False):
+                below = values <= schema['minimum']
+            else:
+                below = values < schema['minimum']
+            if np.any(below):
+                return False
+        if 'maximum' in schema:
+            if schema.get('exclusiveMaximum', False):
+                above = values >= schema['maximum']
+            else:
+                above = values > schema['maximum']
+            if np.any(above):
+                return False
+    return True
+
+def _native_array_is_valid(arr, level, schema):
+    if schema is True or schema == {}:
+        return True
+    if not isinstance(schema, dict) or not set(schema).issubset(_NATIVE_SCHEMA_KEYS):
+        return False
+    if 'anyOf' in schema:
+        # all elements satisfying the same disjunct is sufficient, not necessary
+        if not any(_native_array_is_valid(arr, level, s) for s in schema['anyOf']):
+            return False
+    if 'allOf' in schema:
+        if not all(_native_array_is_valid(arr, level, s) for s in schema['allOf']):
+            return False
+    if level == len(arr.shape):
+        return _native_leaf_is_valid(arr, schema)
+    if 'type' in schema and schema['type'] != 'array':
+        return False
+    if 'enum' in schema:
+        return False
+    length = arr.shape[level]
+    if length < schema.get('minItems', 0):
+        return False
+    if 'maxItems' in schema and length > schema['maxItems']:
+        return False
+    if 'items' in schema:
+        if not isinstance(schema['items'], dict):
+            return False
+        return _native_array_is_valid(arr, level + 1, schema['items'])
+    return True
+
+def _native_is_valid(value, schema, subsample_array):
+    """Checks value against schema directly on the dtype and shape of
+    arrays and with vectorized operations, without converting to JSON.
+
+    Returns True only if the value is valid. False means that it is
+    invalid or that the schema uses features this check does not cover,
+    either way the JSON-based validation needs to run.
+    """
+    if isinstance(value, dict):
+        if not isinstance(schema, dict) or schema.get('type', None) != 'object':
+            return False
+        allowed = {'$schema', 'description', 'type', 'properties',
+                   'required', 'additionalProperties'}
+        if not set(schema).issubset(allowed):
+            return False
+        properties = schema.get('properties', {})
+        if not set(schema.get('required', [])).issubset(value):
+            return False
+        additional = schema.get('additionalProperties', True)
+        if additional is not True and additional is not False:
+            return False
+        for key, sub_value in value.items():
+            if key in properties:
+                if not _native_is_valid(sub_value, properties[key], subsample_array):
+                    return False
+            elif additional is False:
+                return False
+        return True
+    if isinstance(value, list):
+        if not isinstance(schema, dict) or not set(schema).issubset(_NATIVE_SCHEMA_KEYS):
+            return False
+        if 'anyOf' in schema and not any(
+                _native_is_valid(value, s, subsample_array) for s in schema['anyOf']):
+            return False
+        if 'allOf' in schema and not all(
+                _native_is_valid(value, s, subsample_array) for s in schema['allOf']):
+            return False
+        if schema.get('type', 'array') != 'array' or 'enum' in schema:
+            return False
+        if len(value) < schema.get('minItems', 0):
+            return False
+        if 'maxItems' in schema and len(value) > schema['maxItems']:
+            return False
+        items = schema.get('items', {})
+        if not isinstance(items, dict):
+            return False
+        return all(_native_is_valid(elem, items, subsample_array) for elem in value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        arr = (value.iloc[:10] if subsample_array else value).values
+    elif isinstance(value, np.ndarray) or scipy.sparse.isspmatrix_csr(value):
+        # the same rows that ndarray_to_json keeps
+        arr = value[:10] if subsample_array else value
+    else:
+        return False
+    if len(arr.shape) == 0:
+        return False
+    return _native_array_is_valid(arr, 0, schema)
+
+def validate_schema(value, schema, subsample_array=True, validator=None):
+    if _native_is_valid(value, schema, subsample_array):
+        return
     json_value = data_to_json(value, subsample_array)
-    jsonschema.validate(json_value, schema)
+    if validator is None:
+        jsonschema.validate(json_value, schema)
+    else:
+        validator.validate(json_value)
 
 JSON_META_SCHEMA_URL = 'http://json-schema.org/draft-04/schema#'
+JSON_META_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'json_schema_draft04.json')
 JSON_META_SCHEMA = None
 
+_json_meta_validator = None
+_valid_schemas:Dict[str, bool] = {}
+
+def json_meta_validator():
+    """The validator for the draft-04 meta-schema, which gets loaded from
+    the copy shipped with lale the first time it is needed."""
+    global JSON_META_SCHEMA, _json_meta_validator
+    if _json_meta_validator is None:
+        if JSON_META_SCHEMA is None:
+            with open(JSON_META_SCHEMA_PATH) as f:
+                JSON_META_SCHEMA = json.load(f)
+        _json_meta_validator = jsonschema.Draft4Validator(JSON_META_SCHEMA)
+    return _json_meta_validator
+
+def _schema_key(value):
+    try:
+        return json.dumps(value, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+def _remember_schema(key, is_valid):
+    if key is not None:
+        if len(_valid_schemas) >= 10000:
+            _valid_schemas.clear()
+        _valid_schemas[key] = is_valid
+
 def validate_is_schema(value):
     if '$schema' in value:
         assert value['$schema'] == JSON_META_SCHEMA_URL
-    global JSON_META_SCHEMA
-    if JSON_META_SCHEMA is None:
-        url = JSON_META_SCHEMA_URL
-        with contextlib.closing(urllib.request.urlopen(url)) as f:
-            JSON_META_SCHEMA = json.load(f)
-    jsonschema.validate(value, JSON_META_SCHEMA)
+    key = _schema_key(value)
+    if key is not None and _valid_schemas.get(key, False):
+        return
+    json_meta_validator().validate(value)
+    _remember_schema(key, True)
 
 def is_schema(value):
     if isinstance(value, dict):
+        key = _schema_key(value)
+        if key is not None and key in _valid_schemas:
+            return _valid_schemas[key]
         try:
-            jsonschema.validate(value, JSON_META_SCHEMA)
+            result = json_meta_validator().is_valid(value)
         except:
-            return False
-        return True
+            result = False
+        _remember_schema(key, result)
+        return result
     return False
 
 class SubschemaError(Exception):
@@ -187,7 +395,78 @@ def validate_subschema(sub, sup, sub_name='sub', sup_name='super'):
     if not jsonsubschema.isSubschema(sub, sup):
         raise SubschemaError(sub, sup, sub_name, sup_name)
 
-def cross_val_score_track_trials(estimator, X, y=None, scoring=accuracy_score, cv=5):
+def fit_params_with_memory(estimator, memory):
+    """Only pipelines take a memory argument in fit, see lale.fit_cache."""
+    import lale.operators
+    if memory is not None and isinstance(estimator, lale.operators.TrainablePipeline):
+        return {'memory': memory}
+    return {}
+
+def _reset_peak_rss():
+    try:
+        # resets VmHWM in /proc/self/status, only on Linux
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def _peak_rss():
+    """Peak resident set size in bytes since the last `_reset_peak_rss`,
+    or since the start of the process where that cannot be reset."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _fit_and_score_fold(estimator, X, y, train, test, scoring, memory, track_rss=False):
+    # track_rss resets the peak of the whole process, so it is only set
+    # for folds that run in a joblib worker process, never in the caller's
+    X_train, y_train = _safe_split(estimator, X, y, train)
+    X_test, y_test = _safe_split(estimator, X, y, test, train)
+    if track_rss:
+        _reset_peak_rss()
+    start = time.time()
+    trained_estimator = estimator.fit(X_train, y_train, **fit_params_with_memory(estimator, memory))
+    fit_time = time.time() - start
+    start = time.time()
+    predicted_values = trained_estimator.predict(X_test)
+    predict_time = time.time() - start
+    # not all estimators have predict probability
+    try:
+        y_pred_proba = trained_estimator.predict_proba(X_test)
+        logloss = log_loss(y_true=y_test, y_pred=y_pred_proba)
+    except BaseException:
+        logger.debug("Warning, log loss cannot be computed")
+        logloss = None
+    return {'score': scoring(y_test, predicted_values), 'log_loss': logloss,
+            'fit_time': fit_time, 'predict_time': predict_time,
+            'peak_rss': _peak_rss() if track_rss else None}
+
+def _score_fold(estimator, X, y, train, test, scoring, memory):
+    X_train, y_train = _safe_split(estimator, X, y, train)
+    X_test, y_test = _safe_split(estimator, X, y, test, train)
+    trained_estimator = estimator.fit(X_train, y_train, **fit_params_with_memory(estimator, memory))
+    predicted_values = trained_estimator.predict(X_test)
+    return scoring(y_test, predicted_values)
+
+def _parallel_folds(fold_fn, estimator, X, y, cv, n_jobs, backend, *args):
+    # fit mutates the estimator, so each fold gets its own copy, which
+    # matters for the threading backend where the folds share memory
+    parallel = joblib.Parallel(n_jobs=n_jobs, backend=backend)
+    return parallel(joblib.delayed(fold_fn)(copy.deepcopy(estimator), X, y, train, test, *args)
+                    for train, test in cv.split(X, y))
+
+def cross_val_score_track_trials(estimator, X, y=None, scoring=accuracy_score, cv=5, memory=None, n_jobs=None, backend='loky', return_folds=False, pruner=None):
     """
     Use the given estimator to perform fit and predict for splits defined by 'cv' and compute the given score on 
     each of the splits.
@@ -199,36 +478,50 @@ def cross_val_score_track_trials(estimator, X, y=None, scoring=accuracy_score, c
     :param cv: an integer or an object that has a split function as a generator yielding (train, test) splits as arrays of indices.
         Integer value is used as number of folds in sklearn.model_selection.StratifiedKFold, default is 5.
         Note that any of the iterators from https://scikit-learn.org/stable/modules/cross_validation.html#cross-validation-iterators can be used here.
-
-    :return: cv_results: a list of scores corresponding to each cross validation fold
+    :param memory: an optional lale.fit_cache.FitCache, used when the estimator is a pipeline.
+    :param n_jobs: number of folds evaluated in parallel with joblib, -1 for all processors. By default, folds run one after another.
+    :param backend: joblib backend used when n_jobs is set, 'loky' (processes, the default), 'multiprocessing', or 'threading'.
+        The process backends share large arrays with the workers through memory-mapped files instead of pickling them for every fold.
+        Each fold fits its own copy of the estimator.
+    :param return_folds: whether to also return a list with a dictionary per fold with its score, log_loss, fit_time,
+        predict_time (in seconds), and peak_rss (peak resident set size of the worker process that ran it, in bytes,
+        or None when the folds run one after another in the calling process or with the threading backend).
+    :param pruner: an optional lale.search.pruning.Pruner, asked after each fold whether the scores so far are too poor
+        to go on, in which case lale.search.pruning.TrialPruned gets raised with the means over the folds that ran.
+        Only used when the folds run one after another.
+
+    :return: the mean score, mean log loss, and mean fit and predict time over the folds, and the per-fold results if return_folds
     """
     if isinstance(cv, int):
         cv = StratifiedKFold(cv)
-    
-    cv_results = []
-    log_loss_results = []
-    time_results = []
-    for train, test in cv.split(X, y):
-        X_train, y_train = _safe_split(estimator, X, y, train)
-        X_test, y_test = _safe_split(estimator, X, y, test, train)
-        start = time.time()
-        trained_estimator = estimator.fit(X_train, y_train)
-        predicted_values = trained_estimator.predict(X_test)
-        execution_time = time.time() - start
-        # not all estimators have predict probability
-        try:
-            y_pred_proba = trained_estimator.predict_proba(X_test)
-            logloss = log_loss(y_true=y_test, y_pred=y_pred_proba)
-            log_loss_results.append(logloss)
-        except BaseException:
-            logger.debug("Warning, log loss cannot be computed")
-        cv_results.append(scoring(y_test, predicted_values))
-        time_results.append(execution_time)
 
-    return np.array(cv_results).mean(), np.array(log_loss_results).mean(), np.array(execution_time).mean()
+    pruned = False
+    if n_jobs is None or n_jobs == 1:
+        num_folds = cv.get_n_splits(X, y)
+        folds = []
+        for train, test in cv.split(X, y):
+            folds.append(_fit_and_score_fold(estimator, X, y, train, test, scoring, memory))
+            if pruner is not None and len(folds) < num_folds \
+               and pruner.should_prune([fold['score'] for fold in folds]):
+                pruned = True
+                break
+    else:
+        folds = _parallel_folds(_fit_and_score_fold, estimator, X, y, cv, n_jobs, backend,
+                                scoring, memory, backend != 'threading')
+    cv_results = [fold['score'] for fold in folds]
+    log_loss_results = [fold['log_loss'] for fold in folds if fold['log_loss'] is not None]
+    time_results = [fold['fit_time'] + fold['predict_time'] for fold in folds]
+    result = np.array(cv_results).mean(), np.array(log_loss_results).mean(), np.array(time_results).mean()
+    if pruner is not None:
+        pruner.report(cv_results, complete=not pruned)
+    if pruned:
+        raise TrialPruned(*result, folds)
+    if return_folds:
+        return (*result, folds)
+    return result
 
 
-def cross_val_score(estimator, X, y=None, scoring=accuracy_score, cv=5):
+def cross_val_score(estimator, X, y=None, scoring=accuracy_score, cv=5, memory=None, n_jobs=None, backend='loky'):
     """
     Use the given estimator to perform fit and predict for splits defined by 'cv' and compute the given score on
     each of the splits.
@@ -239,20 +532,18 @@ def cross_val_score(estimator, X, y=None, scoring=accuracy_score, cv=5):
     :param cv: an integer or an object that has a split function as a generator yielding (train, test) splits as arrays of indices.
         Integer value is used as number of folds in sklearn.model_selection.StratifiedKFold, default is 5.
         Note that any of the iterators from https://scikit-learn.org/stable/modules/cross_validation.html#cross-validation-iterators can be used here.
+    :param memory: an optional lale.fit_cache.FitCache, used when the estimator is a pipeline.
+    :param n_jobs: number of folds evaluated in parallel with joblib, -1 for all processors. By default, folds run one after another.
+    :param backend: joblib backend used when n_jobs is set, as in cross_val_score_track_trials.
     :return: cv_results: a list of scores corresponding to each cross validation fold
     """
     if isinstance(cv, int):
         cv = StratifiedKFold(cv)
 
-    cv_results = []
-    for train, test in cv.split(X, y):
-        X_train, y_train = _safe_split(estimator, X, y, train)
-        X_test, y_test = _safe_split(estimator, X, y, test, train)
-        trained_estimator = estimator.fit(X_train, y_train)
-        predicted_values = trained_estimator.predict(X_test)
-        cv_results.append(scoring(y_test, predicted_values))
-
-    return cv_results
+    if n_jobs is None or n_jobs == 1:
+        return [_score_fold(estimator, X, y, train, test, scoring, memory)
+                for train, test in cv.split(X, y)]
+    return _parallel_folds(_score_fold, estimator, X, y, cv, n_jobs, backend, scoring, memory)
 
 def create_operator_using_reflection(class_name, operator_name, param_dict):
     instance = None
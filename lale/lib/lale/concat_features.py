@@ -23,6 +23,9 @@ class ConcatFeaturesImpl():
     """Transformer to concatenate input datasets. 
 
     This transformer concatenates the input datasets column-wise.
+    If some of them are sparse matrices and the overall density is below
+    sparse_threshold, the result is a sparse matrix too, otherwise it is
+    a numpy array.
 
     Examples
     --------
@@ -40,8 +43,8 @@ class ConcatFeaturesImpl():
           [31, 32, 33, 34, 35] ]
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, sparse_threshold=0.3):
+        self._hyperparams = {'sparse_threshold': sparse_threshold}
 
     def transform(self, X):
         """Transform the list of datasets to one single dataset by concatenating column-wise.
@@ -53,28 +56,61 @@ class ConcatFeaturesImpl():
         
         Returns
         -------
-        [type]
-            [description]
+        numpy.ndarray or scipy.sparse.csr_matrix
+            The concatenated dataset.
         """
         np_datasets = []
-        #Preprocess the datasets to convert them to 2-d numpy arrays
+        #Preprocess the datasets to convert them to 2-d numpy arrays or sparse matrices
         for dataset in X:
             if isinstance(dataset, pd.DataFrame) or isinstance(dataset, pd.Series):
                 np_dataset = dataset.values
-            elif isinstance(dataset, scipy.sparse.csr_matrix):
-                np_dataset = dataset.toarray()
-            else:
+            elif scipy.sparse.issparse(dataset):
                 np_dataset = dataset
-            if hasattr(np_dataset, 'shape'):
-                if len(np_dataset.shape) == 1: #To handle numpy column vectors
-                    np_dataset = np.reshape(np_dataset, (np_dataset.shape[0], 1))
+            else:
+                np_dataset = np.asarray(dataset)
+            if len(np_dataset.shape) == 1: #To handle numpy column vectors
+                np_dataset = np.reshape(np_dataset, (np_dataset.shape[0], 1))
             np_datasets.append(np_dataset)
-            
-        result = np.concatenate(np_datasets, axis=1)
+
+        if self._output_is_sparse(np_datasets):
+            return scipy.sparse.hstack(np_datasets, format='csr')
+        return self._concatenate_dense(np_datasets)
+
+    def _output_is_sparse(self, np_datasets):
+        if not any(scipy.sparse.issparse(d) for d in np_datasets):
+            return False
+        n_rows = np_datasets[0].shape[0]
+        n_cols = sum(d.shape[1] for d in np_datasets)
+        if n_rows * n_cols == 0:
+            return False
+        # like sklearn.compose.ColumnTransformer, dense values count as non-zero
+        nnz = sum(d.nnz if scipy.sparse.issparse(d) else d.size for d in np_datasets)
+        return nnz / (n_rows * n_cols) < self._hyperparams['sparse_threshold']
+
+    def _concatenate_dense(self, np_datasets):
+        n_rows = np_datasets[0].shape[0]
+        for d in np_datasets:
+            if d.shape[0] != n_rows:
+                raise ValueError(f'ConcatFeatures got datasets with {n_rows} and {d.shape[0]} rows.')
+        n_cols = sum(d.shape[1] for d in np_datasets)
+        result = np.empty((n_rows, n_cols), dtype=np.result_type(*[d.dtype for d in np_datasets]))
+        start = 0
+        for d in np_datasets:
+            stop = start + d.shape[1]
+            if scipy.sparse.issparse(d):
+                # scatter the non-zeros instead of densifying a copy
+                coo = d.tocoo()
+                coo.sum_duplicates()
+                result[:, start:stop] = 0
+                result[coo.row, start + coo.col] = coo.data
+            else:
+                result[:, start:stop] = d
+            start = stop
         return result
 
     def transform_schema(self, s_X):
         min_cols, max_cols, elem_schema = 0, 0, None
+        n_rows = None
         def join_schemas(s_a, s_b):
             if s_a is None:
                 return s_b
@@ -93,6 +129,8 @@ class ConcatFeaturesImpl():
                 max_ab = max_a + max_b
             return min_ab, max_ab
         for s_dataset in s_X['items']:
+            if 'minItems' in s_dataset and s_dataset['minItems'] == s_dataset.get('maxItems', None):
+                n_rows = s_dataset['minItems']
             s_rows = s_dataset['items']
             if 'type' in s_rows and 'array' == s_rows['type']:
                 s_cols = s_rows['items']
@@ -117,6 +155,9 @@ class ConcatFeaturesImpl():
                 'items': elem_schema}}
         if max_cols != 'unbounded':
             s_result['items']['maxItems'] = max_cols
+        if n_rows is not None:
+            s_result['minItems'] = n_rows
+            s_result['maxItems'] = n_rows
         lale.helpers.validate_is_schema(s_result)
         return s_result
     
@@ -127,8 +168,15 @@ _hyperparams_schema = {
         'description': 'This first object lists all constructor arguments with their types, but omits constraints for conditional hyperparameters.',
         'type': 'object',
         'additionalProperties': False,
+        'required': ['sparse_threshold'],
         'relevantToOptimizer': [],
-        'properties': {}}]}
+        'properties': {
+            'sparse_threshold': {
+                'description': 'If some of the datasets are sparse matrices and the density of the result, counting all values of dense datasets as non-zero, is lower than this value, the result is a sparse matrix. Use 0 to always return a dense array.',
+                'type': 'number',
+                'minimum': 0,
+                'maximum': 1,
+                'default': 0.3}}}]}
 
 _input_fit_schema = {
     '$schema': 'http://json-schema.org/draft-04/schema#',
@@ -176,7 +224,7 @@ _input_predict_schema = {
 
 _output_schema = {
     '$schema': 'http://json-schema.org/draft-04/schema#',
-    'description': 'Output data schema for transformed data using the ConcatFeatures operator.',
+    'description': 'Output data schema for transformed data using the ConcatFeatures operator. This is a scipy.sparse.csr_matrix when some input is sparse and the result is sparse enough, otherwise a numpy array.',
     'type': 'array',
     'items': {
         'type': 'array',
@@ -14,9 +14,15 @@
 
 from lale.lib.sklearn import LogisticRegression
 from hyperopt import fmin, tpe, hp, STATUS_OK, Trials, space_eval
-from lale.helpers import cross_val_score_track_trials, create_instance_from_hyperopt_search_space
+from hyperopt.base import spec_from_misc
+from lale.helpers import cross_val_score_track_trials, create_instance_from_hyperopt_search_space, fit_params_with_memory
 from lale.search.op2hp import hyperopt_search_space
 from lale.search.PGO import PGO
+from lale.search.checkpoint import CheckpointedTrials, resumed_rstate
+from lale.search.parallel_fmin import fmin_parallel, with_time_limits
+from lale.search.trial_cache import TrialCache
+from lale.search.pruning import TrialPruned, trials_summary
+from lale.search.multi_fidelity import best_trial_at_full_budget, fmin_halving, has_budget_hyperparams, subsample, with_budget_iterations
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, log_loss
 import warnings
@@ -35,7 +41,10 @@ logger = logging.getLogger(__name__)
 
 class HyperoptClassifier():
 
-    def __init__(self, model = None, max_evals=50, cv=5, handle_cv_failure = False, pgo:Optional[PGO]=None):
+    def __init__(self, model = None, max_evals=50, cv=5, handle_cv_failure = False, pgo:Optional[PGO]=None, memory=None, n_jobs:Optional[int]=None,
+                 halving:Optional[str]=None, eta:int=3, min_budget:Optional[float]=None, budget_resource:str='auto', pruner=None,
+                 max_opt_time:Optional[float]=None, max_eval_time:Optional[float]=None,
+                 checkpoint:Optional[str]=None, resume:Optional[str]=None, deduplicate:bool=True):
         """ Instantiate the HyperoptClassifier that will use the given model and other parameters to select the 
         best performing trainable instantiation of the model. This optimizer uses negation of accuracy_score 
         as the performance metric to be minimized by Hyperopt.
@@ -60,6 +69,64 @@ class HyperoptClassifier():
             , by default False
         pgo : Optional[PGO], optional
             [description], by default None
+        memory : lale.fit_cache.FitCache, optional
+            Cache shared by all trials and folds, so that pipelines whose
+            prefix was already trained on the same data only train the
+            remaining steps, by default None
+        pruner : lale.search.pruning.Pruner, optional
+            Policy for stopping the cross validation of a trial after some
+            folds when it cannot compete, such as MedianPruner or
+            IncumbentPruner. Such a trial is reported with the mean score
+            of the folds that ran and 'pruned': True in its result, and is
+            never picked as the best one. By default None.
+        n_jobs : int, optional
+            Number of trials evaluated concurrently in a pool of local
+            processes, -1 for all processors. By default, trials run one
+            after another. Each batch of trials is suggested based on the
+            previous batches, so the search is deterministic for a given
+            n_jobs. Ignored with halving, whose trials run one after
+            another.
+        halving : 'successive_halving' or 'hyperband', optional
+            If set, configurations are first evaluated with a small budget,
+            and only the best 1/eta of them get promoted to eta times larger
+            budgets, up to the full one. max_evals is then the number of
+            configurations sampled. Hyperband runs several such brackets
+            starting at different budgets. By default None, where every
+            trial uses the full budget.
+        eta : int, optional
+            Promotion factor for halving, by default 3.
+        min_budget : float, optional
+            Smallest budget, as a fraction of the full one, by default
+            1/eta**2.
+        budget_resource : 'auto', 'samples', or 'iterations', optional
+            What a budget scales. 'samples' trains on a stratified
+            subsample of the rows, 'iterations' scales the n_estimators
+            or max_iter hyperparameters. 'auto', the default, uses
+            iterations if some operator of the trial has them, and
+            samples otherwise.
+        max_opt_time : float, optional
+            Wall-clock budget in seconds for the whole search. No trial
+            starts after it ran out, a running one gets killed, and fit
+            returns the best model found so far. By default None.
+        max_eval_time : float, optional
+            Wall-clock budget in seconds for each trial. A trial that takes
+            longer gets killed and counts as failed, with 'timed_out': True
+            in its result. By default None.
+        checkpoint : str, optional
+            File to which every finished trial gets appended as a line of
+            JSON, by default None.
+        resume : str, optional
+            File written by an earlier run with checkpoint, whose trials
+            the search starts from, so that fit only runs the remaining
+            ones out of max_evals. New trials also get appended to it
+            unless checkpoint names another file. A missing file counts
+            as no trials. By default None.
+        deduplicate : bool, optional
+            Whether a configuration that was already evaluated reuses the
+            earlier result instead of getting fitted again. Configurations
+            are compared by the to_json of the operator instantiated from
+            them. The counts show up as cache_hits and cache_misses in
+            get_trials_summary. By default True.
         
         Raises
         ------
@@ -73,25 +140,56 @@ class HyperoptClassifier():
             self.model = model
         self.search_space = hp.choice('meta_model', [hyperopt_search_space(self.model, pgo=pgo)])
         self.handle_cv_failure = handle_cv_failure
+        self.memory = memory
+        self.n_jobs = n_jobs
+        if halving not in [None, 'successive_halving', 'hyperband']:
+            raise ValueError(f"Unknown halving {halving}, expected None, 'successive_halving', or 'hyperband'.")
+        if budget_resource not in ['auto', 'samples', 'iterations']:
+            raise ValueError(f"Unknown budget_resource {budget_resource}, expected 'auto', 'samples', or 'iterations'.")
+        if halving is not None and n_jobs is not None and n_jobs != 1:
+            logger.warning(f'With halving {halving}, trials run one after another, ignoring n_jobs {n_jobs}.')
+        self.halving = halving
+        self.eta = eta
+        self.min_budget = min_budget
+        self.budget_resource = budget_resource
+        self.pruner = pruner
+        self.max_opt_time = max_opt_time
+        self.max_eval_time = max_eval_time
         self.cv = cv
-        self.trials = Trials()
+        self.deduplicate = deduplicate
+        self.checkpoint = checkpoint
+        self.resume = resume
+        if checkpoint is None and resume is None:
+            self.trials = Trials()
+        else:
+            self.trials = CheckpointedTrials(checkpoint or resume, resume_from=resume)
 
 
     def fit(self, X_train, y_train):
 
-        def hyperopt_train_test(params, X_train, y_train):
+        def hyperopt_train_test(params, X_train, y_train, budget=1.0):
             warnings.filterwarnings("ignore")
 
             clf = create_instance_from_hyperopt_search_space(self.model, params)
+            if budget < 1:
+                resource = self.budget_resource
+                if resource == 'auto':
+                    resource = 'iterations' if has_budget_hyperparams(clf) else 'samples'
+                if resource == 'iterations':
+                    clf = with_budget_iterations(clf, budget)
+                else:
+                    X_train, y_train = subsample(X_train, y_train, budget, SEED)
             try:
-                cv_score, logloss, execution_time = cross_val_score_track_trials(clf, X_train, y_train, cv=self.cv)
+                cv_score, logloss, execution_time = cross_val_score_track_trials(clf, X_train, y_train, cv=self.cv, memory=self.memory, pruner=self.pruner)
                 logger.debug("Successful trial of hyperopt")
+            except TrialPruned:
+                raise
             except BaseException as e:
                 #If there is any error in cross validation, use the accuracy based on a random train-test split as the evaluation criterion
                 if self.handle_cv_failure:
                     X_train_part, X_validation, y_train_part, y_validation = train_test_split(X_train, y_train, test_size=0.20)
                     start = time.time()
-                    clf_trained = clf.fit(X_train_part, y_train_part)
+                    clf_trained = clf.fit(X_train_part, y_train_part, **fit_params_with_memory(clf, self.memory))
                     predictions = clf_trained.predict(X_validation)
                     execution_time = time.time() - start
                     y_pred_proba = clf_trained.predict_proba(X_validation)
@@ -111,24 +209,46 @@ class HyperoptClassifier():
         def get_final_trained_clf(params, X_train, y_train):
             warnings.filterwarnings("ignore")
             clf = create_instance_from_hyperopt_search_space(self.model, params)
-            clf = clf.fit(X_train, y_train)
+            clf = clf.fit(X_train, y_train, **fit_params_with_memory(clf, self.memory))
             return clf
 
-        def f(params):
+        def f(params, budget=1.0):
             params_to_save = copy.deepcopy(params)
+            pruned = False
             try:
-                acc, logloss, execution_time = hyperopt_train_test(params, X_train=X_train, y_train=y_train)
+                acc, logloss, execution_time = hyperopt_train_test(params, X_train=X_train, y_train=y_train, budget=budget)
+            except TrialPruned as e:
+                acc, logloss, execution_time = e.score, e.log_loss, e.time
+                pruned = True
             except BaseException as e:
                 logger.warning("Exception caught in HyperoptClassifer:{}, setting accuracy to zero".format(e))
                 acc = 0
                 execution_time = 0
                 logloss = 0
-            return {'loss': -acc, 'time': execution_time, 'log_loss': logloss, 'status': STATUS_OK, 'params': params_to_save}
+            return {'loss': -acc, 'time': execution_time, 'log_loss': logloss, 'status': STATUS_OK, 'params': params_to_save, 'pruned': pruned}
 
 
-        fmin(f, self.search_space, algo=tpe.suggest, max_evals=self.max_evals, trials=self.trials, rstate=np.random.RandomState(SEED))
-        best_params = space_eval(self.search_space, self.trials.argmin)
-        logger.info('best accuracy: {:.1%}\nbest hyperparams found using {} hyperopt trials: {}'.format(-1*self.trials.average_best_error(), self.max_evals, best_params))
+        deadline = None if self.max_opt_time is None else time.time() + self.max_opt_time
+        # trials may run in forked processes, which send back their changes to these
+        shared = [obj for obj in [self.pruner, self.memory] if obj is not None]
+        objective = with_time_limits(f, self.max_eval_time, deadline, shared)
+        cache = None
+        if self.deduplicate:
+            def describe(params, budget=1.0):
+                return create_instance_from_hyperopt_search_space(self.model, params).to_json(), budget
+            cache = TrialCache(describe, self.trials)
+        if self.halving is not None:
+            min_budget = self.min_budget if self.min_budget is not None else 1 / self.eta ** 2
+            fmin_halving(objective if cache is None else cache.wrap(objective), self.search_space, tpe.suggest, self.max_evals, self.trials, resumed_rstate(SEED, self.trials),
+                         min_budget, self.eta, hyperband=(self.halving == 'hyperband'), deadline=deadline)
+        elif (self.n_jobs is None or self.n_jobs == 1) and deadline is None:
+            fmin(objective if cache is None else cache.wrap(objective), self.search_space, algo=tpe.suggest, max_evals=self.max_evals, trials=self.trials, rstate=resumed_rstate(SEED, self.trials))
+        else:
+            fmin_parallel(objective, self.search_space, tpe.suggest, self.max_evals, self.trials, resumed_rstate(SEED, self.trials),
+                          self.n_jobs or 1, deadline, cache, shared)
+        best_trial = best_trial_at_full_budget(self.trials)
+        best_params = space_eval(self.search_space, spec_from_misc(best_trial['misc']))
+        logger.info('best accuracy: {:.1%}\nbest hyperparams found using {} hyperopt trials: {}'.format(-1*best_trial['result']['loss'], self.max_evals, best_params))
         trained_clf = get_final_trained_clf(best_params, X_train, y_train)
 
         return trained_clf
@@ -148,6 +268,9 @@ class HyperoptClassifier():
     def get_trials(self):
         return self.trials
 
+    def get_trials_summary(self):
+        return trials_summary(self.trials)
+
 
 if __name__ == '__main__':
     from lale.lib.lale import ConcatFeatures
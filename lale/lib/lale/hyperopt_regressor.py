@@ -14,9 +14,15 @@
 
 from lale.lib.sklearn import RandomForestRegressor
 from hyperopt import fmin, tpe, hp, STATUS_OK, Trials, space_eval
-from lale.helpers import cross_val_score_track_trials, create_instance_from_hyperopt_search_space
+from hyperopt.base import spec_from_misc
+from lale.helpers import cross_val_score_track_trials, create_instance_from_hyperopt_search_space, fit_params_with_memory
 from lale.search.op2hp import hyperopt_search_space
 from lale.search.PGO import PGO
+from lale.search.checkpoint import CheckpointedTrials, resumed_rstate
+from lale.search.parallel_fmin import fmin_parallel, with_time_limits
+from lale.search.trial_cache import TrialCache
+from lale.search.pruning import TrialPruned, trials_summary
+from lale.search.multi_fidelity import best_trial_at_full_budget, fmin_halving, has_budget_hyperparams, subsample, with_budget_iterations
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, log_loss
 from sklearn.model_selection import KFold
@@ -32,7 +38,10 @@ logger = logging.getLogger(__name__)
 
 class HyperoptRegressor():
 
-    def __init__(self, model = None, max_evals=50, handle_cv_failure = False, pgo:Optional[PGO]=None):
+    def __init__(self, model = None, max_evals=50, handle_cv_failure = False, pgo:Optional[PGO]=None, memory=None, n_jobs:Optional[int]=None,
+                 halving:Optional[str]=None, eta:int=3, min_budget:Optional[float]=None, budget_resource:str='auto', pruner=None,
+                 max_opt_time:Optional[float]=None, max_eval_time:Optional[float]=None,
+                 checkpoint:Optional[str]=None, resume:Optional[str]=None, deduplicate:bool=True):
         self.max_evals = max_evals
         if model is None:
             self.model = RandomForestRegressor
@@ -40,24 +49,55 @@ class HyperoptRegressor():
             self.model = model
         self.search_space = hp.choice('meta_model', [hyperopt_search_space(self.model, pgo=pgo)])
         self.handle_cv_failure = handle_cv_failure
-        self.trials = Trials()
+        self.memory = memory
+        self.n_jobs = n_jobs
+        if halving not in [None, 'successive_halving', 'hyperband']:
+            raise ValueError(f"Unknown halving {halving}, expected None, 'successive_halving', or 'hyperband'.")
+        if budget_resource not in ['auto', 'samples', 'iterations']:
+            raise ValueError(f"Unknown budget_resource {budget_resource}, expected 'auto', 'samples', or 'iterations'.")
+        if halving is not None and n_jobs is not None and n_jobs != 1:
+            logger.warning(f'With halving {halving}, trials run one after another, ignoring n_jobs {n_jobs}.')
+        self.halving = halving
+        self.eta = eta
+        self.min_budget = min_budget
+        self.budget_resource = budget_resource
+        self.pruner = pruner
+        self.max_opt_time = max_opt_time
+        self.max_eval_time = max_eval_time
+        self.deduplicate = deduplicate
+        self.checkpoint = checkpoint
+        self.resume = resume
+        if checkpoint is None and resume is None:
+            self.trials = Trials()
+        else:
+            self.trials = CheckpointedTrials(checkpoint or resume, resume_from=resume)
 
 
     def fit(self, X_train, y_train):
 
-        def hyperopt_train_test(params, X_train, y_train):
+        def hyperopt_train_test(params, X_train, y_train, budget=1.0):
             warnings.filterwarnings("ignore")
 
             reg = create_instance_from_hyperopt_search_space(self.model, params)
+            if budget < 1:
+                resource = self.budget_resource
+                if resource == 'auto':
+                    resource = 'iterations' if has_budget_hyperparams(reg) else 'samples'
+                if resource == 'iterations':
+                    reg = with_budget_iterations(reg, budget)
+                else:
+                    X_train, y_train = subsample(X_train, y_train, budget, SEED)
             try:
-                cv_score, logloss, execution_time = cross_val_score_track_trials(reg, X_train, y_train, cv=KFold(10), scoring = r2_score)
+                cv_score, logloss, execution_time = cross_val_score_track_trials(reg, X_train, y_train, cv=KFold(10), scoring = r2_score, memory=self.memory, pruner=self.pruner)
                 logger.debug("Successful trial of hyperopt")
+            except TrialPruned:
+                raise
             except BaseException as e:
                 #If there is any error in cross validation, use the accuracy based on a random train-test split as the evaluation criterion
                 if self.handle_cv_failure:
                     X_train_part, X_validation, y_train_part, y_validation = train_test_split(X_train, y_train, test_size=0.20)
                     start = time.time()
-                    reg_trained = reg.fit(X_train_part, y_train_part)
+                    reg_trained = reg.fit(X_train_part, y_train_part, **fit_params_with_memory(reg, self.memory))
                     predictions = reg_trained.predict(X_validation)
                     execution_time = time.time() - start
                     cv_score = r2_score(y_validation, predictions)
@@ -71,23 +111,45 @@ class HyperoptRegressor():
         def get_final_trained_reg(params, X_train, y_train):
             warnings.filterwarnings("ignore")
             reg = create_instance_from_hyperopt_search_space(self.model, params)
-            reg = reg.fit(X_train, y_train)
+            reg = reg.fit(X_train, y_train, **fit_params_with_memory(reg, self.memory))
             return reg
 
-        def f(params):
+        def f(params, budget=1.0):
+            pruned = False
             try:
-                r_squared, logloss, execution_time = hyperopt_train_test(params, X_train=X_train, y_train=y_train)
+                r_squared, logloss, execution_time = hyperopt_train_test(params, X_train=X_train, y_train=y_train, budget=budget)
+            except TrialPruned as e:
+                r_squared, logloss, execution_time = e.score, e.log_loss, e.time
+                pruned = True
             except BaseException as e:
                 logger.warning("Exception caught in HyperoptClassifer:{} with hyperparams:{}, setting accuracy to zero".format(e, params))
                 r_squared = 0
                 execution_time = 0
                 logloss = 0
-            return {'loss': -r_squared, 'time': execution_time, 'log_loss': logloss, 'status': STATUS_OK}
-
-
-        fmin(f, self.search_space, algo=tpe.suggest, max_evals=self.max_evals, trials=self.trials, rstate=np.random.RandomState(SEED))
-        best_params = space_eval(self.search_space, self.trials.argmin)
-        logger.info('best accuracy: {:.1%}\nbest hyperparams found using {} hyperopt trials: {}'.format(-1*self.trials.average_best_error(), self.max_evals, best_params))
+            return {'loss': -r_squared, 'time': execution_time, 'log_loss': logloss, 'status': STATUS_OK, 'pruned': pruned}
+
+
+        deadline = None if self.max_opt_time is None else time.time() + self.max_opt_time
+        # trials may run in forked processes, which send back their changes to these
+        shared = [obj for obj in [self.pruner, self.memory] if obj is not None]
+        objective = with_time_limits(f, self.max_eval_time, deadline, shared)
+        cache = None
+        if self.deduplicate:
+            def describe(params, budget=1.0):
+                return create_instance_from_hyperopt_search_space(self.model, params).to_json(), budget
+            cache = TrialCache(describe, self.trials)
+        if self.halving is not None:
+            min_budget = self.min_budget if self.min_budget is not None else 1 / self.eta ** 2
+            fmin_halving(objective if cache is None else cache.wrap(objective), self.search_space, tpe.suggest, self.max_evals, self.trials, resumed_rstate(SEED, self.trials),
+                         min_budget, self.eta, hyperband=(self.halving == 'hyperband'), deadline=deadline)
+        elif (self.n_jobs is None or self.n_jobs == 1) and deadline is None:
+            fmin(objective if cache is None else cache.wrap(objective), self.search_space, algo=tpe.suggest, max_evals=self.max_evals, trials=self.trials, rstate=resumed_rstate(SEED, self.trials))
+        else:
+            fmin_parallel(objective, self.search_space, tpe.suggest, self.max_evals, self.trials, resumed_rstate(SEED, self.trials),
+                          self.n_jobs or 1, deadline, cache, shared)
+        best_trial = best_trial_at_full_budget(self.trials)
+        best_params = space_eval(self.search_space, spec_from_misc(best_trial['misc']))
+        logger.info('best accuracy: {:.1%}\nbest hyperparams found using {} hyperopt trials: {}'.format(-1*best_trial['result']['loss'], self.max_evals, best_params))
         trained_reg = get_final_trained_reg(best_params, X_train, y_train)
 
         return trained_reg
@@ -107,6 +169,9 @@ class HyperoptRegressor():
     def get_trials(self):
         return self.trials
 
+    def get_trials_summary(self):
+        return trials_summary(self.trials)
+
 
 if __name__ == '__main__':
     from lale.lib.lale import ConcatFeatures
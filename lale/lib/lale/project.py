@@ -12,13 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import jsonsubschema
 import lale.datasets.data_schemas
 import lale.helpers
 import lale.operators
 import numpy as np
 import pandas as pd
-import sklearn.compose
 import sys
 
 def isSubschema(sub, sup):
@@ -27,47 +27,123 @@ def isSubschema(sub, sup):
     except Exception as e:
         raise ValueError(f'problem checking ({sub} <: {sup})') from e
 
+def _column_key(s_col):
+    try:
+        return json.dumps(lale.helpers.dict_without(s_col, 'description'), sort_keys=True)
+    except TypeError:
+        return None
+
+def _as_slice(indices):
+    """The slice that selects the same columns as indices, if there is one."""
+    if len(indices) == 0:
+        return slice(0, 0)
+    if len(indices) == 1:
+        return slice(indices[0], indices[0] + 1)
+    steps = np.diff(indices)
+    if steps[0] > 0 and np.all(steps == steps[0]):
+        return slice(indices[0], indices[-1] + 1, steps[0])
+    return None
+
 class ProjectImpl:
     def __init__(self, columns=None):
         self._hyperparams = { 'columns': columns }
 
+    def _column_indices(self, X, columns):
+        n_columns = X.shape[1]
+        if callable(columns):
+            columns = columns(X)
+        if isinstance(columns, slice):
+            if isinstance(columns.start, str) or isinstance(columns.stop, str):
+                return np.arange(n_columns)[X.columns.slice_indexer(columns.start, columns.stop, columns.step)]
+            return np.arange(n_columns)[columns]
+        if isinstance(columns, (str, int, np.integer)):
+            columns = [columns]
+        columns = list(columns)
+        if len(columns) > 0 and all(isinstance(c, (bool, np.bool_)) for c in columns):
+            return np.flatnonzero(columns)
+        indices = []
+        for c in columns:
+            if isinstance(c, str):
+                if not isinstance(X, pd.DataFrame):
+                    raise ValueError(f'Project got column name {c}, but the data has no column names.')
+                indices.append(X.columns.get_loc(c))
+            else:
+                indices.append(c if c >= 0 else c + n_columns)
+        return np.array(indices, dtype=int)
+
+    def _schema_column_indices(self, X, columns):
+        s_all = lale.datasets.data_schemas.to_schema(X)
+        s_row = s_all['items']
+        n_columns = s_row['minItems']
+        assert n_columns == s_row['maxItems']
+        s_cols = s_row['items']
+        if isinstance(s_cols, dict):
+            if isSubschema(s_cols, columns):
+                return np.arange(n_columns)
+            return np.arange(0)
+        assert isinstance(s_cols, list)
+        # columns of the same type only differ in their description
+        is_kept = {}
+        def keep(s_col):
+            key = _column_key(s_col)
+            if key is None:
+                return isSubschema(s_col, columns)
+            if key not in is_kept:
+                is_kept[key] = isSubschema(s_col, columns)
+            return is_kept[key]
+        return np.array([i for i in range(n_columns) if keep(s_cols[i])], dtype=int)
+
     def fit(self, X, y=None):
         columns = self._hyperparams['columns']
+        if isinstance(X, pd.Series):
+            X = X.to_frame()
         if lale.helpers.is_schema(columns):
-            s_all = lale.datasets.data_schemas.to_schema(X)
-            s_row = s_all['items']
-            n_columns = s_row['minItems']
-            assert n_columns == s_row['maxItems']
-            s_cols = s_row['items']
-            if isinstance(s_cols, dict):
-                if isSubschema(s_cols, columns):
-                    columns = [*range(n_columns)]
-                else:
-                    columns = []
-            else:
-                assert isinstance(s_cols, list)
-                columns = [
-                    i for i in range(n_columns)
-                    if isSubschema(s_cols[i], columns)]
-        self._col_tfm = sklearn.compose.ColumnTransformer(
-            transformers=[('keep', 'passthrough', columns)])
-        self._col_tfm.fit(X)
+            self._indices = self._schema_column_indices(X, columns)
+        else:
+            self._indices = self._column_indices(X, columns)
+        self._slice = _as_slice(self._indices)
+        self._n_columns = X.shape[1]
+        self._s_results = {}
         return self
 
+    def _row_schema_key(self, X):
+        """A key that only depends on the row schema of X, which to_schema
+        derives from the dtypes and column names unless X carries one."""
+        if getattr(X, 'json_schema', None) is not None:
+            return ('schema', lale.helpers._schema_key(X.json_schema['items']))
+        if isinstance(X, pd.DataFrame):
+            return ('dataframe', tuple(X.columns), tuple(X.dtypes))
+        return ('ndarray', X.dtype.str)
+
     def transform(self, X, y=None):
-        result = self._col_tfm.transform(X)
-        s_X = lale.datasets.data_schemas.to_schema(X)
-        s_result = self.transform_schema(s_X)
-        return lale.datasets.data_schemas.add_schema(result, s_result)
+        if isinstance(X, pd.Series):
+            X = X.to_frame()
+        if X.shape[1] != self._n_columns:
+            raise ValueError(f'Project was fitted on {self._n_columns} columns, but got {X.shape[1]}.')
+        # basic slicing returns a view, other index arrays a copy
+        keep = self._indices if self._slice is None else self._slice
+        if isinstance(X, pd.DataFrame):
+            result = X.iloc[:, keep]
+        else:
+            result = X[:, keep]
+        key = (self._row_schema_key(X), X.shape[0])
+        if key[0][1] is None:
+            # the attached schema cannot be a key, so nothing is cached
+            return lale.datasets.data_schemas.add_schema(
+                result, self.transform_schema(lale.datasets.data_schemas.to_schema(X)))
+        if key not in self._s_results:
+            if len(self._s_results) >= 16:
+                self._s_results.clear()
+            s_result = self.transform_schema(lale.datasets.data_schemas.to_schema(X))
+            lale.helpers.validate_is_schema(s_result)
+            self._s_results[key] = s_result
+        return lale.datasets.data_schemas.add_schema(
+            result, self._s_results[key], validate=False)
 
     def transform_schema(self, s_X):
         s_row = s_X['items']
         s_cols = s_row['items']
-        name2idx = {s_cols[i]['description']: i for i in range(len(s_cols))}
-        keep_cols = [name2idx[col] if isinstance(col, str) else col
-                     for name, tfm, cols in self._col_tfm.transformers_
-                     if tfm == 'passthrough'
-                     for col in cols]
+        keep_cols = self._indices.tolist()
         n_columns = len(keep_cols)
         if isinstance(s_cols, dict):
             s_cols_result = s_cols
@@ -17,61 +17,92 @@ import lale.operators
 import pandas as pd
 import numpy as np
 
+def _segment_ids(end_index_list, n_rows):
+    ends = np.asarray(end_index_list, dtype=np.intp).ravel()
+    if len(ends) == 0:
+        return ends, ends, ends
+    starts = np.concatenate(([0], ends[:-1]))
+    lengths = ends - starts
+    if np.any(lengths <= 0):
+        raise ValueError('end_index_list must be strictly increasing and positive.')
+    if ends[-1] > n_rows:
+        raise ValueError(f'end_index_list ends at {ends[-1]}, but there are only {n_rows} rows.')
+    return starts, lengths, np.repeat(np.arange(len(ends)), lengths)
+
+def _vote(codes, n_classes, segments, n_segments, weights=None):
+    """Index of the class with the largest total weight per segment, the
+    first one in case of a tie."""
+    totals = np.bincount(segments * n_classes + codes, weights=weights,
+                         minlength=n_segments * n_classes)
+    return totals.reshape(n_segments, n_classes).argmax(axis=1)
+
 class SampleBasedVotingImpl():
-    def __init__(self, hyperparams=None):
-        self._hyperparams = hyperparams
+    def __init__(self, voting='majority'):
+        self._hyperparams = {'voting': voting}
         self.end_index_list = None
-
-    # def fit(self, X, y = None):
-    #     result = NoOpImpl(self._hyperparams)
-    #     if isinstance(X, pd.DataFrame):
-    #         result._feature_names = list(X.columns)
-    #     else:
-    #         #This assumes X is a 2d array which is consistent with its schema.
-    #         result._feature_names = ['x%d' % i for i in range(X.shape[1])] 
-    #     return result
+        self.sample_weight = None
 
     def set_meta_data(self, meta_data_dict):
         if 'end_index_list' in meta_data_dict.keys():
             self.end_index_list = meta_data_dict['end_index_list']
+        if 'sample_weight' in meta_data_dict.keys():
+            self.sample_weight = meta_data_dict['sample_weight']
 
-    def transform(self, X, end_index_list = None):
+    def transform(self, X, end_index_list = None, sample_weight = None):
         """Treat the input as labels and use the end_index_list to produce
         labels using voting. Note that here, X contains the label and no y is accepted.
         
         Parameters
         ----------
-        X : [type]
-            X is actually the labels from the previous component in a pipeline.
-        end_index_list : [type], optional
+        X : array-like
+            X is actually the predictions from the previous component in a
+            pipeline: labels for majority and weighted voting, or class
+            probabilities with one column per class for probability voting.
+        end_index_list : array-like of int, optional
             For each output label to be produced, end_index_list is supposed to contain 
-            the index of the last element corresponding to the original input.
+            the index one past the last element corresponding to the original input.
+        sample_weight : array-like of float, optional
+            Weight of the vote of each row for weighted voting.
         
         Returns
         -------
-        [type]
-            [description]
+        numpy.ndarray
+            One label per element of end_index_list. Ties go to the smallest
+            label, and for probability voting the labels are column indices.
         """
         if end_index_list is None:
             end_index_list = self.end_index_list # in case the end_index_list was set as meta_data
 
         if end_index_list is None:
             return X
+        if isinstance(X, (pd.DataFrame, pd.Series)):
+            X = X.values
         else:
-            voted_labels = []
-            prev_index = 0
-            if not isinstance(X, np.ndarray):
-                if isinstance(X, list):
-                    X = np.array(X)
-                elif isinstance(X, pd.dataframe):
-                    X = X.as_matrix()
-            for index in end_index_list:
-                labels = X[prev_index:index]
-                (values,counts) = np.unique(labels,return_counts=True)
-                ind=np.argmax(counts) #If two labels are in majority, this will pick the first one.
-                voted_labels.append(ind)
-            return np.array(voted_labels)
-    
+            X = np.asarray(X)
+        voting = self._hyperparams['voting']
+        starts, lengths, segments = _segment_ids(end_index_list, X.shape[0])
+        n_segments = len(lengths)
+        if voting == 'probability':
+            if n_segments == 0:
+                return np.zeros(0, dtype=np.intp)
+            if X.ndim != 2:
+                raise ValueError(f'Probability voting expects one column per class, got an array of shape {X.shape}.')
+            sums = np.add.reduceat(X[:starts[-1] + lengths[-1]], starts, axis=0)
+            return (sums / lengths[:, np.newaxis]).argmax(axis=1)
+        labels = X[:len(segments)]
+        if labels.ndim == 2 and labels.shape[1] == 1:
+            labels = labels[:, 0]
+        classes, codes = np.unique(labels, return_inverse=True)
+        weights = None
+        if voting == 'weighted':
+            if sample_weight is None:
+                sample_weight = self.sample_weight
+            if sample_weight is None:
+                raise ValueError('Weighted voting requires sample_weight.')
+            weights = np.asarray(sample_weight, dtype=np.float64)[:len(segments)]
+            if len(weights) != len(segments):
+                raise ValueError(f'Got {len(weights)} weights for {len(segments)} rows.')
+        return classes[_vote(codes, len(classes), segments, n_segments, weights)]
 
 _hyperparams_schema = {
     '$schema': 'http://json-schema.org/draft-04/schema#',
@@ -80,8 +111,13 @@ _hyperparams_schema = {
     {   'description': 'This first object lists all constructor arguments with their types, but omits constraints for conditional hyperparameters',
         'type': 'object',
         'additionalProperties': False,
+        'required': ['voting'],
         'relevantToOptimizer': [],
-        'properties': {}}]}
+        'properties': {
+            'voting': {
+                'description': 'How the rows of a segment vote: majority of labels, average of class probabilities, or labels weighted by sample_weight.',
+                'enum': ['majority', 'probability', 'weighted'],
+                'default': 'majority'}}}]}
 
 _input_fit_schema = {
     '$schema': 'http://json-schema.org/draft-04/schema#',
@@ -16,6 +16,7 @@ import os, sys
 sys.path.append(os.getcwd())
 
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from scipy.signal import resample
 from sklearn import preprocessing
 import warnings
@@ -28,6 +29,11 @@ from collections import Counter
 import re
 from typing import List
 
+try:
+    import joblib
+except ImportError:
+    from sklearn.externals import joblib # type: ignore
+
 seizure_type_data = collections.namedtuple('seizure_type_data', ['seizure_type', 'data'])
 
 #Some of the classes and modules have been taken from https://github.com/MichaelHills/seizure-detection
@@ -167,14 +173,70 @@ class Eigenvalues:
         return w
 
 
-# Take the upper right triangle of a matrix
+# Take the upper right triangle of a matrix, or of each matrix in a batch
 def upper_right_triangle(matrix):
-    accum = []
-    for i in range(matrix.shape[0]):
-        for j in range(i+1, matrix.shape[1]):
-            accum.append(matrix[i, j])
-
-    return np.array(accum)
+    rows, cols = np.triu_indices(matrix.shape[-2], 1, matrix.shape[-1])
+    return matrix[..., rows, cols]
+
+# The helpers below apply the transforms above to a batch of windows of
+# shape (windows, channels, samples) at once, with one row per window.
+
+def sliding_windows(data, window_length, window_step):
+    """View of the windows of data (channels x samples) as an array of
+    shape (windows, channels, window_length), without copying. As in
+    TimeFreqEigenVectors, the last window must end before the last sample."""
+    if window_length <= 0 or window_step <= 0:
+        raise ValueError(f'Window length {window_length} and step {window_step} must be at least one sample.')
+    n_channels, n_samples = data.shape
+    n_windows = len(range(window_length, n_samples, window_step))
+    channel_stride, sample_stride = data.strides
+    return as_strided(data, shape=(n_windows, n_channels, window_length),
+                      strides=(window_step * sample_stride, channel_stride, sample_stride),
+                      writeable=False)
+
+def _nudge_zero_channels(windows):
+    # so that correlation matrix calculation doesn't crash
+    zero = np.all(windows == 0.0, axis=-1)
+    if not np.any(zero):
+        return windows
+    windows = np.array(windows, dtype=np.result_type(windows.dtype, np.float64))
+    windows[..., -1][zero] += 0.00001
+    return windows
+
+def _standardize(batch, axis):
+    mean = batch.mean(axis=axis, keepdims=True)
+    std = batch.std(axis=axis, keepdims=True)
+    std[std == 0.0] = 1.0
+    return (batch - mean) / std
+
+def _scale(batch, scale_option):
+    if scale_option == 'first_axis':
+        return _standardize(batch, 1)
+    if scale_option == 'last_axis':
+        return _standardize(batch, 2)
+    return batch
+
+def _log10(batch):
+    positive = batch > 0
+    axes = tuple(range(1, batch.ndim))
+    smallest = np.where(positive, batch, np.inf).min(axis=axes)
+    smallest = np.where(np.isinf(smallest), batch.max(axis=axes), smallest)
+    replacement = (0.1 * smallest).reshape((-1,) + (1,) * (batch.ndim - 1))
+    return np.log10(np.where(positive, batch, replacement))
+
+def _correlation_matrices(batch):
+    centered = batch - batch.mean(axis=-1, keepdims=True)
+    cov = np.matmul(centered, centered.transpose(0, 2, 1))
+    norms = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / norms[:, :, np.newaxis] / norms[:, np.newaxis, :]
+    return np.clip(corr, -1, 1, out=corr)
+
+def _eigenvalues(batch):
+    # correlation matrices are symmetric, so their eigenvalues are real
+    w = np.absolute(np.linalg.eigvalsh(batch))
+    w.sort(axis=-1)
+    return w
 
 class FreqCorrelation:
     """
@@ -238,6 +300,19 @@ class FreqCorrelation:
 
         return np.concatenate(out, axis=0)
 
+    def apply_batch(self, windows):
+        data1 = np.fft.rfft(windows, axis=-1)[..., self.start:self.end + 1]
+        data1 = _log10(np.absolute(data1))
+        data2 = _correlation_matrices(_scale(data1, self.scale_option))
+        out = []
+        if self.with_corr:
+            out.append(upper_right_triangle(data2))
+        if self.with_eigen:
+            out.append(_eigenvalues(data2))
+        if self.with_fft:
+            out.append(data1.reshape(len(data1), -1))
+        return np.concatenate(out, axis=1)
+
 
 class TimeCorrelation:
     """
@@ -298,6 +373,18 @@ class TimeCorrelation:
 
         return np.concatenate(out, axis=0)
 
+    def apply_batch(self, windows):
+        data1 = _nudge_zero_channels(windows)
+        if data1.shape[-1] > self.max_hz:
+            data1 = resample(data1, self.max_hz, axis=-1)
+        data1 = _correlation_matrices(_scale(data1, self.scale_option))
+        out = []
+        if self.with_corr:
+            out.append(upper_right_triangle(data1))
+        if self.with_eigen:
+            out.append(_eigenvalues(data1))
+        return np.concatenate(out, axis=1)
+
 class FFTWithTimeFreqCorrelation:
     """
     Combines FFT with time and frequency correlation, taking both correlation coefficients and eigenvalues.
@@ -320,49 +407,171 @@ class FFTWithTimeFreqCorrelation:
 
         return np.concatenate((data1, data2), axis=data1.ndim - 1)
 
+    def n_features(self, n_channels, window_length):
+        """Number of features of a window of n_channels x window_length."""
+        n_pairs = n_channels * (n_channels - 1) // 2
+        n_freqs = len(range(window_length // 2 + 1)[self.start:self.end + 1])
+        return 2 * (n_pairs + n_channels) + n_channels * n_freqs
+
+    def apply_batch(self, windows):
+        """Like apply on each of the windows of shape (windows, channels,
+        samples), without modifying them, with one row of features per window."""
+        windows = _nudge_zero_channels(windows)
+        data1 = TimeCorrelation(self.max_hz, self.scale_option).apply_batch(windows)
+        data2 = FreqCorrelation(self.start, self.end, self.scale_option, with_fft=True).apply_batch(windows)
+        return np.concatenate((data1, data2), axis=1)
+
+# Number of windows whose features are computed together, which bounds the
+# size of the intermediate arrays.
+_WINDOW_BATCH_SIZE = 256
+
+def _recording_features(features, recording, window_length, window_step):
+    recording = np.asarray(recording)
+    if not np.issubdtype(recording.dtype, np.floating):
+        recording = recording.astype(np.float64)
+    windows = sliding_windows(recording, window_length, window_step)
+    batches = [features.apply_batch(windows[i:i + _WINDOW_BATCH_SIZE])
+               for i in range(0, len(windows), _WINDOW_BATCH_SIZE)]
+    if len(batches) == 0:
+        return None
+    return np.concatenate(batches, axis=0)
+
+def _recording_blocks(recording, block_length):
+    if hasattr(recording, 'ndim') and recording.ndim == 2:
+        # for instance a numpy.memmap, which only gets read block by block
+        for start in range(0, recording.shape[1], block_length):
+            yield recording[:, start:start + block_length]
+    else:
+        for block in recording:
+            yield np.asarray(block)
+
+def _stream_recording_features(features, recording, window_length, window_step):
+    """Features of the windows of recording, which is either an array of
+    shape (channels, samples) or an iterable of such arrays holding
+    consecutive blocks of samples. Yields one array of rows per batch of
+    windows, while only holding one batch worth of samples in memory, or
+    a single array without rows if the recording has samples but no
+    windows."""
+    if window_length <= 0 or window_step <= 0:
+        raise ValueError(f'Window length {window_length} and step {window_step} must be at least one sample.')
+    capacity = window_length + _WINDOW_BATCH_SIZE * window_step
+    buffer = None
+    filled = 0
+    has_windows = False
+    for block in _recording_blocks(recording, capacity):
+        if buffer is None:
+            buffer = np.empty((block.shape[0], capacity), dtype=np.float64)
+        position = 0
+        while position < block.shape[1]:
+            taken = min(capacity - filled, block.shape[1] - position)
+            buffer[:, filled:filled + taken] = block[:, position:position + taken]
+            filled += taken
+            position += taken
+            if filled == capacity:
+                windows = sliding_windows(buffer, window_length, window_step)
+                yield features.apply_batch(windows)
+                has_windows = True
+                # keep the samples from the start of the next window on
+                consumed = len(windows) * window_step
+                buffer[:, :filled - consumed] = buffer[:, consumed:filled]
+                filled -= consumed
+    if buffer is not None:
+        windows = sliding_windows(buffer[:, :filled], window_length, window_step)
+        if len(windows) > 0:
+            yield features.apply_batch(windows)
+        elif not has_windows:
+            yield np.empty((0, features.n_features(buffer.shape[0], window_length)))
+    elif hasattr(recording, 'ndim') and recording.ndim == 2:
+        yield np.empty((0, features.n_features(recording.shape[0], window_length)))
+
 class TimeFreqEigenVectorsImpl():
     def __init__(self, window_length=1, window_step=0.5, 
-        fft_min_freq=1, fft_max_freq=24, sampling_frequency=250):
+        fft_min_freq=1, fft_max_freq=24, sampling_frequency=250, n_jobs=None):
         self.window_length = window_length
         self.window_step = window_step
         self.fft_min_freq = fft_min_freq
         self.fft_max_freq = fft_max_freq
         self.sampling_frequency = sampling_frequency
+        self.n_jobs = n_jobs
 
     def transform(self, X, y = None):
         warnings.filterwarnings("ignore")
-        pipeline = Pipeline([FFTWithTimeFreqCorrelation(self.fft_min_freq, self.fft_max_freq, 
-        self.sampling_frequency, 'first_axis')])
-        X_transformed = []
-        y_transformed = np.empty((0))
-        self.end_index_list = [] #This is the list of end indices for samples generated per seizure
-
-        #The transformation map is just a list of indices corresponding to the last sample generated by each time-series.
-        for i in range(len(X)):
-            seizure_data = X[i]
-            if y is not None:
-                seizure_label = y[i]
-            start, step = 0, int(np.floor(self.window_step * self.sampling_frequency))
-            stop = start + int(np.floor(self.window_length * self.sampling_frequency))
-            fft_data = []
-            while stop < seizure_data.shape[1]:
-                signal_window = seizure_data[:, start:stop]
-                fft_window = pipeline.apply(signal_window)
-                fft_data.append(fft_window)
-                start, stop = start + step, stop + step
-            X_transformed.extend(fft_data)
-            if y is not None:
-                labels_for_all_seizure_samples = np.full(len(fft_data), seizure_label)
-                y_transformed = np.hstack((y_transformed, labels_for_all_seizure_samples))
-            previous_element  = self.end_index_list[i-1] if (i-1)>=0 else 0
-            self.end_index_list.append(previous_element + len(fft_data))
-
-        X_transformed = np.array(X_transformed)
+        features = FFTWithTimeFreqCorrelation(self.fft_min_freq, self.fft_max_freq, 
+        self.sampling_frequency, 'first_axis')
+        window_length = int(np.floor(self.window_length * self.sampling_frequency))
+        window_step = int(np.floor(self.window_step * self.sampling_frequency))
+        #All windows of a recording are computed as one batch, and the recordings in parallel.
+        if self.n_jobs is None or self.n_jobs == 1:
+            per_recording = [_recording_features(features, X[i], window_length, window_step)
+                             for i in range(len(X))]
+        else:
+            per_recording = joblib.Parallel(n_jobs=self.n_jobs)(
+                joblib.delayed(_recording_features)(features, X[i], window_length, window_step)
+                for i in range(len(X)))
+        counts = [0 if f is None else len(f) for f in per_recording]
+        #This is the list of end indices for samples generated per seizure
+        self.end_index_list = np.cumsum(counts, dtype=int).tolist()
+
+        non_empty = [f for f in per_recording if f is not None]
+        if len(non_empty) == 0:
+            X_transformed = np.array([])
+        else:
+            X_transformed = np.concatenate(non_empty, axis=0)
         if y is None:
             y_transformed = None
+        else:
+            y_transformed = np.hstack((np.empty((0)), np.repeat(np.asarray(y)[:len(X)], counts)))
 
         return X_transformed, y_transformed
 
+    def transform_stream(self, X, y = None):
+        """Like transform, but for recordings that are too long to hold in
+        memory. Only a buffer of one batch of windows of each recording is
+        kept, and the features are yielded batch by batch. n_jobs is ignored.
+
+        Parameters
+        ----------
+        X : iterable
+            The recordings, each an array of shape (channels, samples), such
+            as a numpy.memmap, or an iterable of such arrays holding
+            consecutive blocks of samples.
+        y : array-like, optional
+            One label per recording.
+
+        Yields
+        ------
+        tuple
+            The rows of features of a batch of windows, their labels (None
+            if y is None), and the end_index_list of the recordings whose
+            windows were all yielded so far. The last batch of each
+            recording includes its end index, and a recording without
+            windows yields an empty batch with the same number of columns.
+        """
+        warnings.filterwarnings("ignore")
+        features = FFTWithTimeFreqCorrelation(self.fft_min_freq, self.fft_max_freq, 
+        self.sampling_frequency, 'first_axis')
+        window_length = int(np.floor(self.window_length * self.sampling_frequency))
+        window_step = int(np.floor(self.window_step * self.sampling_frequency))
+        self.end_index_list = []
+        n_rows = 0
+        n_columns = 0
+        for i, recording in enumerate(X):
+            def labelled(rows):
+                return rows, None if y is None else np.full(len(rows), y[i])
+            # the last batch of a recording is held back to yield it with its end index
+            previous = None
+            for rows in _stream_recording_features(features, recording, window_length, window_step):
+                n_rows += len(rows)
+                n_columns = rows.shape[1]
+                if previous is not None:
+                    yield (*labelled(previous), list(self.end_index_list))
+                previous = rows
+            self.end_index_list.append(n_rows)
+            if previous is None:
+                # no blocks, so the number of channels is unknown
+                previous = np.empty((0, n_columns))
+            yield (*labelled(previous), list(self.end_index_list))
+
     def get_transform_meta_output(self):
         if self.end_index_list is not None:
             return {'end_index_list': self.end_index_list}
@@ -375,7 +584,7 @@ _hyperparams_schema = {
     'allOf': [{
         'type': 'object',
         'additionalProperties': False,
-        'required': ['window_length', 'window_step', 'fft_min_freq', 'fft_max_freq', 'sampling_frequency'],
+        'required': ['window_length', 'window_step', 'fft_min_freq', 'fft_max_freq', 'sampling_frequency', 'n_jobs'],
         'relevantToOptimizer': ['window_length', 'window_step', 'fft_max_freq'],        
         'properties': {
             'window_length': {
@@ -407,6 +616,12 @@ _hyperparams_schema = {
                 'type': 'integer',
                 'default': 250,
                 'description': 'TODO'},
+            'n_jobs': {
+                'anyOf': [{
+                    'type': 'integer'}, {
+                    'enum': [None]}],
+                'default': None,
+                'description': 'The number of recordings to transform in parallel, -1 for all processors.'},
         }}
         #TODO: Any constraints on hyper-parameter combinations?
         ]
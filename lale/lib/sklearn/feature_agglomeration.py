@@ -34,6 +34,10 @@ class FeatureAgglomerationImpl():
         self._sklearn_model.fit(X, y)
         return self
 
+    def fit_transform(self, X, y=None):
+        self._sklearn_model = sklearn.cluster.hierarchical.FeatureAgglomeration(**self._hyperparams)
+        return self._sklearn_model.fit_transform(X, y)
+
     def transform(self, X):
         return self._sklearn_model.transform(X)
 _hyperparams_schema = {
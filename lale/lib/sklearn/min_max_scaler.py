@@ -26,6 +26,11 @@ class MinMaxScalerImpl:
         self._sklearn_model.fit(X)
         return self
 
+    def fit_transform(self, X, y=None):
+        self._sklearn_model = sklearn.preprocessing.MinMaxScaler(
+            **self._hyperparams)
+        return self._sklearn_model.fit_transform(X)
+
     def transform(self, X):
         return self._sklearn_model.transform(X)
 
@@ -28,6 +28,10 @@ class NormalizerImpl():
         self._sklearn_model.fit(X, y)
         return self
 
+    def fit_transform(self, X, y=None):
+        self._sklearn_model = sklearn.preprocessing.data.Normalizer(**self._hyperparams)
+        return self._sklearn_model.fit_transform(X, y)
+
     def transform(self, X):
         return self._sklearn_model.transform(X)
 _hyperparams_schema = {
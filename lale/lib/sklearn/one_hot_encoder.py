@@ -24,12 +24,21 @@ class OneHotEncoderImpl():
     def fit(self, X, y=None):
         self._sklearn_model = sklearn.preprocessing.OneHotEncoder(**self._hyperparams)
         self._sklearn_model.fit(X, y)
+        self._set_feature_names(X)
+        return self
+
+    def fit_transform(self, X, y=None):
+        self._sklearn_model = sklearn.preprocessing.OneHotEncoder(**self._hyperparams)
+        result = self._sklearn_model.fit_transform(X, y)
+        self._set_feature_names(X)
+        return result
+
+    def _set_feature_names(self, X):
         if isinstance(X, pd.DataFrame):
             cols_X = [str(c) for c in X.columns]
             self._feature_names = self._sklearn_model.get_feature_names(cols_X)
         else:
             self._feature_names = self._sklearn_model.get_feature_names()
-        return self
 
     def transform(self, X):
         return self._sklearn_model.transform(X)
@@ -25,6 +25,10 @@ class PCAImpl():
         self._sklearn_model.fit(X, y)
         return self
 
+    def fit_transform(self, X, y=None):
+        self._sklearn_model = sklearn.decomposition.PCA(**self._hyperparams)
+        return self._sklearn_model.fit_transform(X, y)
+
     def transform(self, X):
         return self._sklearn_model.transform(X)
 
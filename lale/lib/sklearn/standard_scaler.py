@@ -29,6 +29,10 @@ class StandardScalerImpl():
         self._sklearn_model.fit(X, y)
         return self
 
+    def fit_transform(self, X, y=None):
+        self._sklearn_model = sklearn.preprocessing.data.StandardScaler(**self._hyperparams)
+        return self._sklearn_model.fit_transform(X, y)
+
     def transform(self, X, copy=None):
         return self._sklearn_model.transform(X, copy)
 
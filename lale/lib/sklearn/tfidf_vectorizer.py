@@ -31,6 +31,12 @@ class TfidfVectorizerImpl():
         self._sklearn_model.fit(X, y)
         return self
 
+    def fit_transform(self, X, y=None):
+        self._sklearn_model = sklearn.feature_extraction.text.TfidfVectorizer(**self._hyperparams)
+        if isinstance(X, np.ndarray) or isinstance(X, pd.DataFrame):
+            X = X.squeeze()
+        return self._sklearn_model.fit_transform(X, y)
+
     def transform(self, X):
         if isinstance(X, np.ndarray) or isinstance(X, pd.DataFrame):
             X = X.squeeze()
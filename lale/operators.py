@@ -20,6 +20,8 @@ import os
 import itertools
 from lale import schema2enums as enum_gen
 import numpy as np
+import pandas as pd
+import scipy.sparse
 import lale.datasets.data_schemas
 
 from typing import AbstractSet, Any, Dict, Generic, Iterable, Iterator, List, Tuple, TypeVar, Optional, Union
@@ -32,6 +34,11 @@ import copy
 from lale.schemas import Schema 
 import jsonschema
 import lale.pretty_print
+import lale.settings
+import concurrent.futures
+import copyreg
+import queue
+import threading
 
 class MetaModel(ABC):
     """Abstract base class for LALE operators states: MetaModel, Planned, Trainable, and Trained.
@@ -314,6 +321,9 @@ class IndividualOp(MetaModelOperator):
         """
         self._impl = impl
         self._name = name
+        #compiled validators, keyed by the id of the schema they check,
+        #shared with the trainable and trained operators derived from this one
+        self._validators:Dict[int, Tuple[Any, Any]] = {}
         schemas = schemas if schemas is not None else helpers.get_lib_schema(impl)
         if schemas:
             self._schemas = schemas
@@ -704,6 +714,7 @@ class IndividualOp(MetaModelOperator):
                 op._schemas['properties']['hyperparams']['allOf'][0]['properties'][arg] = value.schema
             else:
                 assert False, "Unkown method or parameter."
+        op._validators = {}
         return op
 
     def validate(self, X, y=None):
@@ -734,6 +745,43 @@ class IndividualOp(MetaModelOperator):
     def transform_schema(self, s_X):
         return self.output_schema()
 
+    def __reduce__(self):
+        # The enum fields added by schema2enums are classes created on the
+        # fly, which pickle cannot find by name, so they get regenerated
+        # from the schema in __setstate__ instead. The compiled validators
+        # get rebuilt on demand.
+        state = {k: v for k, v in self.__dict__.items()
+                 if not isinstance(v, enum.EnumMeta) and k != '_validators'}
+        return (copyreg.__newobj__, (type(self),), state)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._validators = {}
+        enum_gen.addSchemaEnumsAsFields(self, self.hyperparam_schema())
+
+    def _validate_schema(self, value, schema, kind:str='input'):
+        """Like `helpers.validate_schema`, but checks the schema and
+        compiles its validator only once per schema of this operator,
+        and validates as much as `lale.settings.validation` asks for
+        the 'hyperparams', 'input', or 'output' of the operator."""
+        if not lale.settings._should_validate(kind):
+            return
+        setting = lale.settings._validation
+        subsample_array = setting['mode'] != 'full'
+        if subsample_array and (setting['sample_rows'] != 10 or setting['seed'] is not None):
+            value = helpers.sample_rows(value, setting['sample_rows'], setting['seed'])
+            subsample_array = False
+        if not schema:
+            helpers.validate_schema(value, schema, subsample_array)
+            return
+        cached = self._validators.get(id(schema), None)
+        if cached is None or cached[0] is not schema:
+            cls = jsonschema.validators.validator_for(schema)
+            cls.check_schema(schema)
+            cached = (schema, cls(schema))
+            self._validators[id(schema)] = cached
+        helpers.validate_schema(value, schema, subsample_array, validator=cached[1])
+
 class PlannedIndividualOp(IndividualOp, PlannedOperator):
     """
     This is a concrete class that returns a trainable individual
@@ -774,7 +822,7 @@ class PlannedIndividualOp(IndividualOp, PlannedOperator):
         trainable_to_get_params._hyperparams = hyperparams
         params_all = trainable_to_get_params.get_params_all()
         try:
-            helpers.validate_schema(params_all, self.hyperparam_schema())
+            self._validate_schema(params_all, self.hyperparam_schema(), 'hyperparams')
         except jsonschema.ValidationError as e:
             lale.helpers.validate_is_schema(e.schema)
             schema = lale.pretty_print.to_string(e.schema)
@@ -812,6 +860,7 @@ class PlannedIndividualOp(IndividualOp, PlannedOperator):
 
         result = TrainableIndividualOp(_name=self.name(), _impl=impl, _schemas=self._schemas)
         result._hyperparams = hyperparams
+        result._validators = self._validators
         return result
 
     def __call__(self, *args, **kwargs)->TrainableOperator:
@@ -859,17 +908,19 @@ class TrainableIndividualOp(PlannedIndividualOp, TrainableOperator):
     def __init__(self, _name, _impl, _schemas):
         super(TrainableIndividualOp, self).__init__(_name, _impl, _schemas)
 
-    def fit(self, X, y = None, **fit_params)->TrainedOperator:
+    def _validate_input_fit(self, X, y):
         try:
             if y is None:
-                helpers.validate_schema({'X': X},
-                                        self.input_schema_fit())
+                self._validate_schema({'X': X},
+                                      self.input_schema_fit())
             else:
-                helpers.validate_schema({'X': X, 'y': y},
-                                        self.input_schema_fit())
+                self._validate_schema({'X': X, 'y': y},
+                                      self.input_schema_fit())
         except jsonschema.exceptions.ValidationError as e:
             raise jsonschema.exceptions.ValidationError("Failed validating input_schema_fit for {} due to {}".format(self.name(), e))                                    
 
+    def fit(self, X, y = None, **fit_params)->TrainedOperator:
+        self._validate_input_fit(X, y)
         filtered_fit_params = fixup_hyperparams_dict(fit_params)
         if filtered_fit_params is None:
             trained_impl = self._impl.fit(X, y)
@@ -877,9 +928,45 @@ class TrainableIndividualOp(PlannedIndividualOp, TrainableOperator):
             trained_impl = self._impl.fit(X, y, **filtered_fit_params)
         result = TrainedIndividualOp(self.name(), trained_impl, self._schemas)
         result._hyperparams = self._hyperparams
+        result._validators = self._validators
         self.__trained = result
         return result
 
+    def is_transformer(self)->bool:
+        """ Checks if the operator is a transformer
+        """
+        return hasattr(self._impl, 'transform')
+
+    def _fit_transform(self, X, y = None, **fit_params)->Tuple[TrainedOperator, Any]:
+        """Fit the operator and transform X in a single call to the
+        optional `fit_transform` method of the impl, which lets the
+        wrapped library share work between the two steps.
+
+        Returns
+        -------
+        result : tuple
+            The trained operator and the transformed X.
+        """
+        self._validate_input_fit(X, y)
+        if ('y' in [required_property.lower() for required_property
+            in self.input_schema_transform().get('required',[])]):
+            self._validate_schema({'X': X, 'y': y},
+                                  self.input_schema_transform())
+        else:
+            self._validate_schema({'X': X },
+                                  self.input_schema_transform())
+        filtered_fit_params = fixup_hyperparams_dict(fit_params)
+        if filtered_fit_params is None:
+            output = self._impl.fit_transform(X, y)
+        else:
+            output = self._impl.fit_transform(X, y, **filtered_fit_params)
+        self._validate_schema(output, self.output_schema(), 'output')
+        result = TrainedIndividualOp(self.name(), self._impl, self._schemas)
+        result._hyperparams = self._hyperparams
+        result._validators = self._validators
+        self.__trained = result
+        return result, output
+
     def predict(self, X):
         """
         .. deprecated:: 0.0.0
@@ -1013,13 +1100,9 @@ class TrainedIndividualOp(TrainableIndividualOp, TrainedOperator):
         trainable = self._configure(*args, **filtered_kwargs_params)
         instance = TrainedIndividualOp(trainable._name, trainable._impl, trainable._schemas)
         instance._hyperparams = trainable._hyperparams
+        instance._validators = trainable._validators
         return instance
 
-    def is_transformer(self)->bool:
-        """ Checks if the operator is a transformer
-        """
-        return hasattr(self._impl, 'transform')
-
     def fit(self, X, y = None, **fit_params)->TrainedOperator:
         if hasattr(self._impl, "fit"):
             filtered_fit_params = fixup_hyperparams_dict(fit_params)
@@ -1028,37 +1111,37 @@ class TrainedIndividualOp(TrainableIndividualOp, TrainedOperator):
             return self 
 
     def predict(self, X):
-        helpers.validate_schema({ 'X': X },
-                                self.input_schema_predict())
+        self._validate_schema({ 'X': X },
+                              self.input_schema_predict())
 
         result = self._impl.predict(X)
-        helpers.validate_schema(result, self.output_schema())
+        self._validate_schema(result, self.output_schema(), 'output')
         return result
 
     def transform(self, X, y = None):
         if ('y' in [required_property.lower() for required_property 
             in self.input_schema_transform().get('required',[])]):
-            helpers.validate_schema({'X': X, 'y': y},
-                                    self.input_schema_transform())
+            self._validate_schema({'X': X, 'y': y},
+                                  self.input_schema_transform())
             result = self._impl.transform(X, y)
 
         else:
-            helpers.validate_schema({'X': X },
-                                    self.input_schema_transform())
+            self._validate_schema({'X': X },
+                                  self.input_schema_transform())
             result = self._impl.transform(X)
 
-        helpers.validate_schema(result, self.output_schema())
+        self._validate_schema(result, self.output_schema(), 'output')
         return result
 
     def predict_proba(self, X):
-        helpers.validate_schema({ 'X': X },
-                                self.input_schema_predict_proba())
+        self._validate_schema({ 'X': X },
+                              self.input_schema_predict_proba())
 
         if hasattr(self._impl, 'predict_proba'):
             result = self._impl.predict_proba(X)
         else:
             raise ValueError("The operator {} does not support predict_proba".format(self.name()))
-        helpers.validate_schema(result, self.output_schema_predict_proba())
+        self._validate_schema(result, self.output_schema_predict_proba(), 'output')
         return result
 
     def to_json(self):
@@ -1115,6 +1198,7 @@ class Pipeline(MetaModelOperator, Generic[OpType]):
     """
     _steps:List[OpType]
     _preds:Dict[OpType, List[OpType]]
+    _peak_memory:Optional[int]
 
     def __init__(self, 
                 steps:List[OpType], 
@@ -1286,6 +1370,18 @@ class Pipeline(MetaModelOperator, Generic[OpType]):
                 return False
         return True
 
+    def peak_memory(self)->Optional[int]:
+        """Returns the approximate peak number of bytes that intermediate
+        step outputs occupied during the most recent fit, predict,
+        transform, or predict_proba call on this pipeline, or None if
+        there was no such call yet.
+
+        Each output is released as soon as all steps that consume it are
+        done, so for a linear pipeline this stays close to the size of two
+        consecutive outputs regardless of the number of steps.
+        """
+        return getattr(self, '_peak_memory', None)
+
     def find_sink_nodes(self):
         sink_nodes = []  
         sink_nodes.append(self.steps()[-1])
@@ -1300,6 +1396,341 @@ class Pipeline(MetaModelOperator, Generic[OpType]):
         return sink_nodes
 
 
+def _nbytes(data)->int:
+    """Approximate number of bytes in the arrays held by a step result."""
+    if isinstance(data, (tuple, list)):
+        return sum(_nbytes(elem) for elem in data)
+    if isinstance(data, dict):
+        return sum(_nbytes(elem) for elem in data.values())
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return int(np.sum(data.memory_usage(index=False)))
+    if scipy.sparse.issparse(data):
+        parts = ['data', 'indices', 'indptr', 'row', 'col']
+        return sum(getattr(data, p).nbytes for p in parts if hasattr(data, p))
+    return 0
+
+def _run_steps(steps, preds, step_args, step_fn, release=None, n_jobs=None, executor='thread', on_result=None):
+    """Calls `step_fn(*step_args(step, results))` for each step of a pipeline,
+    where `results` maps the steps that already finished to the values
+    returned by `step_fn`.
+
+    Parameters
+    ----------
+    steps : list
+        The steps of the pipeline in topological order.
+    preds : dict
+        The predecessors of each step.
+    step_args : callable
+        Computes the arguments for `step_fn` in the calling process.
+    step_fn : callable
+        Does the actual work for one step. With executor='process',
+        `step_fn`, its arguments, and its result must be picklable.
+    release : callable, optional
+        Once the arguments of all successors of a step have been computed,
+        its entry in `results` is replaced by `release(result)`, which
+        should drop the references to large intermediate data. Steps
+        without successors are never released.
+    n_jobs : int, optional
+        Number of steps to run concurrently. None or 1 runs the steps one
+        at a time in topological order, -1 uses all processors.
+    executor : 'thread' or 'process', optional
+        Kind of pool used when n_jobs is not 1, by default 'thread'.
+        Each step is scheduled as soon as all of its predecessors are done.
+    on_result : callable, optional
+        Called as `on_result(step, result)` in the calling process when a
+        step is done, before its result can get released.
+
+    Returns
+    -------
+    tuple
+        The `results` dictionary and the peak number of bytes held by
+        step results that had not been released yet.
+    """
+    results:Dict[Any, Any] = {}
+    num_succs:Dict[Any, int] = {step: 0 for step in steps}
+    for step in steps:
+        for pred in preds[step]:
+            num_succs[pred] += 1
+    held_bytes:Dict[Any, int] = {}
+    freed_by:Dict[Any, List[Any]] = {}
+    live, peak = 0, 0
+    def start(step):
+        args = step_args(step, results)
+        freed_by[step] = []
+        for pred in preds[step]:
+            num_succs[pred] -= 1
+            if num_succs[pred] == 0 and release is not None:
+                results[pred] = release(results[pred])
+                freed_by[step].append(pred)
+        return args
+    def finish(step, result):
+        nonlocal live, peak
+        results[step] = result
+        if on_result is not None:
+            on_result(step, result)
+        held_bytes[step] = _nbytes(result)
+        live += held_bytes[step]
+        peak = max(peak, live)
+        #the inputs stay alive until the step that consumes them is done
+        live -= sum(held_bytes[pred] for pred in freed_by[step])
+    if n_jobs is None or n_jobs == 1:
+        for step in steps:
+            finish(step, _run_step(step_fn, not preds[step], *start(step)))
+        return results, peak
+    max_workers = os.cpu_count() if n_jobs < 0 else n_jobs
+    pool:concurrent.futures.Executor
+    if executor == 'thread':
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == 'process':
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        raise ValueError(f"Unknown executor {executor}, expected 'thread' or 'process'.")
+    with pool:
+        todo = list(steps)
+        running:Dict[concurrent.futures.Future, Any] = {}
+        while todo or running:
+            ready = [s for s in todo if all(p in results for p in preds[s])]
+            for step in ready:
+                todo.remove(step)
+                future = pool.submit(_run_step, step_fn, not preds[step], *start(step))
+                running[future] = step
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                finish(running.pop(future), future.result())
+    return results, peak
+
+def _run_step(step_fn, is_source, *args):
+    #in 'entry' validation mode, only the sources validate their inputs
+    with lale.settings._trust_inputs(not is_source):
+        return step_fn(*args)
+
+def _step_inputs(X, preds, outputs):
+    if len(preds) == 0:
+        return X
+    inputs = [outputs[pred][0] if isinstance(outputs[pred], tuple) else outputs[pred] for pred in preds]
+    if len(inputs) == 1:
+        return inputs[0]
+    return inputs
+
+def _cached_fit_step(cached, trainable, inputs, y, is_sink):
+    if cached is not None:
+        return cached
+    return _fit_step(trainable, inputs, y, is_sink)
+
+def _fit_step(trainable, inputs, y, is_sink):
+    trained:TrainedOperator
+    if not is_sink and trainable.is_transformer() and hasattr(trainable._impl, 'fit_transform'):
+        if trainable.is_supervised():
+            return trainable._fit_transform(X = inputs, y = y)
+        else:
+            return trainable._fit_transform(X = inputs)
+    if trainable.is_supervised():
+        trained = trainable.fit(X = inputs, y = y)
+    else:
+        trained = trainable.fit(X = inputs)
+    if trained.is_transformer():
+        output = trained.transform(X = inputs, y = y)
+    else:
+        if is_sink:
+            output = trained.predict(X = inputs) #We don't support y for predict yet as there is no compelling case
+        else:
+            # This is ok because trainable pipelines steps
+            # must only be individual operators
+            if hasattr(trained._impl, 'predict_proba'): # type: ignore
+                output = trained.predict_proba(X = inputs)
+            else:
+                output = trained.predict(X = inputs)
+    return trained, output
+
+def _predict_step(operator, inputs, y, meta_data_inputs, is_sink):
+    if hasattr(operator._impl, "set_meta_data"):
+        operator._impl.set_meta_data(meta_data_inputs)
+    meta_output = {}
+    if operator.is_transformer():
+        output = operator.transform(X = inputs, y = y)
+        if hasattr(operator._impl, "get_transform_meta_output"):
+            meta_output = operator._impl.get_transform_meta_output()
+    else:
+        if is_sink:
+            output = operator.predict(X = inputs)
+        else:
+            if hasattr(operator._impl, 'predict_proba'):
+                output = operator.predict_proba(X = inputs)
+            else:
+                output = operator.predict(X = inputs)
+        if hasattr(operator._impl, "get_predict_meta_output"):
+            meta_output = operator._impl.get_predict_meta_output()
+    return output, meta_output
+
+def _predict_proba_step(operator, inputs, is_sink):
+    if operator.is_transformer():
+        output = operator.transform(X = inputs)
+    else:
+        if is_sink:
+            if hasattr(operator._impl, 'predict_proba'):
+                output = operator.predict_proba(X = inputs)
+            else:
+                raise ValueError("The sink node of the pipeline {} does not support a predict_proba method.".format(operator.name()))
+        else:#this behavior may be different later if we add user input.
+            if hasattr(operator._impl, 'predict_proba'):
+                output = operator.predict_proba(X = inputs)
+            else:
+                output = operator.predict(X = inputs)
+    return output
+
+class _ExecutionPlan:
+    """The dispatch decisions for running the steps of a trained pipeline,
+    resolved once into a flat list of instructions.
+
+    Parameters
+    ----------
+    steps : list
+        The steps of the pipeline in topological order.
+    preds : dict
+        The predecessors of each step.
+    proba : bool
+        Whether the plan is for predict_proba rather than predict.
+    """
+    def __init__(self, steps, preds, proba:bool):
+        index = {step: i for i, step in enumerate(steps)}
+        last_use:Dict[int, int] = {}
+        for i, step in enumerate(steps):
+            for pred in preds[step]:
+                last_use[index[pred]] = i
+        self.uses_meta = not proba and any(
+            hasattr(step._impl, 'set_meta_data') for step in steps)
+        self.instructions:List[Tuple[Any, ...]] = []
+        for i, step in enumerate(steps):
+            pred_indices = tuple(index[pred] for pred in preds[step])
+            freed = tuple(j for j, last in last_use.items() if last == i)
+            is_sink = i not in last_use
+            pass_y = False
+            meta_getter = None
+            if step.is_transformer():
+                method = step.transform
+                pass_y = not proba
+                meta_getter = 'get_transform_meta_output'
+            else:
+                has_proba = hasattr(step._impl, 'predict_proba')
+                if is_sink and not proba:
+                    method = step.predict
+                elif is_sink and not has_proba:
+                    method = None
+                else:
+                    method = step.predict_proba if has_proba else step.predict
+                meta_getter = 'get_predict_meta_output'
+            get_meta, set_meta = None, None
+            if self.uses_meta:
+                get_meta = getattr(step._impl, meta_getter, None)
+                set_meta = getattr(step._impl, 'set_meta_data', None)
+            self.instructions.append((step, method, pass_y, pred_indices,
+                                      freed, get_meta, set_meta))
+
+    def run(self, X, y=None):
+        """Runs the instructions on X.
+
+        Returns
+        -------
+        tuple
+            The output of the last step and the peak number of bytes
+            held by step outputs that had not been released yet.
+        """
+        outputs:List[Any] = [None] * len(self.instructions)
+        metas:List[Dict[str, Any]] = [{}] * len(self.instructions)
+        held = [0] * len(self.instructions)
+        live, peak = 0, 0
+        for i, instruction in enumerate(self.instructions):
+            step, method, pass_y, pred_indices, freed, get_meta, set_meta = instruction
+            #operators such as NoOp return a tuple (X, y)
+            if not pred_indices:
+                inputs = X
+            elif len(pred_indices) == 1:
+                inputs = outputs[pred_indices[0]]
+                if isinstance(inputs, tuple):
+                    inputs = inputs[0]
+            else:
+                inputs = [outputs[j][0] if isinstance(outputs[j], tuple)
+                          else outputs[j] for j in pred_indices]
+            for j in freed:
+                outputs[j] = None
+            if self.uses_meta:
+                meta_inputs:Dict[str, Any] = {}
+                for j in pred_indices:
+                    meta_inputs.update(metas[j])
+                if set_meta is not None:
+                    set_meta(meta_inputs)
+            if method is None:
+                raise ValueError("The sink node of the pipeline {} does not support a predict_proba method.".format(step.name()))
+            with lale.settings._trust_inputs(bool(pred_indices)):
+                output = method(X = inputs, y = y) if pass_y else method(X = inputs)
+            if self.uses_meta:
+                own_meta = get_meta() if get_meta is not None else {}
+                metas[i] = {**own_meta, **meta_inputs}
+            outputs[i] = output
+            held[i] = _nbytes(output)
+            live += held[i]
+            peak = max(peak, live)
+            live -= sum(held[j] for j in freed)
+        return outputs[-1], peak
+
+def _iter_batches(X, batch_size):
+    if isinstance(X, (np.ndarray, pd.DataFrame)) or scipy.sparse.issparse(X):
+        if batch_size is None:
+            raise ValueError('batch_size is required when the data is an array or a dataframe rather than an iterator of batches.')
+        if scipy.sparse.issparse(X):
+            X = X.tocsr()
+        for start in range(0, X.shape[0], batch_size):
+            if isinstance(X, pd.DataFrame):
+                yield X.iloc[start:start + batch_size]
+            elif isinstance(X, np.memmap):
+                # copy so that the rows get read from disk here, which
+                # happens in the background when prefetching
+                yield np.array(X[start:start + batch_size])
+            else:
+                yield X[start:start + batch_size]
+    else:
+        yield from X
+
+def _prefetch_batches(batches, prefetch):
+    if not prefetch:
+        yield from batches
+        return
+    buffer:queue.Queue = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    done = object()
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    def produce():
+        try:
+            for batch in batches:
+                if not put((batch, None)):
+                    return
+        except BaseException as e:
+            put((done, e))
+            return
+        put((done, None))
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            batch, error = buffer.get()
+            if error is not None:
+                raise error
+            if batch is done:
+                return
+            yield batch
+    finally:
+        stop.set()
+
 PlannedOpType = TypeVar('PlannedOpType', bound=PlannedOperator)
 
 class PlannedPipeline(Pipeline[PlannedOpType], PlannedOperator):
@@ -1368,42 +1799,55 @@ class TrainablePipeline(PlannedPipeline[TrainableOpType], TrainableOperator):
                  ordered:bool=False) -> None:
         super(TrainablePipeline, self).__init__(steps, edges, ordered=ordered)
 
-    def fit(self, X, y=None, **fit_params)->TrainedOperator:
-        trained_steps:List[TrainedOperator] = [ ]
-        outputs:Dict[Operator, Any] = { }
-        edges:List[Tuple[TrainableOpType, TrainableOpType]] = self.edges()
-        trained_map:Dict[TrainableOpType, TrainedOperator] = {}
+    def fit(self, X, y=None, n_jobs=None, executor='thread', memory=None, **fit_params)->TrainedOperator:
+        """Train all steps of the pipeline.
 
+        Parameters
+        ----------
+        X, y :
+            The training data, passed to the source steps of the pipeline.
+        n_jobs : int, optional
+            Number of steps to train concurrently. By default, steps are
+            trained one at a time. With n_jobs > 1 (or -1 for all
+            processors), every step starts as soon as its predecessors are
+            done, so independent branches of a union run in parallel.
+        executor : 'thread' or 'process', optional
+            Kind of pool used when n_jobs is not 1, by default 'thread'.
+        memory : lale.fit_cache.FitCache, optional
+            Cache of trained steps and their outputs. Steps found in it,
+            because they and all their predecessors were already fitted
+            on the same data, are taken from the cache instead of refitted.
+        """
+        edges:List[Tuple[TrainableOpType, TrainableOpType]] = self.edges()
         sink_nodes = self.find_sink_nodes()
-        for operator in self._steps:
-            preds = self._preds[operator]
-            if len(preds) == 0:
-                inputs = [X]
-            else:
-                inputs = [outputs[pred][0] if isinstance(outputs[pred], tuple) else outputs[pred] for pred in preds]
-            trainable = operator
-            if len(inputs) == 1:
-                inputs = inputs[0]
-            trained:TrainedOperator
-            if trainable.is_supervised():
-                trained = trainable.fit(X = inputs, y = y)
-            else:
-                trained = trainable.fit(X = inputs)
-            trained_map[operator] = trained
-            trained_steps.append(trained)
-            if trained.is_transformer():
-                output = trained.transform(X = inputs, y = y)
-            else:
-                if trainable in sink_nodes:
-                    output = trained.predict(X = inputs) #We don't support y for predict yet as there is no compelling case
-                else:
-                    # This is ok because trainable pipelines steps
-	                # must only be individual operators
-                    if hasattr(trained._impl, 'predict_proba'): # type: ignore
-                        output = trained.predict_proba(X = inputs)
-                    else:
-                        output = trained.predict(X = inputs)
-            outputs[operator] = output
+        def step_args(operator, results):
+            outputs = {pred: results[pred][1] for pred in self._preds[operator]}
+            inputs = _step_inputs(X, self._preds[operator], outputs)
+            return operator, inputs, y, operator in sink_nodes
+        def release(result):
+            trained, output = result
+            return trained, None
+        step_fn:Any = _fit_step
+        args_fn:Any = step_args
+        on_result = None
+        if memory is not None:
+            X_key, y_key = memory.fingerprint(X), memory.fingerprint(y)
+            keys:Dict[TrainableOpType, str] = {}
+            def cached_step_args(operator, results):
+                pred_keys = [keys[pred] for pred in self._preds[operator]]
+                keys[operator] = memory.step_key(operator, pred_keys or [X_key],
+                                                 y_key, operator in sink_nodes)
+                return (memory.get(keys[operator]), *step_args(operator, results))
+            def on_result(operator, result):
+                memory.put(keys[operator], result)
+            step_fn, args_fn = _cached_fit_step, cached_step_args
+        results, self._peak_memory = _run_steps(
+            self._steps, self._preds, args_fn, step_fn, release,
+            n_jobs=n_jobs, executor=executor, on_result=on_result)
+        trained_map:Dict[TrainableOpType, TrainedOperator] = {
+            operator: results[operator][0] for operator in self._steps}
+        trained_steps:List[TrainedOperator] = [
+            trained_map[operator] for operator in self._steps]
 
         trained_edges = [(trained_map[x], trained_map[y]) for (x, y) in edges]
 
@@ -1512,6 +1956,7 @@ class TrainablePipeline(PlannedPipeline[TrainableOpType], TrainableOperator):
 TrainedOpType = TypeVar('TrainedOpType', bound=TrainedOperator)
 
 class TrainedPipeline(TrainablePipeline[TrainedOpType], TrainedOperator):
+    _plans:Optional[Dict[str, _ExecutionPlan]]
 
     def __init__(self, 
                  steps:List[TrainedOpType],
@@ -1520,80 +1965,132 @@ class TrainedPipeline(TrainablePipeline[TrainedOpType], TrainedOperator):
         super(TrainedPipeline, self).__init__(steps, edges, ordered=ordered)
 
 
-    def predict(self, X, y = None):
-        outputs = { }
-        meta_outputs = {}
+    def compile(self)->'TrainedPipeline':
+        """Resolve which method to call on each step, and where its inputs
+        come from, once for all subsequent calls to predict, transform,
+        and predict_proba that run the steps one at a time. Otherwise
+        this happens on the first such call.
+
+        Returns
+        -------
+        result : TrainedPipeline
+            The pipeline itself.
+        """
+        self._plans = {
+            'predict': _ExecutionPlan(self._steps, self._preds, proba=False),
+            'predict_proba': _ExecutionPlan(self._steps, self._preds, proba=True)}
+        return self
+
+    def _plan(self, kind:str)->_ExecutionPlan:
+        if getattr(self, '_plans', None) is None:
+            self._plans = {}
+        if kind not in self._plans:
+            self._plans[kind] = _ExecutionPlan(
+                self._steps, self._preds, proba=(kind == 'predict_proba'))
+        return self._plans[kind]
+
+    def predict(self, X, y = None, n_jobs=None, executor='thread'):
+        """Make predictions by running X through all steps of the pipeline.
+
+        Parameters
+        ----------
+        X :
+            The data, passed to the source steps of the pipeline.
+        n_jobs : int, optional
+            Number of steps to run concurrently, see `TrainablePipeline.fit`.
+        executor : 'thread' or 'process', optional
+            Kind of pool used when n_jobs is not 1, by default 'thread'.
+        """
+        if n_jobs is None or n_jobs == 1:
+            result, self._peak_memory = self._plan('predict').run(X, y)
+            return result
         sink_nodes = self.find_sink_nodes()
-        for operator in self._steps:
+        meta_outputs:Dict[TrainedOpType, Dict[str, Any]] = {}
+        def meta_data_inputs(operator, results):
+            #we create meta_data_inputs as a dictionary with metadata from all previoud steps
+            #Note that if multiple previous steps generate the same key, it will retain only one of those.
+            return {key: value for pred in self._preds[operator]
+                    for key, value in meta_output(pred, results).items()}
+        def meta_output(operator, results):
+            if operator not in meta_outputs:
+                meta_outputs[operator] = {**results[operator][1],
+                                          **meta_data_inputs(operator, results)}
+            return meta_outputs[operator]
+        def step_args(operator, results):
             preds = self._preds[operator]
-            if len(preds) == 0:
-                inputs = [X]
-                meta_data_inputs = {}
-            else:
-                inputs = [outputs[pred][0] if isinstance(outputs[pred], tuple) else outputs[pred] for pred in preds]
-                #we create meta_data_inputs as a dictionary with metadata from all previoud steps
-                #Note that if multiple previous steps generate the same key, it will retain only one of those.
-                
-                meta_data_inputs = {key: meta_outputs[pred][key] for pred in preds 
-                        if meta_outputs[pred] is not None for key in meta_outputs[pred]}
-            if len(inputs) == 1:
-                inputs = inputs[0]
-            if hasattr(operator._impl, "set_meta_data"):
-                operator._impl.set_meta_data(meta_data_inputs)
-            meta_output = {}
-            if operator.is_transformer():
-                output = operator.transform(X = inputs, y = y)
-                if hasattr(operator._impl, "get_transform_meta_output"):
-                    meta_output = operator._impl.get_transform_meta_output()
-            else:
-                if operator in sink_nodes:
-                    output = operator.predict(X = inputs)
-                else:
-                    if hasattr(operator._impl, 'predict_proba'):
-                        output = operator.predict_proba(X = inputs)
-                    else:
-                        output = operator.predict(X = inputs)
-                if hasattr(operator._impl, "get_predict_meta_output"):
-                    meta_output = operator._impl.get_predict_meta_output()
-            outputs[operator] = output
-            meta_output.update({key:meta_outputs[pred][key] for pred in preds 
-                    if meta_outputs[pred] is not None for key in meta_outputs[pred]})
-            meta_outputs[operator] = meta_output
-        return outputs[self._steps[-1]]
-
-    def transform(self, X, y = None):
+            outputs = {pred: results[pred][0] for pred in preds}
+            inputs = _step_inputs(X, preds, outputs)
+            return (operator, inputs, y, meta_data_inputs(operator, results),
+                    operator in sink_nodes)
+        def release(result):
+            output, meta_output = result
+            return None, meta_output
+        results, self._peak_memory = _run_steps(
+            self._steps, self._preds, step_args, _predict_step, release,
+            n_jobs=n_jobs, executor=executor)
+        return results[self._steps[-1]][0]
+
+    def transform(self, X, y = None, n_jobs=None, executor='thread'):
         #TODO: What does a transform on a pipeline mean, if the last step is not a transformer
         #can it be just the output of predict of the last step?
         # If this implementation changes, check to make sure that the implementation of 
         # self.is_transformer is kept in sync with the new assumptions.
-        return self.predict(X, y)
+        return self.predict(X, y, n_jobs=n_jobs, executor=executor)
 
-    def predict_proba(self, X):
-        outputs = { }
+    def predict_batches(self, X_iter, batch_size=None, prefetch=0, n_jobs=None, executor='thread')->Iterator[Any]:
+        """Make predictions chunk by chunk, yielding the result for each
+        batch of rows as soon as it has gone through the pipeline.
+
+        Parameters
+        ----------
+        X_iter :
+            Either an iterable of batches, or an array, memory-mapped
+            array, sparse matrix, or dataframe that gets split into
+            batches of batch_size rows.
+        batch_size : int, optional
+            Number of rows per batch when X_iter is not already an
+            iterable of batches.
+        prefetch : int, optional
+            Maximum number of batches read ahead by a background thread
+            while the current batch is processed, by default 0 (none).
+        n_jobs : int, optional
+            Number of steps to run concurrently, see `TrainablePipeline.fit`.
+        executor : 'thread' or 'process', optional
+            Kind of pool used when n_jobs is not 1, by default 'thread'.
+        """
+        batches = _iter_batches(X_iter, batch_size)
+        for X in _prefetch_batches(batches, prefetch):
+            yield self.predict(X, n_jobs=n_jobs, executor=executor)
+
+    def transform_batches(self, X_iter, batch_size=None, prefetch=0, n_jobs=None, executor='thread')->Iterator[Any]:
+        """Transform data chunk by chunk, see `predict_batches`."""
+        batches = _iter_batches(X_iter, batch_size)
+        for X in _prefetch_batches(batches, prefetch):
+            yield self.transform(X, n_jobs=n_jobs, executor=executor)
+
+    def predict_proba(self, X, n_jobs=None, executor='thread'):
+        """Compute probabilities by running X through all steps of the pipeline.
+
+        Parameters
+        ----------
+        X :
+            The data, passed to the source steps of the pipeline.
+        n_jobs : int, optional
+            Number of steps to run concurrently, see `TrainablePipeline.fit`.
+        executor : 'thread' or 'process', optional
+            Kind of pool used when n_jobs is not 1, by default 'thread'.
+        """
+        if n_jobs is None or n_jobs == 1:
+            result, self._peak_memory = self._plan('predict_proba').run(X)
+            return result
         sink_nodes = self.find_sink_nodes()
-        for operator in self._steps:
-            preds = self._preds[operator]
-            if len(preds) == 0:
-                inputs = [X]
-            else:
-                inputs = [outputs[pred][0] if isinstance(outputs[pred], tuple) else outputs[pred] for pred in preds]
-            if len(inputs) == 1:
-                inputs = inputs[0]
-            if operator.is_transformer():
-                output = operator.transform(X = inputs)
-            else:
-                if operator in sink_nodes:
-                    if hasattr(operator._impl, 'predict_proba'):
-                        output = operator.predict_proba(X = inputs)
-                    else:
-                        raise ValueError("The sink node of the pipeline {} does not support a predict_proba method.".format(operator.name()))
-                else:#this behavior may be different later if we add user input.
-                    if hasattr(operator._impl, 'predict_proba'):
-                        output = operator.predict_proba(X = inputs)
-                    else:
-                        output = operator.predict(X = inputs)
-            outputs[operator] = output
-        return outputs[self._steps[-1]]
+        def step_args(operator, results):
+            inputs = _step_inputs(X, self._preds[operator], results)
+            return operator, inputs, operator in sink_nodes
+        results, self._peak_memory = _run_steps(
+            self._steps, self._preds, step_args, _predict_proba_step,
+            lambda output: None, n_jobs=n_jobs, executor=executor)
+        return results[self._steps[-1]]
 
     def to_json(self):
         super_json = super(TrainablePipeline, self).to_json()
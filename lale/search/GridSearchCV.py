@@ -13,13 +13,14 @@
 # limitations under the License.
 
 from typing import Any, Dict, Iterable, Optional, List, Set, Tuple, Union
-from lale.search.search_space_grid import get_search_space_grids, SearchSpaceGrid
+from lale.search.search_space_grid import iter_search_space_grids, SearchSpaceGrid
 from lale.sklearn_compat import make_sklearn_compat, unnest_HPparams
 import lale.operators as Ops
 from lale.schema_utils import Schema, getMinimum, getMaximum
 from lale.search.search_space import SearchSpace, SearchSpaceObject, SearchSpaceEnum, SearchSpaceNumber, SearchSpaceArray
 from lale.search.schema2search_space import schemaToSearchSpace
 from lale.search.PGO import PGO
+from lale.search.multi_fidelity import HalvingGridSearchCV
 
 import numpy as np
 from sklearn.model_selection import GridSearchCV
@@ -34,6 +35,8 @@ def LaleGridSearchCV(
         lale_num_samples:Optional[int]=None, 
         lale_num_grids:Optional[float]=None, 
         lale_pgo:Optional[PGO]=None,
+        lale_halving_eta:Optional[int]=None,
+        lale_min_budget:Optional[float]=None,
         **kwargs):
     """
     Parameters
@@ -45,11 +48,21 @@ def LaleGridSearchCV(
         if set to an integer => 1, it will determine how many parameter grids will be returned (at most)
         if set to an float between 0 and 1, it will determine what fraction should be returned
         note that setting it to 1 is treated as in integer.  To return all results, use None
+    lale_halving_eta: integer, optional
+        if set, returns a lale.search.multi_fidelity.HalvingGridSearchCV, which cross-validates
+        all combinations on a subsample of the rows and only keeps the best 1/lale_halving_eta
+        of them for each larger subsample. The remaining keyword arguments can then be cv,
+        scoring, n_jobs, and random_state.
+    lale_min_budget: float, optional
+        fraction of the rows of the first subsample when halving, by default 1/lale_halving_eta**2
     """
 
     params = get_parameter_grids(op, num_samples=lale_num_samples, num_grids=lale_num_grids, pgo=lale_pgo)
     if not params and isinstance(op, Ops.IndividualOp):
         params = [get_defaults_as_param_grid(op)]
+    if lale_halving_eta is not None:
+        return HalvingGridSearchCV(make_sklearn_compat(op), params, eta=lale_halving_eta,
+                                   min_budget=lale_min_budget, **kwargs)
     return get_lale_gridsearchcv_op(make_sklearn_compat(op), params, **kwargs)
 
 def get_defaults_as_param_grid(op:'Ops.IndividualOp'):
@@ -92,7 +105,7 @@ def get_grid_search_parameter_grids(
         Note that you will need to wrap the lale operator for sklearn compatibility to call GridSearchCV
         directly.  The lale GridSearchCV wrapper takes care of that for you
     """
-    hp_grids = get_search_space_grids(op, num_grids=num_grids, pgo=pgo)
+    hp_grids = iter_search_space_grids(op, num_grids=num_grids, pgo=pgo)
     grids = SearchSpaceGridstoGSGrids(hp_grids, num_samples=num_samples)
     return grids
 
@@ -159,6 +172,6 @@ def SearchSpaceGridtoGSGrid( hp:SearchSpaceGrid,
                     num_samples:Optional[int]=None)->GSGrid:
     return {k:HPValuetoGSValue(k, v, num_samples=num_samples) for k,v in hp.items()}
 
-def SearchSpaceGridstoGSGrids(hp_grids:List[SearchSpaceGrid],
+def SearchSpaceGridstoGSGrids(hp_grids:Iterable[SearchSpaceGrid],
                      num_samples:Optional[int]=None)->List[GSGrid]:
     return [SearchSpaceGridtoGSGrid(g, num_samples=num_samples) for g in hp_grids]
@@ -350,7 +350,7 @@ class SearchSpaceHPStrVisitor(Visitor):
 
             pgo_decls:List[str] = []
             for k,v in sorted(self.pgo_dict.items(), key=last_num):
-                l = v.freq_dist.tolist()
+                l = list(zip(v.vals.tolist(), v.frequencies.tolist()))
                 pgo_decls.append(f"pgo_{k} = {l}")
             pgo_decls_str = "\n".join(pgo_decls) + "\n"
     
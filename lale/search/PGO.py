@@ -49,14 +49,34 @@ def load_pgo_data(json_data) -> PGO:
     norm = normalize_pgo_type(json_data)
     return norm
 
+RandomSource = Union[None, int, np.random.RandomState, Any]
+
+def _as_rng(rng:RandomSource)->Any:
+    """ A numpy random number generator for rng, which is either a seed, a
+    numpy Generator or RandomState, or None to seed a new one from the random
+    module, so that random.seed still makes PGO sampling reproducible.
+    """
+    if rng is None:
+        rng = random.getrandbits(32)
+    if isinstance(rng, (int, np.integer)):
+        if hasattr(np.random, 'default_rng'):
+            return np.random.default_rng(rng)
+        return np.random.RandomState(rng)
+    return rng
+
+def _random_indices(rng:Any, high:int, count:int)->np.ndarray:
+    if hasattr(rng, 'integers'): # numpy.random.Generator
+        return rng.integers(0, high, size=count)
+    return rng.randint(0, high, size=count)
+
 # TODO: Add support for falling back on an underlying distribution
 # with some probability
 T = TypeVar('T')
 class FrequencyDistribution(Generic[T]):
     """ Represents the distribution implied by a histogram
     """
-    freq_dist:np.array # Array[T,int]
-    vals:np.array # Array[T]
+    vals:np.array # Array[T], of the given dtype unless a default value is present
+    frequencies:np.array # Array[int]
     cumulative_freqs:np.array # Array[int] 
 
     @classmethod
@@ -77,12 +97,13 @@ class FrequencyDistribution(Generic[T]):
     def __init__(self, freqs:Iterable[Tuple[Defaultable[T], int]], dtype=object):
         # we need them to be sorted for locality
         sorted_freq_list = sorted(freqs, key = (lambda k: (k[0] is _default_value, None if k[0] is _default_value else k[0])))
-        freqs_array = np.array(sorted_freq_list, dtype=[('value',object),('frequency',int)])
-#        freqs_array.sort(order='value')
-        self.freq_dist = freqs_array
-
-        self.vals = freqs_array['value']
-        self.cumulative_freqs = np.cumsum(freqs_array['frequency'])
+        values = [v for v, _ in sorted_freq_list]
+        if any(v is _default_value for v in values):
+            dtype = object
+        self.vals = np.empty(len(values), dtype=dtype)
+        self.vals[:] = values
+        self.frequencies = np.array([f for _, f in sorted_freq_list], dtype=int)
+        self.cumulative_freqs = np.cumsum(self.frequencies)
 
     def __len__(self):
         return np.int_(self.cumulative_freqs[-1])
@@ -97,35 +118,41 @@ class FrequencyDistribution(Generic[T]):
     def __getitem__(self, key: slice) -> Sequence[T]: ...
 
     def __getitem__(self, key: Union[int, Sequence[int], slice]) -> Union[T, Sequence[T]]:
-        indices:Sequence[int]
-        single = False
-        if isinstance(key, (int, float)):
-            single = True
-            indices = [key]
-        elif isinstance(key, slice):
-            # TODO: this could be made more efficient
-            indices = range(key.start or 0, key.stop or len(self), key.step or 1)
-        else:
-            indices = key
-
-        val_indices:Sequence[int] = np.searchsorted(self.cumulative_freqs, indices, side='right')
-
-        values = self.vals[val_indices].tolist()
-
-        if single:
-            assert len(values) == 1
-            return values[0]
-        else:
-            return values
-
-    def sample(self)->T:
-        l = len(self)
-        i = random.randrange(l)
-        return self[i]
-
-    def samples(self, count:int)->Sequence[T]:
-        l = len(self)
-        i:Sequence[int] = [random.randrange(l) for _ in range(count)]
+        if isinstance(key, (int, float, np.integer, np.floating)):
+            val_index = np.searchsorted(self.cumulative_freqs, key, side='right')
+            return self.vals[val_index].item() if self.vals.dtype != object else self.vals[val_index]
+        if isinstance(key, slice):
+            return self._slice(key).tolist()
+        val_indices = np.searchsorted(self.cumulative_freqs, key, side='right')
+        return self.vals[val_indices].tolist()
+
+    def _slice(self, key:slice)->np.ndarray:
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            indices = np.arange(start, stop, step)
+            return self.vals[np.searchsorted(self.cumulative_freqs, indices, side='right')]
+        if start >= stop:
+            return self.vals[:0]
+        # only search for the ends, and repeat each value in between
+        first = np.searchsorted(self.cumulative_freqs, start, side='right')
+        last = np.searchsorted(self.cumulative_freqs, stop - 1, side='right')
+        counts = self.frequencies[first:last + 1].copy()
+        counts[0] = self.cumulative_freqs[first] - start
+        counts[-1] -= self.cumulative_freqs[last] - stop
+        return np.repeat(self.vals[first:last + 1], counts)
+
+    def sample(self, rng:RandomSource=None)->T:
+        if rng is None:
+            # skips seeding a numpy generator for a single value
+            return self[random.randrange(len(self))]
+        return self.samples(1, rng)[0]
+
+    def samples(self, count:int, rng:RandomSource=None)->Sequence[T]:
+        """ Draws count values, with probabilities proportional to their frequencies.
+        rng is a seed, a numpy Generator or RandomState for seedable streams,
+        or None to draw from the random module's state.
+        """
+        i = _random_indices(_as_rng(rng), len(self), count)
         return self[i]
 
 
@@ -0,0 +1,126 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistence of the trials of a hyperopt search, so that it can resume
+after the process got killed.
+
+Each finished trial is appended as one line of JSON to a local file. A
+crash can at worst truncate the last line, which gets skipped when the
+file is read back."""
+
+import datetime
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import hyperopt
+import numpy as np
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+_TIME_KEYS = ['book_time', 'refresh_time']
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, datetime.datetime):
+        return value.strftime(_TIME_FORMAT)
+    return str(value)
+
+def _encode_trial(doc:Dict[str, Any])->str:
+    return json.dumps(doc, default=_to_json, separators=(',', ':'))
+
+def _decode_trial(line:str)->Dict[str, Any]:
+    doc = json.loads(line)
+    for key in _TIME_KEYS:
+        if isinstance(doc.get(key), str):
+            doc[key] = datetime.datetime.strptime(doc[key], _TIME_FORMAT)
+    return doc
+
+def load_trials(path:str)->List[Dict[str, Any]]:
+    """The trial docs in the file at path, or none if it does not exist."""
+    if not os.path.exists(path):
+        return []
+    docs:List[Dict[str, Any]] = []
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            if line.strip() == '':
+                continue
+            try:
+                docs.append(_decode_trial(line))
+            except ValueError:
+                logger.warning(f'Skipping unreadable trial on line {number} of {path}.')
+    return docs
+
+class CheckpointedTrials(hyperopt.Trials):
+    """A `hyperopt.Trials` that appends every finished trial to a file.
+
+    Hyperopt and the optimizers in `lale.search` call `refresh` after each
+    round of trials, which is when the new ones get written, with one
+    open and flush per round and no fsync. So the file survives the process
+    getting killed, but not necessarily the machine crashing.
+
+    Parameters
+    ----------
+    path : str
+        File to append the trials to.
+    resume_from : str, optional
+        File with the trials of an earlier run to start from. It can be the
+        same as path. A missing file is treated as empty, so the same
+        arguments work for the first run and for restarts.
+    """
+    def __init__(self, path:str, resume_from:Optional[str]=None):
+        self._path = path
+        self._written:Set[int] = set()
+        super(CheckpointedTrials, self).__init__()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n') # end a line truncated by a crash
+        if resume_from is not None:
+            docs = load_trials(resume_from)
+            if len(docs) > 0:
+                self.insert_trial_docs(docs)
+                if os.path.abspath(resume_from) == os.path.abspath(path):
+                    self._written.update(doc['tid'] for doc in docs)
+                self.refresh()
+
+    def refresh(self):
+        super(CheckpointedTrials, self).refresh()
+        if not hasattr(self, '_written'):
+            return # a view made by hyperopt.Trials.view
+        done = [doc for doc in self._dynamic_trials
+                if doc['state'] == hyperopt.JOB_STATE_DONE and doc['tid'] not in self._written]
+        if len(done) == 0:
+            return
+        lines = ''.join(_encode_trial(doc) + '\n' for doc in done)
+        with open(self._path, 'a') as f:
+            f.write(lines)
+            f.flush()
+        self._written.update(doc['tid'] for doc in done)
+
+def resumed_rstate(seed:int, trials)->np.random.RandomState:
+    """A random state seeded with seed and advanced past the draws that the
+    existing trials used, one per trial, so that a resumed search does not
+    repeat the suggestions of the run it continues."""
+    rstate = np.random.RandomState(seed)
+    for _ in range(len(trials.trials)):
+        rstate.randint(2 ** 31 - 1)
+    return rstate
@@ -0,0 +1,312 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Multi-fidelity search: successive halving and Hyperband.
+
+A budget is a fraction in (0, 1] of the full cost of evaluating a
+configuration. It either scales the number of training rows, or the
+number of iterations of the operators whose hyperparameters include one
+of `BUDGET_HYPERPARAMS`."""
+
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import hyperopt
+import hyperopt.base
+import jsonschema
+import numpy as np
+from hyperopt.utils import coarse_utcnow
+from sklearn.base import BaseEstimator, clone
+from sklearn.model_selection import ParameterGrid, cross_val_score, train_test_split
+from sklearn.utils.multiclass import type_of_target
+
+from lale.search.parallel_fmin import _as_result, suggest_batch
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+BUDGET_HYPERPARAMS = ['n_estimators', 'max_iter']
+
+def _budget_hyperparam(op)->Optional[str]:
+    defaults = op.hyperparam_defaults()
+    for name in BUDGET_HYPERPARAMS:
+        if name in defaults:
+            return name
+    return None
+
+def has_budget_hyperparams(trainable)->bool:
+    """Whether some step of trainable exposes `n_estimators` or `max_iter`."""
+    from lale.operators import IndividualOp, Pipeline
+    if isinstance(trainable, IndividualOp):
+        return _budget_hyperparam(trainable) is not None
+    if isinstance(trainable, Pipeline):
+        return any(has_budget_hyperparams(step) for step in trainable.steps())
+    return False
+
+def with_budget_iterations(trainable, budget:float):
+    """Copy of trainable where the `n_estimators` or `max_iter` of each step
+    is scaled by budget. Steps whose schema does not allow the reduced
+    value are kept as they are."""
+    from lale.operators import IndividualOp, Pipeline, TrainablePipeline
+    if isinstance(trainable, IndividualOp):
+        name = _budget_hyperparam(trainable)
+        if name is None:
+            return trainable
+        hyperparams = {**(trainable._hyperparams or {})}
+        value = hyperparams.get(name, trainable.hyperparam_defaults()[name])
+        if not isinstance(value, int) or isinstance(value, bool):
+            return trainable
+        hyperparams[name] = max(1, int(round(value * budget)))
+        try:
+            return trainable(**hyperparams)
+        except jsonschema.ValidationError:
+            return trainable
+    if isinstance(trainable, Pipeline):
+        op_map = {step: with_budget_iterations(step, budget) for step in trainable.steps()}
+        edges = [(op_map[src], op_map[dst]) for src, dst in trainable.edges()]
+        return TrainablePipeline([op_map[step] for step in trainable.steps()], edges, ordered=True)
+    return trainable
+
+def subsample(X, y, budget:float, random_state=None):
+    """The fraction budget of the rows of X and y, stratified on y when it
+    holds class labels."""
+    if budget >= 1:
+        return X, y
+    stratify = y if type_of_target(y) in ['binary', 'multiclass'] else None
+    try:
+        X_part, _, y_part, _ = train_test_split(
+            X, y, train_size=budget, stratify=stratify, random_state=random_state)
+    except ValueError:
+        # too few rows of some class to stratify
+        X_part, _, y_part, _ = train_test_split(
+            X, y, train_size=budget, random_state=random_state)
+    return X_part, y_part
+
+def rung_budgets(start:float, eta:int)->List[float]:
+    """Budgets of the successive rungs from start up to 1."""
+    budgets = [start]
+    while budgets[-1] < 1:
+        budgets.append(min(1.0, budgets[-1] * eta))
+    return budgets
+
+def brackets(max_evals:int, min_budget:float, eta:int, hyperband:bool)->List[Tuple[int, float]]:
+    """The number of configurations and the starting budget of each
+    bracket, such that max_evals configurations are sampled in total.
+
+    Successive halving is a single bracket starting at min_budget.
+    Hyperband cycles through brackets that start at ever larger budgets
+    with ever fewer configurations, which hedges against low budgets
+    being misleading."""
+    if not 0 < min_budget <= 1:
+        raise ValueError(f'Invalid min_budget {min_budget}, expected a fraction in (0, 1].')
+    if eta < 2:
+        raise ValueError(f'Invalid eta {eta}, expected an integer of at least 2.')
+    if not hyperband:
+        return [(max_evals, min_budget)]
+    s_max = int(math.floor(math.log(1 / min_budget) / math.log(eta) + 1e-9))
+    result:List[Tuple[int, float]] = []
+    remaining = max_evals
+    while remaining > 0:
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            n = min(n, remaining)
+            result.append((n, max(min_budget, float(eta) ** -s)))
+            remaining -= n
+            if remaining == 0:
+                break
+    return result
+
+def successive_halving(candidates:List[Any], evaluate:Callable[[Any, float], float], start:float, eta:int)->List[Tuple[float, float]]:
+    """Evaluates all candidates at budget start, then keeps evaluating the
+    best 1/eta of them at eta times the budget, up to a budget of 1.
+
+    Parameters
+    ----------
+    candidates : list
+        The configurations.
+    evaluate : callable
+        Maps a candidate and a budget to a loss, lower is better.
+    start : float
+        Budget of the first rung.
+    eta : int
+        Factor by which the budget grows and the candidates shrink per rung.
+
+    Returns
+    -------
+    list of tuple
+        For each candidate, its loss at the largest budget it reached and
+        that budget.
+    """
+    results:List[Tuple[float, float]] = [(float('inf'), 0.0)] * len(candidates)
+    alive = list(range(len(candidates)))
+    budgets = rung_budgets(start, eta)
+    for rung, budget in enumerate(budgets):
+        for i in alive:
+            results[i] = (evaluate(candidates[i], budget), budget)
+        if rung + 1 < len(budgets):
+            num_kept = max(1, len(alive) // eta)
+            alive = sorted(alive, key=lambda i: results[i][0])[:num_kept]
+    return results
+
+class _OutOfTime(Exception):
+    pass
+
+def fmin_halving(fn, space, algo, max_evals:int, trials, rstate, min_budget:float, eta:int=3, hyperband:bool=False, deadline:Optional[float]=None):
+    """Like `hyperopt.fmin`, but with successive halving or Hyperband.
+
+    For each bracket, algo suggests a batch of configurations based on
+    the trials of the previous brackets. All trials are added to trials,
+    each with the result at the largest budget it reached, and a 'budget'
+    entry in the result. Use `argmin_at_full_budget` to find the best one.
+    As with `hyperopt.fmin`, max_evals includes the trials already in
+    trials.
+
+    Parameters
+    ----------
+    fn : callable
+        Maps params and a budget to a hyperopt result dictionary or a loss.
+    min_budget : float
+        Budget of the first rung of the first bracket.
+    eta : int, optional
+        Only the best 1/eta of the configurations get promoted to the next
+        rung, whose budget is eta times larger, by default 3.
+    hyperband : bool, optional
+        Whether to use several brackets as in Hyperband rather than a
+        single successive-halving bracket, by default False.
+    deadline : float, optional
+        If set, no more evaluations get started after this `time.time()`,
+        and only the configurations evaluated so far are added to trials.
+    """
+    domain = hyperopt.base.Domain(lambda params: fn(params, 1.0), space)
+    trials.refresh()
+    remaining = max(0, max_evals - len(trials.trials))
+    for num_configs, start in brackets(remaining, min_budget, eta, hyperband):
+        docs = suggest_batch(algo, domain, trials, rstate, num_configs)
+        if len(docs) == 0:
+            break
+        params = [hyperopt.space_eval(space, hyperopt.base.spec_from_misc(doc['misc']))
+                  for doc in docs]
+        book_time = coarse_utcnow()
+        results:Dict[int, Dict[str, Any]] = {}
+        def evaluate(i, budget):
+            if deadline is not None and time.time() >= deadline:
+                raise _OutOfTime()
+            results[i] = {**_as_result(fn(params[i], budget)), 'budget': budget}
+            if results[i].get('status') != hyperopt.STATUS_OK:
+                return float('inf')
+            return results[i]['loss']
+        try:
+            successive_halving(list(range(len(docs))), evaluate, start, eta)
+            out_of_time = False
+        except _OutOfTime:
+            out_of_time = True
+        evaluated = [i for i in range(len(docs)) if i in results]
+        for i in evaluated:
+            docs[i]['state'] = hyperopt.JOB_STATE_DONE
+            docs[i]['result'] = results[i]
+            docs[i]['book_time'] = book_time
+            docs[i]['refresh_time'] = coarse_utcnow()
+        trials.insert_trial_docs([docs[i] for i in evaluated])
+        trials.refresh()
+        if out_of_time:
+            break
+    return trials
+
+def best_trial_at_full_budget(trials)->Dict[str, Any]:
+    """Like `trials.best_trial`, but only among trials evaluated with the
+    full budget and on all folds, without getting pruned."""
+    best = None
+    for trial in trials.trials:
+        result = trial['result']
+        if result.get('status') == hyperopt.STATUS_OK and result.get('budget', 1.0) >= 1 \
+           and not result.get('pruned', False):
+            if best is None or result['loss'] < best['result']['loss']:
+                best = trial
+    if best is None:
+        if all(trial['result'].get('status') != hyperopt.STATUS_OK for trial in trials.trials):
+            raise ValueError('No trial completed, for instance because all of them failed or timed out.')
+        return trials.best_trial
+    return best
+
+def argmin_at_full_budget(trials)->Dict[str, Any]:
+    """Like `trials.argmin`, but for `best_trial_at_full_budget`."""
+    return hyperopt.base.spec_from_misc(best_trial_at_full_budget(trials)['misc'])
+
+class HalvingGridSearchCV(BaseEstimator):
+    """Grid search with successive halving on the number of training rows.
+
+    Every combination in param_grid is cross-validated on a subsample of
+    min_budget of the rows, and only the best 1/eta of them get
+    cross-validated again on eta times more rows, until the remaining
+    ones use all rows. The best one is then refit on all rows.
+
+    Parameters
+    ----------
+    estimator : sklearn-compatible estimator
+        Such as the result of `lale.sklearn_compat.make_sklearn_compat`.
+    param_grid : dict or list of dict
+        As for `sklearn.model_selection.GridSearchCV`.
+    eta : int, optional
+        By default 3.
+    min_budget : float, optional
+        Fraction of the rows used in the first rung, by default 1/eta**2.
+    cv, scoring, n_jobs :
+        Passed to `sklearn.model_selection.cross_val_score`.
+    random_state : int, optional
+        Seed for drawing the subsamples.
+    """
+    def __init__(self, estimator, param_grid, eta:int=3, min_budget:Optional[float]=None,
+                 cv=None, scoring=None, n_jobs=None, random_state=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.eta = eta
+        self.min_budget = min_budget
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        min_budget = self.min_budget if self.min_budget is not None else 1 / self.eta ** 2
+        candidates = list(ParameterGrid(self.param_grid))
+        subsamples:Dict[float, Tuple[Any, Any]] = {}
+        def evaluate(params, budget):
+            if budget not in subsamples:
+                subsamples[budget] = subsample(X, y, budget, self.random_state)
+            X_part, y_part = subsamples[budget]
+            estimator = clone(self.estimator).set_params(**params)
+            try:
+                scores = cross_val_score(estimator, X_part, y_part, cv=self.cv,
+                                         scoring=self.scoring, n_jobs=self.n_jobs)
+            except BaseException as e:
+                logger.warning(f'Exception caught in HalvingGridSearchCV for {params}: {e}')
+                return float('inf')
+            return -float(np.mean(scores))
+        results = successive_halving(candidates, evaluate, min_budget, self.eta)
+        full = [i for i, (_, budget) in enumerate(results) if budget >= 1]
+        best = min(full, key=lambda i: results[i][0])
+        self.best_params_ = candidates[best]
+        self.best_score_ = -results[best][0]
+        self.budgets_ = [budget for _, budget in results]
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_ = self.best_estimator_.fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def predict_proba(self, X):
+        return self.best_estimator_.predict_proba(X)
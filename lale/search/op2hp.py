@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional, Dict
+from typing import Any, Dict, Optional, Tuple
 import os
 import logging
 
@@ -31,6 +31,19 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from lale.operators import PlannedOperator, OperatorChoice, PlannedIndividualOp, PlannedPipeline
 
+# Hyperopt expressions by the compiled search space, which is shared
+# between calls for the same schema and PGO, and by the label. The search
+# space is part of the value to keep its id from being reused.
+_hp_exprs:Dict[Tuple[int, str], Tuple[SearchSpace, Any]] = {}
+
+def _search_space_to_hp_expr(hp_s:SearchSpace, unique_name:str):
+    key = (id(hp_s), unique_name)
+    if key not in _hp_exprs:
+        if len(_hp_exprs) >= 10000:
+            _hp_exprs.clear()
+        _hp_exprs[key] = (hp_s, search_space_to_hp_expr(hp_s, unique_name))
+    return _hp_exprs[key][1]
+
 def hyperopt_search_space(op:'PlannedOperator', 
                           schema=None,
                           pgo:Optional[PGO]=None):
@@ -79,7 +92,7 @@ class HPOperatorVisitor(Visitor):
 
             if os.environ.get("LALE_PRINT_SEARCH_SPACE", "false") == "true":
                 print(f"hyperopt search space for {unique_name}: {search_space_to_hp_str(hp_s, unique_name)}")
-            return search_space_to_hp_expr(hp_s, unique_name)
+            return _search_space_to_hp_expr(hp_s, unique_name)
         else:
             return None
 
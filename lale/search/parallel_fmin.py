@@ -0,0 +1,240 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import hyperopt
+import hyperopt.base
+from hyperopt.utils import coarse_utcnow
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def _marks(shared):
+    return [obj._mark() for obj in shared]
+
+def _changes(shared, marks):
+    return [obj._changes_since(mark) for obj, mark in zip(shared, marks)]
+
+def _apply_changes(shared, changes):
+    for obj, obj_changes in zip(shared, changes):
+        obj._apply_changes(obj_changes)
+
+def _as_result(result)->Dict[str, Any]:
+    if isinstance(result, dict):
+        return result
+    return {'loss': float(result), 'status': hyperopt.STATUS_OK}
+
+def _call_in_child(connection, fn, args, shared):
+    marks = _marks(shared)
+    try:
+        result = (True, fn(*args))
+    except BaseException as e:
+        result = (False, RuntimeError(f'{type(e).__name__}: {e}'))
+    connection.send((*result, _changes(shared, marks)))
+    connection.close()
+
+def call_with_timeout(fn, args, timeout:Optional[float], shared:Sequence[Any]=()):
+    """Calls fn(*args) in a forked child process, which gets killed if it
+    does not return within timeout seconds.
+
+    Other side effects of fn are lost with the child, except on the
+    objects in shared, such as a `lale.search.pruning.Pruner` or a
+    `lale.fit_cache.FitCache`, whose changes get sent back with the
+    result and applied to them unless the child got killed.
+
+    Raises
+    ------
+    TimeoutError
+        If the child was killed.
+    RuntimeError
+        If fn raised an exception or the child died.
+    """
+    if timeout is None or 'fork' not in multiprocessing.get_all_start_methods():
+        return fn(*args)
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    child = context.Process(target=_call_in_child, args=(sender, fn, args, shared))
+    child.start()
+    sender.close()
+    try:
+        if not receiver.poll(max(0.0, timeout)):
+            child.terminate()
+            child.join(1)
+            if child.is_alive():
+                child.kill()
+            raise TimeoutError(f'killed after {timeout} seconds')
+        try:
+            ok, result, changes = receiver.recv()
+        except EOFError:
+            raise RuntimeError(f'process died with exit code {child.exitcode}')
+    finally:
+        receiver.close()
+        child.join()
+    _apply_changes(shared, changes)
+    if not ok:
+        raise result
+    return result
+
+def with_time_limits(fn, max_eval_time:Optional[float], deadline:Optional[float], shared:Sequence[Any]=()):
+    """Wraps fn(params, ...) so that each call runs in a child process that
+    gets killed after max_eval_time seconds or at the deadline, whichever
+    comes first. Killed calls return a failed result with the elapsed
+    time and 'timed_out': True. The changes to the objects in shared get
+    sent back as in `call_with_timeout`."""
+    if max_eval_time is None and deadline is None:
+        return fn
+    def timed_fn(params, *args):
+        start = time.time()
+        timeout = max_eval_time
+        if deadline is not None:
+            remaining = deadline - start
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        try:
+            return call_with_timeout(fn, (params, *args), timeout, shared)
+        except TimeoutError as e:
+            logger.warning(f'Trial timed out: {e}')
+            return {'status': hyperopt.STATUS_FAIL, 'time': time.time() - start,
+                    'timed_out': True}
+    return timed_fn
+
+def suggest_batch(algo, domain, trials, rstate, n:int)->List[Dict[str, Any]]:
+    """Asks algo for n new trials, one at a time with their own seed, all
+    based on the trials that are already done. Returns the trial docs in
+    state JOB_STATE_NEW, without inserting them."""
+    docs:List[Dict[str, Any]] = []
+    for new_id in trials.new_trial_ids(n):
+        docs += algo([new_id], domain, trials, rstate.randint(2 ** 31 - 1))
+    return docs
+
+def _evaluate_all(num_workers:int, fn, params:List[Dict[str, Any]], shared:Sequence[Any])->List[Any]:
+    # One forked child per trial, all started before the changes of the
+    # round get applied, so that every trial of the round sees the same
+    # state of shared. The children inherit fn together with the training
+    # data instead of receiving a pickled copy.
+    if num_workers == 1 or len(params) <= 1:
+        return [fn(p) for p in params]
+    context = multiprocessing.get_context('fork')
+    children = []
+    for p in params:
+        receiver, sender = context.Pipe(duplex=False)
+        child = context.Process(target=_call_in_child, args=(sender, fn, (p,), shared))
+        child.start()
+        sender.close()
+        children.append((receiver, child))
+    received = []
+    try:
+        for receiver, child in children:
+            try:
+                received.append(receiver.recv())
+            except EOFError:
+                raise RuntimeError(f'process died with exit code {child.exitcode}')
+    finally:
+        for receiver, child in children:
+            receiver.close()
+            if child.is_alive() and len(received) < len(children):
+                child.terminate()
+            child.join()
+    results = []
+    for ok, result, changes in received:
+        if not ok:
+            raise result
+        _apply_changes(shared, changes)
+        results.append(result)
+    return results
+
+def fmin_parallel(fn, space, algo, max_evals:int, trials, rstate, n_jobs:int, deadline:Optional[float]=None, cache=None, shared:Sequence[Any]=()):
+    """Like `hyperopt.fmin`, but evaluates up to n_jobs trials at a time in
+    forked local processes.
+
+    Each round, algo suggests one trial per worker based on the trials of
+    the previous rounds, then the round is evaluated and its results get
+    added to trials. Each trial runs in its own forked process, so all
+    trials of a round see the objects in shared as they were after the
+    previous round. So the trials only depend on the seed of rstate and on
+    n_jobs, not on the timing of the workers.
+
+    Parameters
+    ----------
+    fn : callable
+        Objective that maps params to a hyperopt result dictionary or to a
+        loss. The workers inherit it by forking, so it need not be
+        picklable, but the params and results must be.
+    space :
+        Hyperopt search space.
+    algo : callable
+        Suggestion algorithm such as `hyperopt.tpe.suggest`.
+    max_evals : int
+        Total number of trials, including those already in trials.
+    trials : hyperopt.Trials
+        Where the evaluated trials get stored.
+    rstate : numpy.random.RandomState
+        Source of the seeds for algo.
+    n_jobs : int
+        Number of worker processes, -1 for all processors. With 1, trials
+        are evaluated in the calling process.
+    deadline : float, optional
+        If set, no more trials get started after this `time.time()`.
+    cache : lale.search.trial_cache.TrialCache, optional
+        If set, only params whose configuration is not in the cache get
+        sent to the workers, and the others reuse the cached result.
+    shared : sequence, optional
+        Objects that fn changes, such as a `lale.search.pruning.Pruner` or
+        a `lale.fit_cache.FitCache`, whose changes in the workers get
+        applied to them in the calling process after each round, in the
+        order of the trials.
+    """
+    num_workers = (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+    domain = hyperopt.base.Domain(fn, space)
+    if num_workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        logger.warning('Cannot fork worker processes on this platform, evaluating the trials one at a time.')
+        num_workers = 1
+    trials.refresh()
+    while len(trials.trials) < max_evals:
+        if deadline is not None and time.time() >= deadline:
+            break
+        n = min(num_workers, max_evals - len(trials.trials))
+        docs = suggest_batch(algo, domain, trials, rstate, n)
+        if len(docs) == 0:
+            break
+        params = [hyperopt.space_eval(space, hyperopt.base.spec_from_misc(doc['misc']))
+                  for doc in docs]
+        book_time = coarse_utcnow()
+        if cache is None:
+            results = _evaluate_all(num_workers, fn, params, shared)
+        else:
+            keys = [cache.key(p) for p in params]
+            results = [cache.lookup(key) for key in keys]
+            first = {}
+            for i, key in enumerate(keys):
+                if results[i] is None and key not in first:
+                    first[key] = i
+            evaluated = _evaluate_all(num_workers, fn, [params[i] for i in first.values()], shared)
+            for key, result in zip(first.keys(), evaluated):
+                results[first[key]] = cache.store(key, result)
+            for i, key in enumerate(keys):
+                if results[i] is None: # a duplicate within the round
+                    results[i] = cache.lookup(key)
+        for doc, result in zip(docs, results):
+            doc['state'] = hyperopt.JOB_STATE_DONE
+            doc['result'] = _as_result(result)
+            doc['book_time'] = book_time
+            doc['refresh_time'] = coarse_utcnow()
+        trials.insert_trial_docs(docs)
+        trials.refresh()
+    return trials
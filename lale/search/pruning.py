@@ -0,0 +1,147 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Policies for stopping the cross-validation of a trial after some folds,
+when its scores so far show that it cannot compete.
+
+A pruner is passed to `lale.helpers.cross_val_score_track_trials`, which
+asks it after each fold whether to stop, and reports every trial to it
+at the end, so that it can compare later trials against earlier ones.
+Scores are higher-is-better, like the scoring functions used there."""
+
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+class TrialPruned(Exception):
+    """Raised by `cross_val_score_track_trials` when the pruner stopped a
+    trial, with the means over the folds that did run."""
+    def __init__(self, score:float, log_loss:float, time:float, folds:List[Dict[str, Any]]):
+        super(TrialPruned, self).__init__(f'trial pruned after {len(folds)} folds with score {score}')
+        self.score = score
+        self.log_loss = log_loss
+        self.time = time
+        self.folds = folds
+
+class Pruner():
+    """Base class for pruners, which never prunes.
+
+    Parameters
+    ----------
+    min_folds : int, optional
+        Number of folds that always run, by default 2.
+    """
+    def __init__(self, min_folds:int=2):
+        self.min_folds = min_folds
+        self._history:List[Tuple[List[float], bool]] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def should_prune(self, fold_scores:List[float])->bool:
+        """Whether to stop the trial whose folds so far got fold_scores."""
+        if len(fold_scores) < self.min_folds:
+            return False
+        with self._lock:
+            return self._should_prune(fold_scores)
+
+    def _should_prune(self, fold_scores:List[float])->bool:
+        return False
+
+    def report(self, fold_scores:List[float], complete:bool)->None:
+        """Record the fold scores of a trial, which is complete if it ran
+        all folds, or else got pruned."""
+        with self._lock:
+            self._history.append((list(fold_scores), complete))
+
+    # Trials that run in forked processes report to a copy of the pruner.
+    # lale.search.parallel_fmin uses these to send the reports back.
+
+    def _mark(self):
+        with self._lock:
+            return len(self._history)
+
+    def _changes_since(self, mark):
+        with self._lock:
+            return self._history[mark:]
+
+    def _apply_changes(self, changes)->None:
+        with self._lock:
+            self._history.extend(changes)
+
+class MedianPruner(Pruner):
+    """Prunes a trial when the mean of its scores is below the median, over
+    earlier trials that ran at least as many folds, of the mean of their
+    scores on the same folds.
+
+    Parameters
+    ----------
+    min_folds : int, optional
+        Number of folds that always run, by default 2.
+    min_trials : int, optional
+        Number of earlier trials needed before pruning, by default 5.
+    """
+    def __init__(self, min_folds:int=2, min_trials:int=5):
+        super(MedianPruner, self).__init__(min_folds)
+        self.min_trials = min_trials
+
+    def _should_prune(self, fold_scores:List[float])->bool:
+        k = len(fold_scores)
+        others = [np.mean(scores[:k]) for scores, _ in self._history if len(scores) >= k]
+        if len(others) < self.min_trials:
+            return False
+        return bool(np.mean(fold_scores) < np.median(others))
+
+class IncumbentPruner(Pruner):
+    """Prunes a trial when the mean of its scores is more than margin below
+    the mean score of the best trial that ran all folds so far.
+
+    Parameters
+    ----------
+    min_folds : int, optional
+        Number of folds that always run, by default 2.
+    margin : float, optional
+        Tolerance in units of the score, by default 0.05.
+    """
+    def __init__(self, min_folds:int=2, margin:float=0.05):
+        super(IncumbentPruner, self).__init__(min_folds)
+        self.margin = margin
+
+    def _should_prune(self, fold_scores:List[float])->bool:
+        completed = [np.mean(scores) for scores, complete in self._history if complete]
+        if len(completed) == 0:
+            return False
+        return bool(np.mean(fold_scores) < max(completed) - self.margin)
+
+def trials_summary(trials)->Dict[str, Any]:
+    """Counts of the trials of a search, of those that got pruned or timed
+    out, and the fraction that got pruned. With a
+    `lale.search.trial_cache.TrialCache`, also the counts of trials whose
+    result was cached and of those that were evaluated."""
+    results = [trial['result'] for trial in trials.trials]
+    num_pruned = sum(1 for result in results if result.get('pruned', False))
+    return {'trials': len(results),
+            'pruned': num_pruned,
+            'timed_out': sum(1 for result in results if result.get('timed_out', False)),
+            'pruning_rate': num_pruned / len(results) if results else 0.0,
+            'cache_hits': sum(1 for result in results if result.get('cached', False)),
+            'cache_misses': sum(1 for result in results if result.get('cached', None) is False)}
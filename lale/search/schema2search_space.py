@@ -12,9 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import json
 import math
 import logging
 import numpy
+import os
+import pickle
 
 from typing import Any, Dict, List, Set, Iterable, Iterator, Optional, Tuple, Union
 from lale.schema_simplifier import findRelevantFields, narrowToGivenRelevantFields, simplify, filterForOptimizer
@@ -266,7 +270,64 @@ def schemaToSearchSpaceHelper(longName,
     else:
         return schemaToSearchSpaceHelper_(longName, longName, schema, relevantFields, pgo_freqs=pgo_freqs)
 
+# Compiled search spaces by a hash of what they were compiled from. The
+# cached schemas and search spaces are shared, so callers must not modify
+# them.
+_compiled:Dict[str, Tuple[Schema, Optional[SearchSpace]]] = {}
+_COMPILED_STORE_VERSION = 1
+
+def _compiled_key(longName:str, name:str, schema:Schema, pgo:Optional[PGO])->Optional[str]:
+    freqs = None if pgo is None else pgo.get(name, None)
+    if freqs is not None:
+        freqs = {field: sorted([str(value), count] for value, count in field_freqs.items())
+                 for field, field_freqs in freqs.items()}
+    try:
+        text = json.dumps([longName, name, schema, pgo is not None, freqs], sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def clear_compiled_search_spaces()->None:
+    _compiled.clear()
+
+def save_compiled_search_spaces(path:str)->None:
+    """Writes the search spaces compiled so far to path, so that
+    `load_compiled_search_spaces` can skip compiling them in another
+    process."""
+    with open(path, 'wb') as f:
+        pickle.dump((_COMPILED_STORE_VERSION, _compiled), f)
+
+def load_compiled_search_spaces(path:str)->int:
+    """Adds the search spaces stored at path by
+    `save_compiled_search_spaces` to the cache, and returns their number.
+    Does nothing if path does not exist or was written by another version
+    of this module."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb') as f:
+        version, compiled = pickle.load(f)
+    if version != _COMPILED_STORE_VERSION:
+        logger.warning(f'Ignoring compiled search spaces in {path} of version {version}.')
+        return 0
+    _compiled.update(compiled)
+    return len(compiled)
+
 def schemaToSimplifiedAndSearchSpace(
+    longName:str, 
+    name:str, 
+    schema:Schema,
+    pgo:Optional[PGO]=None)->Tuple[Schema, Optional[SearchSpace]]:
+    key = _compiled_key(longName, name, schema, pgo)
+    if key is not None and key in _compiled:
+        return _compiled[key]
+    result = _schemaToSimplifiedAndSearchSpace(longName, name, schema, pgo)
+    if key is not None:
+        if len(_compiled) >= 10000:
+            _compiled.clear()
+        _compiled[key] = result
+    return result
+
+def _schemaToSimplifiedAndSearchSpace(
     longName:str, 
     name:str, 
     schema:Schema,
@@ -125,4 +125,4 @@ class SearchSpaceObject(SearchSpace):
         super(SearchSpaceObject, self).__init__()
         self.longName = longName
         self.keys = keys
-        self.choices = choices
+        self.choices = list(choices)
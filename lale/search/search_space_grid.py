@@ -12,10 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from abc import ABC, abstractmethod
+import bisect
 import itertools
 import warnings
 import random
+import sys
 import math
 from collections import ChainMap
 
@@ -23,7 +26,7 @@ from lale.util.Visitor import Visitor
 from lale.search.search_space import SearchSpace, SearchSpaceObject, SearchSpaceEnum
 from lale.search.schema2search_space import schemaToSearchSpace
 from lale.search.PGO import PGO
-from lale.sklearn_compat import nest_all_HPparams
+from lale.sklearn_compat import nest_HPparams
 
 # To avoid import cycle, since we only realy on lale.operators for types
 from typing import TYPE_CHECKING
@@ -33,6 +36,159 @@ if TYPE_CHECKING:
 
 SearchSpaceGrid = Dict[str,SearchSpace]
 
+class SearchSpaceGrids(ABC):
+    """ The grids of an operator, enumerated lazily.
+    For pipelines and choices, their number is the product respectively the sum of
+    the numbers of grids of the steps, so it is counted and indexed without building them.
+    Grids are in the same order as the lists formerly built eagerly.
+    """
+    @abstractmethod
+    def count(self)->int:
+        pass
+
+    @abstractmethod
+    def __getitem__(self, index:int)->SearchSpaceGrid:
+        pass
+
+    @abstractmethod
+    def __iter__(self)->Iterator[SearchSpaceGrid]:
+        pass
+
+    def sample(self, k:int, rng:Optional[random.Random]=None)->List[SearchSpaceGrid]:
+        """ Returns k distinct grids drawn uniformly at random, only building those.
+        This makes the same draws from rng (by default, the random module) as
+        random.sample on the list of all grids.
+        """
+        return [self[i] for i in _sample_indices(self.count(), k, rng)]
+
+def _sample_indices(count:int, k:int, rng:Optional[random.Random]=None)->List[int]:
+    sampler:Any = random if rng is None else rng
+    if count <= sys.maxsize:
+        return sampler.sample(range(count), k)
+    # too many for a range to have a length
+    chosen:List[int] = []
+    seen = set()
+    while len(chosen) < k:
+        i = sampler.randrange(count)
+        if i not in seen:
+            seen.add(i)
+            chosen.append(i)
+    return chosen
+
+class _GridList(SearchSpaceGrids):
+    def __init__(self, grids:List[SearchSpaceGrid]):
+        self.grids = grids
+
+    def count(self)->int:
+        return len(self.grids)
+
+    def __getitem__(self, index:int)->SearchSpaceGrid:
+        return self.grids[index]
+
+    def __iter__(self)->Iterator[SearchSpaceGrid]:
+        return iter(self.grids)
+
+class _GridProduct(SearchSpaceGrids):
+    """ Grids of a pipeline: one per combination of a grid of each step,
+    with the parameters of each step nested under its name. """
+    def __init__(self, names:List[str], steps:List[SearchSpaceGrids]):
+        self.names = names
+        self.steps = steps
+        self._counts = [step.count() for step in steps]
+
+    def count(self)->int:
+        result = 1
+        for c in self._counts:
+            result *= c
+        return result
+
+    def _combine(self, gridline:List[SearchSpaceGrid])->SearchSpaceGrid:
+        nested = [nest_HPparams(name, grid) for name, grid in zip(self.names, gridline)]
+        return dict(ChainMap(*nested))
+
+    def __getitem__(self, index:int)->SearchSpaceGrid:
+        if not 0 <= index < self.count():
+            raise IndexError(index)
+        gridline:List[SearchSpaceGrid] = []
+        for step, c in zip(reversed(self.steps), reversed(self._counts)):
+            index, i = divmod(index, c)
+            gridline.append(step[i])
+        return self._combine(list(reversed(gridline)))
+
+    def _iter_from(self, k:int)->Iterator[List[SearchSpaceGrid]]:
+        if k == len(self.steps):
+            yield []
+        else:
+            for grid in self.steps[k]:
+                for rest in self._iter_from(k + 1):
+                    yield [grid] + rest
+
+    def __iter__(self)->Iterator[SearchSpaceGrid]:
+        if self.count() == 0:
+            return
+        for gridline in self._iter_from(0):
+            yield self._combine(gridline)
+
+class _GridChoice(SearchSpaceGrids):
+    """ Grids of an operator choice: the grids of each step, with the
+    name of the step as the discriminant. """
+    choice_name:str = "_lale_discriminant"
+
+    def __init__(self, names:List[str], steps:List[SearchSpaceGrids]):
+        self.names = names
+        self.steps = steps
+        self._ends = list(itertools.accumulate(step.count() for step in steps))
+
+    def count(self)->int:
+        return self._ends[-1] if self._ends else 0
+
+    def _discriminate(self, name:str, grid:SearchSpaceGrid)->SearchSpaceGrid:
+        return {**grid, self.choice_name:SearchSpaceEnum([name])}
+
+    def __getitem__(self, index:int)->SearchSpaceGrid:
+        if not 0 <= index < self.count():
+            raise IndexError(index)
+        k = bisect.bisect_right(self._ends, index)
+        start = self._ends[k - 1] if k > 0 else 0
+        return self._discriminate(self.names[k], self.steps[k][index - start])
+
+    def __iter__(self)->Iterator[SearchSpaceGrid]:
+        for name, step in zip(self.names, self.steps):
+            for grid in step:
+                yield self._discriminate(name, grid)
+
+def search_space_grids(op:'PlannedOperator', pgo:Optional[PGO]=None)->SearchSpaceGrids:
+    """ Top level function: given a lale operator, returns its hp grids without building them.
+    Use count() for their number, iterate over them, or sample(k) some of them.
+    """
+    return SearchSpaceGridVisitor.run(op, pgo=pgo)
+
+def iter_search_space_grids(op:'PlannedOperator',
+                            num_grids:Optional[float]=None,
+                            pgo:Optional[PGO]=None)->Iterator[SearchSpaceGrid]:
+    """ Like get_search_space_grids, but yields the grids one at a time,
+    and only builds the ones that are sampled.
+    """
+    all_parameters = search_space_grids(op, pgo=pgo)
+    if num_grids is None:
+        yield from all_parameters
+        return
+    if num_grids <= 0:
+        warnings.warn(f"get_search_space_grids(num_grids={num_grids}) called with a non-positive value for lale_num_grids")
+        return
+    count = all_parameters.count()
+    if num_grids >= 1:
+        samples = math.ceil(num_grids)
+        if samples >= count:
+            yield from all_parameters
+            return
+        warnings.warn(f"get_search_space_grids(num_grids={num_grids}) sampling {samples}/{count}")
+    else:
+        samples = round(count*num_grids)
+        warnings.warn(f"get_search_space_grids(num_grids={num_grids}) sampling {samples}/{count}")
+    for i in _sample_indices(count, samples):
+        yield all_parameters[i]
+
 def get_search_space_grids( op:'PlannedOperator', 
                             num_grids:Optional[float]=None, 
                             pgo:Optional[PGO]=None)->List[SearchSpaceGrid]:
@@ -45,24 +201,7 @@ def get_search_space_grids( op:'PlannedOperator',
         if set to an float between 0 and 1, it will determine what fraction should be returned
         note that setting it to 1 is treated as in integer.  To return all results, use None
     """
-    all_parameters = SearchSpaceGridVisitor.run(op, pgo=pgo)
-    if num_grids is None:
-        return all_parameters
-    else:
-        if num_grids <= 0:
-            warnings.warn(f"get_search_space_grids(num_grids={num_grids}) called with a non-positive value for lale_num_grids")
-            return []
-        if num_grids >= 1:
-            samples = math.ceil(num_grids)
-            if samples >= len(all_parameters):
-                return all_parameters
-            else:
-                warnings.warn(f"get_search_space_grids(num_grids={num_grids}) sampling {math.ceil(num_grids)}/{len(all_parameters)}")
-                return random.sample(all_parameters, math.ceil(num_grids))
-        else:
-            samples = round(len(all_parameters)*num_grids)
-            warnings.warn(f"get_search_space_grids(num_grids={num_grids}) sampling {samples}/{len(all_parameters)}")
-            return random.sample(all_parameters, samples)
+    return list(iter_search_space_grids(op, num_grids=num_grids, pgo=pgo))
 
 
 def SearchSpaceObjectChoiceToGrid(keys:List[str], values:Tuple)->SearchSpaceGrid:
@@ -111,7 +250,7 @@ class SearchSpaceGridVisitor(Visitor):
                 ret[k] = SearchSpaceEnum([v])
         return ret
 
-    def visitPlannedIndividualOp(self, op:'PlannedIndividualOp')->List[SearchSpaceGrid]:
+    def visitPlannedIndividualOp(self, op:'PlannedIndividualOp')->SearchSpaceGrids:
         schema = op.hyperparam_schema_with_hyperparams()
         module = op._impl.__module__
         if module is None or module == str.__class__.__module__:
@@ -125,41 +264,27 @@ class SearchSpaceGridVisitor(Visitor):
             if hyperparams and not grids:
                 grids = [{}]
             augmented_grids = [self.augment_grid(g, hyperparams) for g in grids]
-            return augmented_grids
+            return _GridList(augmented_grids)
         else:
-            return grids
+            return _GridList(grids)
 
     visitTrainableIndividualOp = visitPlannedIndividualOp
     visitTrainedIndividualOp = visitPlannedIndividualOp
     
-    def visitPlannedPipeline(self, op:'PlannedPipeline')->List[SearchSpaceGrid]:
-
-        param_grids:List[List[SearchSpaceGrid]] = [
-            nest_all_HPparams(s.name(), s.accept(self)) for s in op.steps()]
-
-        param_grids_product:Iterable[Iterable[SearchSpaceGrid]] = itertools.product(*param_grids)
-        chained_grids:List[SearchSpaceGrid] = [
-            dict(ChainMap(*gridline)) for gridline in param_grids_product]
-
-        return chained_grids
+    def visitPlannedPipeline(self, op:'PlannedPipeline')->SearchSpaceGrids:
+        steps = op.steps()
+        return _GridProduct([s.name() for s in steps], [s.accept(self) for s in steps])
     
     visitTrainablePipeline = visitPlannedPipeline
     visitTrainedPipeline = visitPlannedPipeline
 
-    def visitOperatorChoice(self, op:'OperatorChoice')->List[SearchSpaceGrid]:
-
-        choice_name:str = "_lale_discriminant"
-        ret:List[SearchSpaceGrid] = []
-        for s in op.steps():
-            # if not isinstance(s, PlannedOperator):
-            #     raise ValueError("This method should really be defined on PlannedOperatorChoice")
-            # else:
-            grids:List[SearchSpaceGrid] = s.accept(self)
+    def visitOperatorChoice(self, op:'OperatorChoice')->SearchSpaceGrids:
+        steps = op.steps()
+        grids:List[SearchSpaceGrids] = []
+        for s in steps:
+            step_grids:SearchSpaceGrids = s.accept(self)
             # If there are no parameters, we still need to add a choice for the discriminant
-            if not grids:
-                grids = [{}]
-            op_name:str = s.name()
-            discriminated_grids:List[SearchSpaceGrid]=[{**d, choice_name:SearchSpaceEnum([op_name])} for d in grids]
-            ret.extend(discriminated_grids)
-        return ret
-
+            if step_grids.count() == 0:
+                step_grids = _GridList([{}])
+            grids.append(step_grids)
+        return _GridChoice([s.name() for s in steps], grids)
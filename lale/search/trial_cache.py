@@ -0,0 +1,78 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional
+
+from lale.search.parallel_fmin import _as_result
+
+class TrialCache():
+    """Results of the configurations evaluated so far in a search, so that
+    a configuration suggested again is not evaluated again.
+
+    Different params can denote the same configuration, for instance when
+    they only differ in hyperparameters that a choice made inactive. So
+    the key of params is a hash of a canonical description of the
+    configuration, such as the `to_json` of the operator instantiated from
+    them.
+
+    Parameters
+    ----------
+    describe : callable
+        Maps the arguments of the objective, usually params and maybe a
+        budget, to a JSON-serializable description of the configuration.
+    trials : hyperopt.Trials, optional
+        Trials of an earlier search, whose results with a 'config_key'
+        seed the cache.
+    """
+    def __init__(self, describe:Callable[..., Any], trials=None):
+        self.describe = describe
+        self.hits = 0
+        self.misses = 0
+        self._results:Dict[str, Dict[str, Any]] = {}
+        if trials is not None:
+            for trial in trials.trials:
+                key = trial['result'].get('config_key', None)
+                if key is not None:
+                    self._results[key] = trial['result']
+
+    def key(self, *args)->str:
+        description = json.dumps(self.describe(*args), sort_keys=True, default=str)
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def lookup(self, key:str)->Optional[Dict[str, Any]]:
+        """A copy of the result for key marked with 'cached': True, or None
+        if key was not evaluated yet."""
+        if key not in self._results:
+            return None
+        self.hits += 1
+        return {**self._results[key], 'cached': True}
+
+    def store(self, key:str, result)->Dict[str, Any]:
+        """Remembers the result of evaluating the configuration with key,
+        and returns it with its 'config_key'."""
+        self.misses += 1
+        self._results[key] = {**_as_result(result), 'config_key': key, 'cached': False}
+        return self._results[key]
+
+    def wrap(self, fn):
+        """Objective that looks up its arguments before calling fn."""
+        def cached_fn(*args):
+            key = self.key(*args)
+            result = self.lookup(key)
+            if result is None:
+                result = self.store(key, fn(*args))
+            return result
+        return cached_fn
@@ -0,0 +1,107 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from typing import Any, Dict, Optional
+
+_VALIDATION_MODES = ['off', 'entry', 'sampled', 'full']
+
+_validation:Dict[str, Any] = {'mode': 'sampled', 'sample_rows': 10, 'seed': None}
+
+_local = threading.local()
+
+class _ValidationSetting():
+    def __init__(self, previous:Dict[str, Any]):
+        self._previous = previous
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _validation.update(self._previous)
+
+def validation(mode:str='sampled', sample_rows:int=10, seed:Optional[int]=None)->_ValidationSetting:
+    """Choose how much schema validation operators do on their
+    hyperparameters, inputs, and outputs.
+
+    The setting applies to the whole process right away. When used in a
+    with-statement, the previous setting is restored at the end of the
+    block.
+
+    Parameters
+    ----------
+    mode : 'off', 'entry', 'sampled', or 'full', optional
+        - 'off' skips all validation.
+        - 'entry' validates the hyperparameters, and the inputs of the
+          operator that gets called directly or of the first steps of a
+          pipeline. The other steps trust that their inputs match, since
+          they come from predecessors that were validated, and outputs
+          are not validated.
+        - 'sampled', the default, validates everything on sample_rows
+          rows of each array or dataframe.
+        - 'full' validates everything on all rows.
+    sample_rows : int, optional
+        Number of rows validated in 'entry' and 'sampled' mode, by
+        default 10.
+    seed : int, optional
+        If set, the rows are drawn at random with this seed, otherwise
+        they are the first sample_rows rows.
+
+    Examples
+    --------
+    >>> with lale.settings.validation(mode='entry'):
+    ...     predictions = trained.predict(X)
+    """
+    if mode not in _VALIDATION_MODES:
+        raise ValueError(f'Unknown validation mode {mode}, expected one of {_VALIDATION_MODES}.')
+    if sample_rows < 1:
+        raise ValueError(f'Invalid sample_rows {sample_rows}, expected a positive number.')
+    previous = dict(_validation)
+    _validation.update({'mode': mode, 'sample_rows': sample_rows, 'seed': seed})
+    return _ValidationSetting(previous)
+
+def get_validation()->Dict[str, Any]:
+    """The current validation setting, see `validation`."""
+    return dict(_validation)
+
+class _TrustInputs():
+    def __init__(self, trusted:bool):
+        self._trusted = trusted
+
+    def __enter__(self):
+        self._previous = getattr(_local, 'trusted', False)
+        _local.trusted = self._previous or self._trusted
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.trusted = self._previous
+
+def _trust_inputs(trusted:bool)->_TrustInputs:
+    """Within this block, in 'entry' mode, operators of the current thread
+    skip validating their inputs, because they are downstream steps of a
+    pipeline whose first steps already did."""
+    return _TrustInputs(trusted)
+
+def _should_validate(kind:str)->bool:
+    """Whether to validate the 'hyperparams', 'input', or 'output' of an
+    operator with the current setting."""
+    mode = _validation['mode']
+    if mode == 'off':
+        return False
+    if mode == 'entry':
+        if kind == 'hyperparams':
+            return True
+        if kind == 'input':
+            return not getattr(_local, 'trusted', False)
+        return False
+    return True
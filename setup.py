@@ -29,6 +29,7 @@ setup(
     url="https://github.com/IBM/lale",
     python_requires='>=3.6',
     packages=find_packages(),
+    package_data={'lale': ['json_schema_draft04.json']},
     license='',
     install_requires=[
         'astunparse',
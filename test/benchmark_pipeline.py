@@ -0,0 +1,48 @@
+# Copyright 2019 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the per-call overhead of TrainedPipeline.predict on a single
+row, with dispatch resolved on every call versus the cached execution plan,
+and how much of that is the dispatch itself rather than running the steps
+and validating their schemas.
+
+Run with `python -m test.benchmark_pipeline` from the repository root.
+"""
+
+import timeit
+from sklearn.datasets import load_iris
+from lale.lib.lale import ConcatFeatures
+from lale.lib.lale import NoOp
+from lale.lib.sklearn import LogisticRegression
+from lale.lib.sklearn import PCA
+from lale.lib.sklearn import StandardScaler
+
+def main(number=200):
+    X, y = load_iris(return_X_y=True)
+    pipeline = StandardScaler() >> (PCA(n_components=2) & NoOp()) >> ConcatFeatures() >> LogisticRegression()
+    trained = pipeline.fit(X, y).compile()
+    row = X[:1]
+    def predict_uncompiled():
+        #drop the cached plan, so that dispatch gets resolved again
+        trained._plans = None
+        return trained.predict(row)
+    uncompiled = timeit.timeit(predict_uncompiled, number=number)
+    compiled = timeit.timeit(lambda: trained.predict(row), number=number)
+    dispatch = timeit.timeit(trained.compile, number=number)
+    print(f'resolving dispatch per call: {1000 * uncompiled / number:.3f} ms per call')
+    print(f'compiled plan: {1000 * compiled / number:.3f} ms per call')
+    print(f'of which dispatch: {1000 * dispatch / number:.3f} ms per call')
+
+if __name__ == '__main__':
+    main()
@@ -112,6 +112,54 @@ class TestCrossValidation(unittest.TestCase):
                 cv = KFold(2), scoring=make_scorer(accuracy_score))
         self.assertEqual(len(cv_results), 2)
 
+    def test_cv_track_trials_parallel(self):
+        trainable_lr = LogisticRegression(n_jobs=1)
+        iris = sklearn.datasets.load_iris()
+        from lale.helpers import cross_val_score_track_trials
+        serial = cross_val_score_track_trials(trainable_lr, iris.data, iris.target, cv=3, return_folds=True)
+        for backend in ['threading', 'loky']:
+            parallel = cross_val_score_track_trials(trainable_lr, iris.data, iris.target, cv=3, n_jobs=3, backend=backend, return_folds=True)
+            self.assertEqual(serial[0], parallel[0])
+            self.assertEqual([f['score'] for f in serial[3]], [f['score'] for f in parallel[3]])
+            if backend == 'threading':
+                self.assertTrue(all(f['peak_rss'] is None for f in parallel[3]))
+            else:
+                self.assertTrue(all(f['peak_rss'] > 0 for f in parallel[3]))
+        folds = serial[3]
+        #the calling process does not get its peak memory reset
+        self.assertTrue(all(f['peak_rss'] is None for f in folds))
+        self.assertEqual(len(folds), 3)
+        for fold in folds:
+            self.assertGreater(fold['fit_time'], 0)
+            self.assertGreaterEqual(fold['predict_time'], 0)
+            self.assertIsNotNone(fold['log_loss'])
+        mean_time = sum(f['fit_time'] + f['predict_time'] for f in folds) / 3
+        self.assertAlmostEqual(serial[2], mean_time)
+
+    def test_cv_parallel(self):
+        iris = sklearn.datasets.load_iris()
+        from lale.helpers import cross_val_score
+        trainable_lr = LogisticRegression(n_jobs=1)
+        serial = cross_val_score(trainable_lr, iris.data, iris.target, cv=3)
+        for backend in ['threading', 'loky']:
+            parallel = cross_val_score(trainable_lr, iris.data, iris.target, cv=3, n_jobs=3, backend=backend)
+            self.assertEqual(serial, parallel)
+
+    def test_cv_track_trials_pruning(self):
+        from lale.helpers import cross_val_score_track_trials
+        from lale.search.pruning import IncumbentPruner, TrialPruned
+        from lale.lib.sklearn import GaussianNB
+        iris = sklearn.datasets.load_iris()
+        X, y = sklearn.utils.shuffle(iris.data, iris.target, random_state=42)
+        pruner = IncumbentPruner(min_folds=2, margin=0.05)
+        cross_val_score_track_trials(LogisticRegression(), X, y, cv=5, pruner=pruner)
+        poor = LogisticRegression(C=0.0001, solver='lbfgs', multi_class='multinomial')
+        with self.assertRaises(TrialPruned) as cm:
+            cross_val_score_track_trials(poor, X, y, cv=5, pruner=pruner)
+        self.assertEqual(2, len(cm.exception.folds))
+        cross_val_score_track_trials(GaussianNB(), X, y, cv=5, pruner=pruner)
+        self.assertEqual([5, 2, 5], [len(scores) for scores, _ in pruner._history])
+
 
 
 class TestGetAvailableOps(unittest.TestCase):
@@ -278,6 +326,21 @@ class TestLogisticRegression(unittest.TestCase):
             iris = load_iris()
             clf.fit(iris.data, iris.target)
 
+    def test_with_halving_gridsearchcv(self):
+        from sklearn.datasets import load_iris
+        from sklearn.metrics import accuracy_score, make_scorer
+        trainable = PCA() >> LogisticRegression()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            clf = LaleGridSearchCV(trainable, lale_num_samples=1, lale_num_grids=1,
+                                   lale_halving_eta=3, lale_min_budget=0.4, cv=3,
+                                   scoring=make_scorer(accuracy_score), random_state=42)
+            iris = load_iris()
+            clf.fit(iris.data, iris.target)
+        self.assertEqual(len(clf.predict(iris.data)), len(iris.target))
+        self.assertIn(1.0, clf.budgets_)
+        self.assertLess(clf.budgets_.count(1.0), len(clf.budgets_))
+
     def test_with_randomizedsearchcv(self):
         from sklearn.model_selection import RandomizedSearchCV
         from sklearn.datasets import load_iris
@@ -528,6 +591,74 @@ class TestPCA(unittest.TestCase):
         search_space2 = hyperopt_search_space(pca2)
         self.assertNotEqual(search_space1, search_space2)
 
+class TestSearchSpaceCache(unittest.TestCase):
+    def test_compiled_once(self):
+        from unittest.mock import patch
+        from lale.search import schema2search_space as s2s
+        schema = PCA.hyperparam_schema_with_hyperparams()
+        s2s.clear_compiled_search_spaces()
+        with patch.object(s2s, 'simplify', wraps=s2s.simplify) as simplify:
+            first = s2s.schemaToSearchSpace('PCA', 'PCA', schema)
+            second = s2s.schemaToSearchSpace('PCA', 'PCA', schema)
+            self.assertIs(first, second)
+            self.assertEqual(1, simplify.call_count)
+            pgo = {'PCA': {'whiten': {'true': 1, 'false': 3}}}
+            third = s2s.schemaToSearchSpace('PCA', 'PCA', schema, pgo=pgo)
+            self.assertIsNot(first, third)
+            self.assertEqual(2, simplify.call_count)
+
+    def test_store(self):
+        import os
+        import tempfile
+        from unittest.mock import patch
+        from lale.search import schema2search_space as s2s
+        schema = PCA.hyperparam_schema_with_hyperparams()
+        s2s.clear_compiled_search_spaces()
+        s2s.schemaToSearchSpace('PCA', 'PCA', schema)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'search_spaces.pkl')
+            s2s.save_compiled_search_spaces(path)
+            s2s.clear_compiled_search_spaces()
+            self.assertEqual(1, s2s.load_compiled_search_spaces(path))
+        with patch.object(s2s, 'simplify', wraps=s2s.simplify) as simplify:
+            s2s.schemaToSearchSpace('PCA', 'PCA', schema)
+            self.assertEqual(0, simplify.call_count)
+
+class TestSearchSpaceGrids(unittest.TestCase):
+    def test_lazy_grids(self):
+        import random
+        from lale.lib.sklearn import Nystroem, MinMaxScaler, Normalizer, KNeighborsClassifier
+        from lale.search.HP import search_space_to_str_for_comparison
+        from lale.search.search_space_grid import search_space_grids
+        def canonical(grid):
+            return {k: search_space_to_str_for_comparison(v, k) for k, v in grid.items()}
+        op = (PCA | Nystroem | MinMaxScaler) >> (Normalizer | MinMaxScaler) >> KNeighborsClassifier
+        grids = search_space_grids(op)
+        all_grids = [canonical(g) for g in grids]
+        self.assertEqual(len(all_grids), grids.count())
+        for i in range(grids.count()):
+            self.assertEqual(all_grids[i], canonical(grids[i]))
+        sampled = [canonical(g) for g in grids.sample(5, random.Random(42))]
+        self.assertEqual(random.Random(42).sample(all_grids, 5), sampled)
+        from lale.search.search_space_grid import SearchSpaceGrids
+        with self.assertRaises(TypeError):
+            SearchSpaceGrids()
+
+    def test_count_without_building(self):
+        import random
+        from lale.lib.sklearn import Nystroem, MinMaxScaler
+        from lale.search.search_space_grid import search_space_grids
+        one = search_space_grids(PCA | Nystroem | MinMaxScaler).count()
+        op = PCA | Nystroem | MinMaxScaler
+        for _ in range(15):
+            op = op >> (PCA | Nystroem | MinMaxScaler)
+        grids = search_space_grids(op)
+        self.assertEqual(one ** 16, grids.count())
+        samples = grids.sample(3, random.Random(42))
+        self.assertEqual(3, len(samples))
+        for grid in samples:
+            self.assertTrue(any(k.endswith('_lale_discriminant') for k in grid))
+
 class TestToJson(unittest.TestCase):
     def test_with_operator_choice(self):
         from lale.operators import make_union, make_choice, make_pipeline
@@ -809,6 +940,202 @@ class TestHyperoptClassifier(unittest.TestCase):
         print(accuracy_score(y, predictions))
         warnings.resetwarnings()
 
+    def test_with_memory(self):
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        from lale.fit_cache import FitCache
+        X, y = load_iris(return_X_y=True)
+        cache = FitCache()
+        pipeline = NoOp() >> LogisticRegression()
+        clf = HyperoptClassifier(model = pipeline, max_evals=2, cv=3, memory=cache)
+        trained = clf.fit(X, y)
+        #the second trial reuses the NoOp steps trained on the same folds
+        self.assertGreaterEqual(cache.hits, 3)
+        self.assertEqual(len(trained.predict(X)), len(y))
+
+    def test_parallel_trials(self):
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        X, y = load_iris(return_X_y=True)
+        def run():
+            clf = HyperoptClassifier(model=LogisticRegression, max_evals=5, cv=3, n_jobs=2)
+            trained = clf.fit(X, y)
+            self.assertEqual(len(trained.predict(X)), len(y))
+            return clf.get_trials()
+        trials1, trials2 = run(), run()
+        self.assertEqual(5, len(trials1.trials))
+        self.assertEqual([t['misc']['vals'] for t in trials1.trials],
+                         [t['misc']['vals'] for t in trials2.trials])
+
+    def test_successive_halving(self):
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        X, y = load_iris(return_X_y=True)
+        clf = HyperoptClassifier(model=PCA >> LogisticRegression, max_evals=9, cv=3,
+                                 halving='successive_halving', min_budget=0.4)
+        trained = clf.fit(X, y)
+        self.assertEqual(len(trained.predict(X)), len(y))
+        budgets = [t['result']['budget'] for t in clf.get_trials().trials]
+        self.assertEqual(9, len(budgets))
+        self.assertEqual(3, budgets.count(1.0))
+        with self.assertLogs('lale.lib.lale.hyperopt_classifier', level='WARNING'):
+            HyperoptClassifier(model=LogisticRegression, halving='successive_halving', n_jobs=2)
+
+    def test_hyperband_iterations(self):
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        from lale.lib.sklearn import RandomForestClassifier
+        from lale.search.multi_fidelity import brackets, with_budget_iterations
+        self.assertEqual([(9, 1/9), (5, 1/3), (3, 1.0), (3, 1/9)], brackets(20, 1/9, 3, True))
+        reduced = with_budget_iterations(PCA() >> RandomForestClassifier(n_estimators=50), 0.2)
+        self.assertEqual(10, reduced.steps()[1]._hyperparams['n_estimators'])
+        X, y = load_iris(return_X_y=True)
+        clf = HyperoptClassifier(model=RandomForestClassifier, max_evals=6, cv=3,
+                                 halving='hyperband', min_budget=0.25, eta=2)
+        trained = clf.fit(X, y)
+        self.assertEqual(len(trained.predict(X)), len(y))
+        self.assertEqual(6, len(clf.get_trials().trials))
+
+    def test_pruning(self):
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        from lale.search.pruning import MedianPruner
+        X, y = load_iris(return_X_y=True)
+        clf = HyperoptClassifier(model=LogisticRegression, max_evals=12, cv=4,
+                                 pruner=MedianPruner(min_folds=1, min_trials=3))
+        with self.assertLogs('lale.lib.lale.hyperopt_classifier', level='INFO') as logs:
+            trained = clf.fit(X, y)
+        self.assertEqual(len(trained.predict(X)), len(y))
+        summary = clf.get_trials_summary()
+        self.assertEqual(12, summary['trials'])
+        self.assertGreater(summary['pruned'], 0)
+        self.assertEqual(summary['pruned'] / 12, summary['pruning_rate'])
+        from hyperopt.base import spec_from_misc
+        from lale.search.multi_fidelity import argmin_at_full_budget
+        best = min((t for t in clf.get_trials().trials if not t['result']['pruned']),
+                   key=lambda t: t['result']['loss'])
+        self.assertEqual(spec_from_misc(best['misc']), argmin_at_full_budget(clf.get_trials()))
+        #the logged accuracy is that of the chosen trial, not of a pruned one
+        self.assertIn('best accuracy: {:.1%}'.format(-best['result']['loss']), '\n'.join(logs.output))
+
+    def test_max_eval_time(self):
+        import time
+        import numpy as np
+        import hyperopt
+        from hyperopt import hp
+        from lale.search.parallel_fmin import fmin_parallel, with_time_limits
+        def f(params):
+            if params['x'] > 0.5:
+                time.sleep(60)
+            return params['x']
+        objective = with_time_limits(f, max_eval_time=1, deadline=None)
+        trials = hyperopt.Trials()
+        start = time.time()
+        fmin_parallel(objective, {'x': hp.uniform('x', 0, 1)}, hyperopt.rand.suggest,
+                      6, trials, np.random.RandomState(42), n_jobs=2)
+        self.assertLess(time.time() - start, 30)
+        results = [t['result'] for t in trials.trials]
+        self.assertEqual(6, len(results))
+        for result in results:
+            if result.get('timed_out', False):
+                self.assertEqual(hyperopt.STATUS_FAIL, result['status'])
+            else:
+                self.assertEqual(hyperopt.STATUS_OK, result['status'])
+        self.assertGreater(sum(1 for r in results if r.get('timed_out', False)), 0)
+
+    def test_parallel_workers_see_previous_rounds(self):
+        import numpy as np
+        import hyperopt
+        from hyperopt import hp
+        from lale.search.parallel_fmin import fmin_parallel
+        from lale.search.pruning import Pruner
+        pruner = Pruner()
+        def f(params):
+            seen = len(pruner._history)
+            pruner.report([params['x']], True)
+            return {'loss': params['x'], 'status': hyperopt.STATUS_OK, 'seen': seen}
+        trials = hyperopt.Trials()
+        fmin_parallel(f, {'x': hp.uniform('x', 0, 1)}, hyperopt.rand.suggest,
+                      12, trials, np.random.RandomState(42), n_jobs=3, shared=[pruner])
+        #every worker sees the reports of all previous rounds, and only those
+        self.assertEqual([0, 0, 0, 3, 3, 3, 6, 6, 6, 9, 9, 9],
+                         [t['result']['seen'] for t in trials.trials])
+        self.assertEqual(12, len(pruner._history))
+
+    def test_max_opt_time(self):
+        import time
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        X, y = load_iris(return_X_y=True)
+        clf = HyperoptClassifier(model=LogisticRegression, max_evals=1000, cv=3, max_opt_time=5)
+        start = time.time()
+        trained = clf.fit(X, y)
+        self.assertLess(time.time() - start, 60)
+        self.assertEqual(len(trained.predict(X)), len(y))
+        summary = clf.get_trials_summary()
+        self.assertLess(summary['trials'], 1000)
+        self.assertLessEqual(summary['timed_out'], 1)
+
+    def test_time_limits_keep_side_effects(self):
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        from lale.fit_cache import FitCache
+        from lale.search.pruning import Pruner
+        X, y = load_iris(return_X_y=True)
+        for n_jobs in [None, 2]:
+            cache, pruner = FitCache(), Pruner()
+            pipeline = NoOp() >> LogisticRegression()
+            clf = HyperoptClassifier(model=pipeline, max_evals=2, cv=3, memory=cache, pruner=pruner,
+                                     max_eval_time=60, n_jobs=n_jobs, deduplicate=False)
+            clf.fit(X, y)
+            #the trials ran in child processes, which sent back their reports and cache entries
+            self.assertEqual(2, len(pruner._history))
+            self.assertGreater(cache.misses, 0)
+            self.assertGreater(len(cache._entries), 0)
+
+    def test_checkpoint_and_resume(self):
+        import os
+        import tempfile
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        X, y = load_iris(return_X_y=True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'trials.jsonl')
+            HyperoptClassifier(model=LogisticRegression, max_evals=3, cv=3, checkpoint=path).fit(X, y)
+            with open(path) as f:
+                self.assertEqual(3, len(f.readlines()))
+            with open(path, 'a') as f:
+                f.write('{"tid": 3, "sta') # killed while writing
+            clf = HyperoptClassifier(model=LogisticRegression, max_evals=5, cv=3, resume=path)
+            self.assertEqual(3, len(clf.get_trials().trials))
+            trained = clf.fit(X, y)
+            self.assertEqual(len(trained.predict(X)), len(y))
+            with open(path) as f:
+                self.assertEqual(6, len(f.readlines()))
+            resumed = [t['misc']['vals'] for t in clf.get_trials().trials]
+            uninterrupted = HyperoptClassifier(model=LogisticRegression, max_evals=5, cv=3)
+            uninterrupted.fit(X, y)
+            self.assertEqual(resumed, [t['misc']['vals'] for t in uninterrupted.get_trials().trials])
+
+    def test_deduplicate(self):
+        from sklearn.datasets import load_iris
+        from lale.lib.lale import HyperoptClassifier
+        from lale.lib.sklearn import GaussianNB
+        X, y = load_iris(return_X_y=True)
+        for n_jobs in [None, 2]:
+            clf = HyperoptClassifier(model=GaussianNB, max_evals=4, cv=3, n_jobs=n_jobs)
+            trained = clf.fit(X, y)
+            self.assertEqual(len(trained.predict(X)), len(y))
+            summary = clf.get_trials_summary()
+            self.assertEqual(1, summary['cache_misses'])
+            self.assertEqual(3, summary['cache_hits'])
+            losses = [t['result']['loss'] for t in clf.get_trials().trials]
+            self.assertEqual(1, len(set(losses)))
+        clf = HyperoptClassifier(model=GaussianNB, max_evals=4, cv=3, deduplicate=False)
+        clf.fit(X, y)
+        summary = clf.get_trials_summary()
+        self.assertEqual(0, summary['cache_hits'] + summary['cache_misses'])
+
     def test_preprocessing_union(self):
         from lale.datasets import openml
         (train_X, train_y), (test_X, test_y) = openml.fetch(
@@ -1444,6 +1771,198 @@ class TestDatasetSchemas(unittest.TestCase):
         with self.assertRaises(SubschemaError):
             TfidfVectorizer.validate(self._drugRev['X'],self._drugRev['y'])
 
+class TestProject(unittest.TestCase):
+    def test_view_of_ndarray(self):
+        import numpy as np
+        from lale.datasets.data_schemas import to_schema
+        from lale.lib.lale import Project
+        X = np.arange(20.0).reshape(4, 5)
+        trained = Project(columns=[1, 2, 3]).fit(X)
+        transformed = trained.transform(X)
+        self.assertTrue(np.shares_memory(transformed, X))
+        np.testing.assert_array_equal(transformed, X[:, 1:4])
+        transformed_schema = to_schema(transformed)
+        self.assertEqual(transformed_schema['minItems'], 4)
+        self.assertEqual(transformed_schema['items']['maxItems'], 3)
+
+    def test_keep_numbers_dataframe(self):
+        import pandas as pd
+        from lale.datasets.data_schemas import to_schema
+        from lale.lib.lale import KeepNumbers, KeepNonNumbers
+        X = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z'], 'c': [0.5, 1.5, 2.5]})
+        trained = KeepNumbers().fit(X)
+        self.assertEqual(list(trained.transform(X).columns), ['a', 'c'])
+        transformed = trained.transform(X.iloc[:2])
+        self.assertEqual(to_schema(transformed)['minItems'], 2)
+        self.assertEqual(
+            [s['description'] for s in to_schema(transformed)['items']['items']],
+            ['a', 'c'])
+        transformed = KeepNonNumbers().fit(X).transform(X)
+        self.assertEqual(list(transformed.columns), ['b'])
+
+    def test_schema_follows_input(self):
+        import numpy as np
+        from lale.datasets.data_schemas import to_schema
+        from lale.lib.lale import Project
+        trained = Project(columns=[0, 1]).fit(np.zeros((3, 3)))
+        self.assertEqual({'type': 'number'}, to_schema(trained.transform(np.zeros((3, 3))))['items']['items'])
+        transformed = trained.transform(np.array([['a', 'b', 'c']], dtype=object))
+        self.assertEqual({'type': 'string'}, to_schema(transformed)['items']['items'])
+        self.assertEqual(1, to_schema(transformed)['minItems'])
+
+    def test_wrong_number_of_columns(self):
+        import numpy as np
+        from lale.lib.lale import Project
+        trained = Project(columns=[0]).fit(np.zeros((3, 2)))
+        with self.assertRaises(ValueError):
+            trained.transform(np.zeros((3, 4)))
+
+class TestValidateSchema(unittest.TestCase):
+    def test_native_implies_json(self):
+        import numpy as np
+        import pandas as pd
+        import scipy.sparse
+        from lale.helpers import _native_is_valid, data_to_json
+        num_matrix = {'type': 'array', 'items': {'type': 'array', 'items': {'type': 'number'}}}
+        labels = {'type': 'array', 'items': {'type': 'integer', 'minimum': 0}}
+        strings = {'type': 'array', 'items': {'enum': ['a', 'b']}}
+        either = {'anyOf': [num_matrix, {'type': 'array', 'items': {'type': 'array', 'items': {'type': 'string'}}}]}
+        bounded = {'type': 'array', 'minItems': 1, 'maxItems': 3, 'items': {'type': 'number', 'minimum': 0.0, 'maximum': 1.0, 'exclusiveMaximum': True}}
+        X = np.random.rand(20, 3)
+        cases = [
+            (X, num_matrix, True),
+            (X.astype(np.float32), num_matrix, True),
+            (scipy.sparse.csr_matrix(X), num_matrix, True),
+            (pd.DataFrame(X), num_matrix, True),
+            (np.arange(20), labels, True),
+            (np.arange(20) - 1, labels, False),
+            (np.arange(20) * 1.0, labels, False),
+            (np.array(['a', 'b', 'a']), strings, True),
+            (np.array(['a', 'c']), strings, False),
+            (np.array([['x', 'y']]), either, True),
+            (X, either, True),
+            (np.random.rand(5), bounded, False),
+            (np.array([0.0, 0.5]), bounded, True),
+            (np.array([0.0, 1.0]), bounded, False),
+            (np.array([True, False]), labels, False),
+            ({'X': X, 'y': np.arange(20)}, {'type': 'object', 'required': ['X', 'y'], 'additionalProperties': False,
+                                           'properties': {'X': num_matrix, 'y': labels}}, True),
+            ({'X': X}, {'type': 'object', 'required': ['X', 'y'], 'properties': {'X': num_matrix}}, False),
+            ({'X': [X, X]}, {'type': 'object', 'properties': {'X': {'type': 'array', 'items': num_matrix}}}, True),
+        ]
+        for value, schema, expected in cases:
+            self.assertEqual(expected, _native_is_valid(value, schema, True), (value, schema))
+            if expected:
+                jsonschema.validate(data_to_json(value), schema)
+
+    def test_invalid_falls_back(self):
+        import numpy as np
+        from lale.helpers import validate_schema
+        labels = {'type': 'array', 'items': {'type': 'integer', 'minimum': 0}}
+        with self.assertRaises(jsonschema.ValidationError):
+            validate_schema(np.arange(20) - 1, labels)
+        validate_schema(np.array([0, 1, 0]).astype(np.int64), labels)
+
+    def test_large_sparse(self):
+        import numpy as np
+        import scipy.sparse
+        from lale.helpers import validate_schema
+        num_matrix = {'type': 'array', 'items': {'type': 'array', 'items': {'type': 'number'}}}
+        rows, cols = np.array([0, 5, 999999]), np.array([0, 7, 99999])
+        X = scipy.sparse.csr_matrix((np.ones(3), (rows, cols)), shape=(1000000, 100000))
+        validate_schema(X, num_matrix)
+        with self.assertRaises(jsonschema.ValidationError):
+            validate_schema(X, {'type': 'array', 'items': {'type': 'array', 'items': {'type': 'string'}}})
+
+    def test_meta_schema_offline(self):
+        import urllib.request
+        from unittest.mock import patch
+        import lale.helpers
+        schema = {'type': 'array', 'items': {'type': 'number', 'minimum': 0.5}}
+        with patch.object(lale.helpers, 'JSON_META_SCHEMA', None), \
+             patch.object(lale.helpers, '_json_meta_validator', None), \
+             patch.object(lale.helpers, '_valid_schemas', {}), \
+             patch.object(urllib.request, 'urlopen', side_effect=OSError('offline')):
+            self.assertTrue(lale.helpers.is_schema(schema))
+            lale.helpers.validate_is_schema(schema)
+            with self.assertRaises(jsonschema.ValidationError):
+                lale.helpers.validate_is_schema({'type': 'array', 'minItems': -1})
+            self.assertFalse(lale.helpers.is_schema({'type': 'some'}))
+
+    def test_meta_schema_memoized(self):
+        from unittest.mock import patch
+        import lale.helpers
+        schema = {'type': 'object', 'properties': {'n': {'type': 'integer'}}}
+        lale.helpers.validate_is_schema(schema)
+        validator = lale.helpers.json_meta_validator()
+        with patch.object(validator, 'validate') as validate, \
+             patch.object(validator, 'is_valid') as is_valid:
+            lale.helpers.validate_is_schema(dict(schema))
+            self.assertTrue(lale.helpers.is_schema(dict(schema)))
+        self.assertEqual(0, validate.call_count + is_valid.call_count)
+
+class TestValidationSettings(unittest.TestCase):
+    def setUp(self):
+        from sklearn.datasets import load_iris
+        data = load_iris()
+        self.X, self.y = data.data, data.target
+
+    def test_off(self):
+        import lale.settings
+        from unittest.mock import patch
+        with lale.settings.validation(mode='off'):
+            with patch.object(lale.operators.helpers, 'validate_schema') as validate:
+                trained = LogisticRegression().fit(self.X, self.y)
+                trained.predict(self.X)
+            self.assertEqual(0, validate.call_count)
+            LogisticRegression(C=-1)
+        self.assertEqual('sampled', lale.settings.get_validation()['mode'])
+        with self.assertRaises(jsonschema.ValidationError):
+            LogisticRegression(C=-1)
+
+    def test_entry(self):
+        import lale.settings
+        from lale.lib.lale import NoOp
+        from unittest.mock import patch
+        trained = (PCA() >> LogisticRegression()).fit(self.X, self.y)
+        with patch.object(lale.operators.helpers, 'validate_schema') as validate:
+            trained.predict(self.X)
+        full_count = validate.call_count
+        with lale.settings.validation(mode='entry'):
+            with patch.object(lale.operators.helpers, 'validate_schema') as validate:
+                trained.predict(self.X)
+            self.assertEqual(1, validate.call_count)
+            with self.assertRaises(jsonschema.ValidationError):
+                trained.predict([['a', 'b', 'c', 'd']])
+            with self.assertRaises(jsonschema.ValidationError):
+                LogisticRegression(C=-1)
+            (NoOp() >> LogisticRegression()).fit(self.X, self.y)
+        self.assertEqual(4, full_count)
+
+    def test_sampled_rows(self):
+        import numpy as np
+        import lale.settings
+        from lale import schemas
+        labels = {'type': 'array', 'items': {'type': 'integer', 'minimum': 0}}
+        trained = LogisticRegression.customize_schema(output=schemas.JSON(labels))().fit(self.X, self.y)
+        predictions = np.zeros(len(self.X), dtype=np.int64)
+        predictions[100] = -1
+        trained._impl.predict = lambda X: predictions
+        trained.predict(self.X)
+        with lale.settings.validation(mode='sampled', sample_rows=150):
+            with self.assertRaises(jsonschema.ValidationError):
+                trained.predict(self.X)
+        with lale.settings.validation(mode='full'):
+            with self.assertRaises(jsonschema.ValidationError):
+                trained.predict(self.X)
+        with lale.settings.validation(sample_rows=5, seed=42):
+            trained.predict(self.X)
+
+    def test_unknown_mode(self):
+        import lale.settings
+        with self.assertRaises(ValueError):
+            lale.settings.validation(mode='some')
+
 class TestErrorMessages(unittest.TestCase):
     def test_wrong_cont(self):
         with self.assertRaises(jsonschema.ValidationError) as cm:
@@ -345,3 +345,101 @@ class TestConcatFeatures(unittest.TestCase):
         (X_train, y_train), (X_test, y_test) = load_iris_df()
         trained = trainable.fit(X_train, y_train)
         predicted = trained.predict(X_test)
+
+    def test_sparse_and_dense(self):
+        import numpy as np
+        import scipy.sparse
+        A = scipy.sparse.random(50, 1000, density=0.01, format='csr', random_state=42)
+        B = np.arange(100.0).reshape(50, 2)
+        expected = np.hstack([A.toarray(), B])
+        sparse_result = ConcatFeatures().transform([A, B])
+        self.assertTrue(scipy.sparse.isspmatrix_csr(sparse_result))
+        self.assertTrue(np.array_equal(expected, sparse_result.toarray()))
+        dense_result = ConcatFeatures(sparse_threshold=0).transform([A, B])
+        self.assertIsInstance(dense_result, np.ndarray)
+        self.assertTrue(np.array_equal(expected, dense_result))
+
+    def test_dense_only(self):
+        import numpy as np
+        import pandas as pd
+        A = np.arange(6).reshape(3, 2)
+        B = pd.DataFrame({'x': [0.5, 1.5, 2.5]})
+        C = np.array([7, 8, 9])
+        result = ConcatFeatures().transform([A, B, C])
+        self.assertEqual(np.float64, result.dtype)
+        self.assertTrue(np.array_equal([[0, 1, 0.5, 7], [2, 3, 1.5, 8], [4, 5, 2.5, 9]], result))
+
+    def test_transform_schema_rows(self):
+        import numpy as np
+        from lale.datasets.data_schemas import to_schema
+        s_X = to_schema(np.zeros((10, 3)))
+        s_result = ConcatFeatures.transform_schema({'items': [s_X, s_X]})
+        self.assertEqual(10, s_result['minItems'])
+        self.assertEqual(10, s_result['maxItems'])
+        self.assertEqual(6, s_result['items']['maxItems'])
+
+class TestSampleBasedVoting(unittest.TestCase):
+    def test_majority(self):
+        import numpy as np
+        from lale.lib.lale import SampleBasedVoting
+        trainable = SampleBasedVoting()
+        trainable._impl.set_meta_data({'end_index_list': [3, 6, 8]})
+        result = trainable._impl.transform(np.array([1, 1, 2, 3, 3, 2, 5, 2]))
+        self.assertTrue(np.array_equal([1, 3, 2], result))
+
+    def test_weighted_and_probability(self):
+        import numpy as np
+        from lale.lib.lale import SampleBasedVoting
+        weighted = SampleBasedVoting(voting='weighted')._impl
+        result = weighted.transform(np.array(['a', 'a', 'b', 'b']), end_index_list=[3, 4],
+                                    sample_weight=[1, 1, 3, 1])
+        self.assertTrue(np.array_equal(['b', 'b'], result))
+        probability = SampleBasedVoting(voting='probability')._impl
+        X = np.array([[0.9, 0.1], [0.2, 0.8], [0.4, 0.6], [0.1, 0.9]])
+        result = probability.transform(X, end_index_list=[1, 4])
+        self.assertTrue(np.array_equal([0, 1], result))
+
+    def test_invalid_end_index_list(self):
+        import numpy as np
+        from lale.lib.lale import SampleBasedVoting
+        with self.assertRaises(ValueError):
+            SampleBasedVoting()._impl.transform(np.zeros(4), end_index_list=[2, 5])
+
+class TestTimeFreqEigenVectors(unittest.TestCase):
+    def test_batch_matches_windows(self):
+        import numpy as np
+        from lale.lib.lale.time_series_transformer import FFTWithTimeFreqCorrelation, sliding_windows
+        recording = np.random.RandomState(42).randn(4, 300)
+        features = FFTWithTimeFreqCorrelation(1, 24, 100, 'first_axis')
+        windows = sliding_windows(recording, 100, 50)
+        self.assertEqual(4, len(windows))
+        expected = np.array([features.apply(w.copy()) for w in windows])
+        self.assertTrue(np.allclose(expected, features.apply_batch(windows)))
+
+    def test_transform(self):
+        import numpy as np
+        from lale.lib.lale.time_series_transformer import TimeFreqEigenVectors
+        rng = np.random.RandomState(42)
+        X = [rng.randn(4, 300), rng.randn(4, 90), rng.randn(4, 200)]
+        trainable = TimeFreqEigenVectors(sampling_frequency=100)
+        X_transformed, y_transformed = trainable._impl.transform(X, np.array([0, 1, 2]))
+        self.assertEqual([4, 4, 6], trainable._impl.end_index_list)
+        self.assertEqual(6, len(X_transformed))
+        self.assertTrue(np.array_equal([0, 0, 0, 0, 2, 2], y_transformed))
+
+    def test_transform_stream(self):
+        import numpy as np
+        from lale.lib.lale.time_series_transformer import FFTWithTimeFreqCorrelation, TimeFreqEigenVectors
+        rng = np.random.RandomState(42)
+        X = [rng.randn(4, 3000), rng.randn(4, 90), rng.randn(4, 200)]
+        trainable = TimeFreqEigenVectors(sampling_frequency=100)
+        X_expected, y_expected = trainable._impl.transform(X, np.array([0, 1, 2]))
+        blocks = [[x[:, i:i + 70] for i in range(0, x.shape[1], 70)] for x in X]
+        batches = list(trainable._impl.transform_stream(blocks, np.array([0, 1, 2])))
+        X_streamed = np.concatenate([rows for rows, _, _ in batches])
+        y_streamed = np.concatenate([labels for _, labels, _ in batches])
+        self.assertTrue(np.allclose(X_expected, X_streamed))
+        self.assertTrue(np.array_equal(y_expected, y_streamed))
+        self.assertEqual([58, 58, 60], batches[-1][2])
+        features = FFTWithTimeFreqCorrelation(1, 24, 100, 'first_axis')
+        self.assertEqual(X_expected.shape[1], features.n_features(4, 100))
@@ -251,6 +251,23 @@ class TestCustomSchema(unittest.TestCase):
         self.assertEqual(self.ll_pca.hyperparam_schema()['allOf'][0]['relevantToOptimizer'], init)
         self.assertRaises(Exception, self.sk_pca.customize_schema, relevantToOptimizer={})
         
+    def test_cached_validators(self):
+        import jsonschema
+        from sklearn.datasets import load_iris
+        X, y = load_iris(return_X_y=True)
+        pca = self.ll_pca(n_components=2)
+        trained = pca.fit(X)
+        trained.transform(X)
+        self.assertIs(pca._validators, trained._validators)
+        validators = dict(trained._validators)
+        trained.transform(X)
+        self.assertEqual(validators, trained._validators)
+        foo = self.ll_pca.customize_schema(
+            n_components=schemas.Int(default=1, min=1, max=1))
+        self.assertEqual(foo._validators, {})
+        self.assertRaises(jsonschema.ValidationError, foo, n_components=2)
+        foo(n_components=1).fit(X)
+
     def test_load_schema(self):
         from lale.operators import make_operator
         new_pca = make_operator(sklearn.decomposition.PCA)
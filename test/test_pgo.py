@@ -41,6 +41,34 @@ class TestPGOLoad(unittest.TestCase):
         samples:List[str] = dist.samples(10)
 #        print(f"LR[C] samples: {samples}")
 
+    def test_pgo_sample_seeded(self):
+        import numpy as np
+        pgo = PGO.load_pgo_file(example_pgo_fp)
+        dist = PGO.FrequencyDistribution.asIntegerValues(pgo["LogisticRegression"]["C"].items())
+        self.assertEqual(dist.samples(20, rng=42), dist.samples(20, rng=42))
+        stream1, stream2 = np.random.RandomState(7), np.random.RandomState(7)
+        for _ in range(3):
+            self.assertEqual(dist.samples(5, rng=stream1), dist.samples(5, rng=stream2))
+        import random
+        random.seed(5)
+        first = [dist.sample() for _ in range(10)]
+        random.seed(5)
+        self.assertEqual(first, [dist.sample() for _ in range(10)])
+        for value in dist.samples(100):
+            self.assertIn(value, dist.vals.tolist())
+            if value is not PGO._default_value:
+                self.assertIsInstance(value, int)
+
+    def test_pgo_slice(self):
+        import numpy as np
+        dist = PGO.FrequencyDistribution.asIntegerValues([('1', 3), ('5', 1), ('2', 2), ('default', 2)])
+        expanded = [1, 1, 1, 2, 2, 5, PGO._default_value, PGO._default_value]
+        self.assertEqual(len(expanded), len(dist))
+        for key in [slice(None), slice(1, 4), slice(2, 3), slice(4, 4), slice(-3, None), slice(0, 8, 3)]:
+            self.assertEqual(expanded[key], dist[key])
+        self.assertEqual(expanded, [dist[i] for i in range(len(dist))])
+        self.assertEqual(np.dtype(int), PGO.FrequencyDistribution.asIntegerValues([('1', 3)]).vals.dtype)
+
 class TestPGOGridSearchCV(unittest.TestCase):
     def test_lr_parameters(self):
         pgo = PGO.load_pgo_file(example_pgo_fp)
@@ -79,6 +107,18 @@ class TestPGOHyperopt(unittest.TestCase):
         lr = LogisticRegression()
         parameters:SearchSpace = hyperopt_search_space(lr, pgo=pgo)
 
+    def test_lr_print_space(self):
+        import lale.search.schema2search_space as opt
+        from lale.search.HP import search_space_to_hp_str
+        pgo = PGO.load_pgo_file(example_pgo_fp)
+
+        lr = LogisticRegression()
+        schema = lr.hyperparam_schema_with_hyperparams()
+        _, hp_s = opt.schemaToSimplifiedAndSearchSpace(
+            lr._impl.__module__ + '.' + lr.name(), lr.name(), schema, pgo=pgo)
+        space_str = search_space_to_hp_str(hp_s, 'LogisticRegression')
+        self.assertIn('pgo_', space_str)
+
     def test_lr_run(self):
         pgo = PGO.load_pgo_file(example_pgo_fp)
 
@@ -38,6 +38,21 @@ from lale.lib.sklearn import StandardScaler
 from lale.lib.sklearn import FeatureAgglomeration
 from lale.search.GridSearchCV import LaleGridSearchCV, get_grid_search_parameter_grids
 
+class FitTransformEstimatorImpl():
+    """An estimator that has fit_transform but no transform."""
+    def __init__(self):
+        pass
+
+    def fit(self, X, y=None):
+        return self
+
+    def fit_transform(self, X, y=None):
+        raise AssertionError('not a transformer')
+
+    def predict(self, X):
+        import numpy as np
+        return np.zeros((len(X), 1))
+
 class TestImportExport(unittest.TestCase):
     def setUp(self):
         from sklearn.datasets import load_iris
@@ -309,3 +324,152 @@ class TestComposition(unittest.TestCase):
         pipeline.fit(self.X_train, self.y_train)
         tmp = pipeline.predict_proba(self.X_test)
         tmp = pipeline.predict(self.X_test)
+    def test_parallel_branches(self):
+        import numpy as np
+        def make():
+            return (PCA(n_components=2) & Nystroem(n_components=3, random_state=42) & NoOp()) >> ConcatFeatures() >> LogisticRegression()
+        serial = make().fit(self.X_train, self.y_train)
+        expected = serial.predict_proba(self.X_test)
+        for executor in ['thread', 'process']:
+            trained = make().fit(self.X_train, self.y_train, n_jobs=2, executor=executor)
+            self.assertIsInstance(trained, TrainedPipeline)
+            np.testing.assert_allclose(expected, trained.predict_proba(self.X_test, n_jobs=2, executor=executor))
+            np.testing.assert_array_equal(serial.predict(self.X_test), trained.predict(self.X_test, n_jobs=2, executor=executor))
+    def test_parallel_unknown_executor(self):
+        pipeline = (PCA() & NoOp()) >> ConcatFeatures() >> LogisticRegression()
+        with self.assertRaises(ValueError):
+            pipeline.fit(self.X_train, self.y_train, n_jobs=2, executor='gpu')
+    def test_peak_memory_linear(self):
+        from lale.operators import make_pipeline
+        steps = [StandardScaler() for _ in range(8)] + [LogisticRegression()]
+        pipeline = make_pipeline(*steps)
+        self.assertIsNone(pipeline.peak_memory())
+        trained = pipeline.fit(self.X_train, self.y_train)
+        self.assertLessEqual(pipeline.peak_memory(), 2 * self.X_train.nbytes)
+        predictions = trained.predict(self.X_test)
+        self.assertEqual(len(predictions), len(self.X_test))
+        self.assertLessEqual(trained.peak_memory(), 2 * self.X_test.nbytes)
+    def test_fit_transform_fast_path(self):
+        import numpy as np
+        import sklearn.decomposition
+        import sklearn.linear_model
+        import sklearn.pipeline
+        from unittest import mock
+        pipeline = PCA(n_components=2) >> LogisticRegression()
+        with mock.patch.object(sklearn.decomposition.PCA, 'transform', side_effect=AssertionError):
+            trained = pipeline.fit(self.X_train, self.y_train)
+        expected = sklearn.pipeline.make_pipeline(
+            sklearn.decomposition.PCA(n_components=2),
+            sklearn.linear_model.LogisticRegression())
+        expected.fit(self.X_train, self.y_train)
+        np.testing.assert_allclose(expected.predict_proba(self.X_test), trained.predict_proba(self.X_test))
+    def test_fit_transform_only_for_transformers(self):
+        import sklearn.cluster
+        from unittest import mock
+        from lale.operators import make_operator
+        FitTransformEstimator = make_operator(FitTransformEstimatorImpl)
+        trained = (FitTransformEstimator() >> LogisticRegression()).fit(self.X_train, self.y_train)
+        self.assertEqual(len(self.X_test), len(trained.predict(self.X_test)))
+        KMeans = make_operator(sklearn.cluster.KMeans)
+        with mock.patch.object(sklearn.cluster.KMeans, 'fit_transform', side_effect=AssertionError):
+            trained = (PCA(n_components=2) >> KMeans(n_clusters=3)).fit(self.X_train, self.y_train)
+    def test_predict_batches(self):
+        import numpy as np
+        import os
+        import tempfile
+        pipeline = (StandardScaler() & PCA(n_components=2)) >> ConcatFeatures() >> LogisticRegression()
+        trained = pipeline.fit(self.X_train, self.y_train)
+        expected = trained.predict(self.X_test)
+        batches = [self.X_test[i:i + 7] for i in range(0, len(self.X_test), 7)]
+        result = np.concatenate(list(trained.predict_batches(iter(batches))))
+        np.testing.assert_array_equal(expected, result)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'X_test.dat')
+            X_mmap = np.memmap(path, dtype=self.X_test.dtype, mode='w+', shape=self.X_test.shape)
+            X_mmap[:] = self.X_test
+            result = np.concatenate(list(trained.predict_batches(X_mmap, batch_size=5, prefetch=2)))
+            del X_mmap
+        np.testing.assert_array_equal(expected, result)
+        transformed = np.concatenate(list(trained.transform_batches(self.X_test, batch_size=5, prefetch=1)))
+        np.testing.assert_array_equal(trained.transform(self.X_test), transformed)
+    def test_predict_batches_errors(self):
+        trained = (StandardScaler() >> LogisticRegression()).fit(self.X_train, self.y_train)
+        with self.assertRaises(ValueError):
+            next(trained.predict_batches(self.X_test))
+        def failing_batches():
+            yield self.X_test[:5]
+            raise IOError('disk gone')
+        batches = trained.predict_batches(failing_batches(), prefetch=2)
+        self.assertEqual(len(next(batches)), 5)
+        with self.assertRaises(IOError):
+            next(batches)
+    def test_compiled_plan(self):
+        import numpy as np
+        pipeline = StandardScaler() >> (LogisticRegression() & PCA()) >> ConcatFeatures() >> (NoOp() & LinearSVC()) >> ConcatFeatures() >> KNeighborsClassifier()
+        trained = pipeline.fit(self.X_train, self.y_train)
+        self.assertIs(trained, trained.compile())
+        plan = trained._plan('predict')
+        np.testing.assert_array_equal(trained.predict(self.X_test, n_jobs=2), trained.predict(self.X_test))
+        np.testing.assert_allclose(trained.predict_proba(self.X_test, n_jobs=2), trained.predict_proba(self.X_test))
+        self.assertIs(plan, trained._plan('predict'))
+        trained = (StandardScaler() >> LinearSVC()).fit(self.X_train, self.y_train).compile()
+        with self.assertRaises(ValueError):
+            trained.predict_proba(self.X_test)
+
+class TestFitCache(unittest.TestCase):
+    def setUp(self):
+        from sklearn.datasets import load_iris
+        from sklearn.model_selection import train_test_split
+        data = load_iris()
+        X, y = data.data, data.target
+        self.X_train, self.X_test, self.y_train, self.y_test =  train_test_split(X, y)
+
+    def test_shared_prefix(self):
+        import numpy as np
+        import sklearn.decomposition
+        from unittest import mock
+        from lale.fit_cache import FitCache
+        cache = FitCache()
+        first = (StandardScaler() >> PCA(n_components=2) >> LogisticRegression(C=1.0)).fit(self.X_train, self.y_train, memory=cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        pipeline = StandardScaler() >> PCA(n_components=2) >> LogisticRegression(C=10.0)
+        with mock.patch.object(sklearn.decomposition.PCA, 'fit_transform', side_effect=AssertionError):
+            second = pipeline.fit(self.X_train, self.y_train, memory=cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        expected = pipeline.fit(self.X_train, self.y_train)
+        np.testing.assert_allclose(expected.predict_proba(self.X_test), second.predict_proba(self.X_test))
+        #refitting a trained pipeline must not change the cached steps
+        expected = first.predict_proba(self.X_test)
+        first.fit(self.X_test, self.y_test)
+        third = (StandardScaler() >> PCA(n_components=2) >> LogisticRegression(C=1.0)).fit(self.X_train, self.y_train, memory=cache)
+        self.assertEqual(cache.hits, 5)
+        np.testing.assert_allclose(expected, third.predict_proba(self.X_test))
+
+    def test_disk_tier(self):
+        import numpy as np
+        import tempfile
+        from lale.fit_cache import FitCache
+        def make():
+            return StandardScaler() >> PCA(n_components=2) >> LogisticRegression()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            expected = make().fit(self.X_train, self.y_train, memory=FitCache(max_bytes=0, directory=tmpdir))
+            cache = FitCache(directory=tmpdir)
+            trained = make().fit(self.X_train, self.y_train, memory=cache)
+            self.assertEqual((cache.hits, cache.misses), (3, 0))
+            np.testing.assert_array_equal(expected.predict(self.X_test), trained.predict(self.X_test))
+            cache = FitCache(max_bytes=0, directory=tmpdir, max_disk_bytes=0)
+            make().fit(self.X_test, self.y_test, memory=cache)
+            self.assertEqual(cache.hits, 0)
+            import os
+            self.assertEqual([], [f for f in os.listdir(tmpdir) if f.endswith('.joblib')])
+
+    def test_lru_eviction(self):
+        from lale.fit_cache import FitCache
+        cache = FitCache(max_bytes=self.X_train.nbytes + 2 * self.y_train.nbytes)
+        (StandardScaler() >> LogisticRegression()).fit(self.X_train, self.y_train, memory=cache)
+        (MinMaxScaler() >> LogisticRegression()).fit(self.X_train, self.y_train, memory=cache)
+        self.assertEqual(cache.misses, 4)
+        (MinMaxScaler() >> LogisticRegression()).fit(self.X_train, self.y_train, memory=cache)
+        self.assertEqual(cache.hits, 2)
+        (StandardScaler() >> LogisticRegression()).fit(self.X_train, self.y_train, memory=cache)
+        self.assertEqual(cache.misses, 6)